@@ -22,23 +22,22 @@ class InventoryAgent:
                     "message": "No products specified"
                 }
             
-            # Check inventory for each product
-            inventory_results = []
-            for product_id in product_ids:
-                availability = self.inventory_api.check_availability(product_id, location)
-                fulfillment_options = self.inventory_api.get_fulfillment_options(product_id, location)
-                
-                inventory_results.append({
+            # Check inventory for all products in one pass
+            batch = await self.inventory_api.check_availability_batch_async(product_ids, location)
+            inventory_results = [
+                {
                     "product_id": product_id,
-                    "availability": availability,
-                    "fulfillment_options": fulfillment_options,
-                    "in_stock": availability["available"]
-                })
+                    "availability": result["availability"],
+                    "fulfillment_options": result["fulfillment_options"],
+                    "in_stock": result["in_stock"]
+                }
+                for product_id, result in batch.items()
+            ]
             
             # Get nearby stores if location provided
             nearby_stores = []
             if location:
-                nearby_stores = self.inventory_api.get_nearby_stores(location)
+                nearby_stores = await self.inventory_api.get_nearby_stores_async(location)
             
             return {
                 "success": True,
@@ -59,7 +58,7 @@ class InventoryAgent:
     async def reserve_stock(self, product_id: str, quantity: int, location: Optional[str] = None) -> Dict:
         """Reserve stock for a product"""
         try:
-            result = self.inventory_api.reserve_stock(product_id, quantity, location)
+            result = await self.inventory_api.reserve_stock(product_id, quantity, location)
             return {
                 "success": result["success"],
                 "agent": self.name,
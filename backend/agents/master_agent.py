@@ -5,6 +5,7 @@ import uuid
 
 from utils.gemini_config import analyze_intent, generate_natural_response
 from utils.redis_manager import redis_manager
+from utils.session_interest import update_interest
 from agents.recommendation_agent import recommendation_agent
 from agents.inventory_agent import inventory_agent
 from agents.payment_agent import payment_agent
@@ -104,6 +105,8 @@ class MasterAgent:
         context["query"] = user_message
         context["customer_id"] = customer_id or session_data.get("customer_id")
         context["cart"] = session_data.get("active_cart", {"items": [], "subtotal": 0})
+        # Already loaded with the session, so re-ranking costs no extra read
+        context["session_interest"] = session_data.get("interest")
         
         return context
     
@@ -182,11 +185,12 @@ class MasterAgent:
             aggregated["inventory"] = inventory_data
             
             # Merge inventory with products
+            by_product = {inv["product_id"]: inv for inv in inventory_data}
             for product in aggregated["products"]:
-                for inv in inventory_data:
-                    if product["id"] == inv["product_id"]:
-                        product["stock"] = inv["availability"]
-                        product["fulfillment_options"] = inv["fulfillment_options"]
+                inv = by_product.get(product["id"])
+                if inv is not None:
+                    product["stock"] = inv["availability"]
+                    product["fulfillment_options"] = inv["fulfillment_options"]
         
         # Process payment results
         if "payment" in agent_results and agent_results["payment"].get("success"):
@@ -390,8 +394,11 @@ Ready to proceed with payment?"""
                 "products": aggregated.get("products", [])[:3]  # Store top 3 products
             })
             
+            # Learn from the products shown this turn
+            update_interest(session_data, aggregated.get("products") or [], "shown")
+            
             # Update context
-            session_data["context"] = context
+            session_data["context"] = {k: v for k, v in context.items() if k != "session_interest"}
             session_data["last_updated"] = datetime.now().isoformat()
             
             # Save to Redis
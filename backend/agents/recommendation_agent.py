@@ -1,5 +1,6 @@
 from typing import Dict, List, Optional
 from apis.products_api import products_api
+from utils.session_interest import SESSION_RERANK_POOL, rerank
 
 
 class RecommendationAgent:
@@ -19,11 +20,14 @@ class RecommendationAgent:
             preferences = context.get("preferences", [])
             customer_id = context.get("customer_id")
             query = context.get("query", "")
+            interest = context.get("session_interest")
+            # Over-fetch so session interest can promote items from further down
+            limit = 5 * SESSION_RERANK_POOL if interest else 5
             
             # Get recommendations
             if query and not category:
                 # Search-based recommendations
-                products = self.products_api.search_products(query, limit=5)
+                products = self.products_api.search_products(query, limit=limit)
             else:
                 # Filter-based recommendations
                 products = self.products_api.get_recommendations(
@@ -31,9 +35,12 @@ class RecommendationAgent:
                     category=category,
                     budget=budget,
                     preferences=preferences,
-                    limit=5
+                    limit=limit,
+                    diversity=context.get("diversity", 0.0)
                 )
             
+            products = rerank(products, interest, limit=5)
+            
             # Add reasoning for each recommendation
             recommendations = []
             for product in products:
@@ -0,0 +1,134 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+import threading
+
+import numpy as np
+
+from apis.catalog_store import CatalogSnapshot, catalog_store
+
+
+@dataclass(frozen=True)
+class CatalogColumns:
+    """Column-oriented view of a catalog snapshot for vectorized scoring.
+
+    Row ``i`` of every column describes ``snapshot.products[i]``. Categories
+    and brands are dictionary-encoded into small integer codes.
+    """
+    version: str
+    ids: Sequence[str]
+    row_of: Dict[str, int]
+    price: np.ndarray
+    rating: np.ndarray
+    category: np.ndarray
+    brand: np.ndarray
+    is_trending: np.ndarray
+    is_seasonal: np.ndarray
+    is_bestseller: np.ndarray
+    categories: Sequence[str]
+    brands: Sequence[str]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def rows(self, product_ids: Iterable[str]) -> List[int]:
+        """Row numbers of the given ids, skipping unknown ones"""
+        return [self.row_of[pid] for pid in product_ids if pid in self.row_of]
+
+    def category_codes(self, names: Iterable[str]) -> np.ndarray:
+        index = {name: code for code, name in enumerate(self.categories)}
+        return np.array([index[n] for n in names if n in index], dtype=np.int32)
+
+    def brand_codes(self, names: Iterable[str]) -> np.ndarray:
+        index = {name: code for code, name in enumerate(self.brands)}
+        return np.array([index[n] for n in names if n in index], dtype=np.int32)
+
+
+def _encode(values: Iterable[str]):
+    index: Dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(v, len(index)) for v in values), dtype=np.int32)
+    return codes, list(index)
+
+
+def from_arrays(
+    ids: Sequence[str],
+    price, rating, categories: Sequence[str], brands: Sequence[str],
+    is_trending, is_seasonal, is_bestseller,
+    version: str = ""
+) -> CatalogColumns:
+    """Build columns from raw arrays (used by benchmarks and bulk jobs)"""
+    category, category_names = _encode(categories)
+    brand, brand_names = _encode(brands)
+    return CatalogColumns(
+        version=version,
+        ids=ids,
+        row_of={pid: i for i, pid in enumerate(ids)},
+        price=np.asarray(price, dtype=np.float64),
+        rating=np.asarray(rating, dtype=np.float64),
+        category=category,
+        brand=brand,
+        is_trending=np.asarray(is_trending, dtype=bool),
+        is_seasonal=np.asarray(is_seasonal, dtype=bool),
+        is_bestseller=np.asarray(is_bestseller, dtype=bool),
+        categories=category_names,
+        brands=brand_names
+    )
+
+
+def build_columns(snapshot: CatalogSnapshot) -> CatalogColumns:
+    """Build the columnar view of a snapshot"""
+    from apis.catalog_mmap import MmapProductSequence
+
+    products = snapshot.products
+    if isinstance(products, MmapProductSequence):
+        # Numeric columns are read straight out of the mapped file
+        mapped = products.catalog
+        n = mapped.count
+        flags = np.frombuffer(mapped.flags, dtype=np.uint8)
+        return from_arrays(
+            ids=[mapped.field(i, "id") for i in range(n)],
+            price=np.frombuffer(mapped.price, dtype=np.float64),
+            rating=np.frombuffer(mapped.rating, dtype=np.float64),
+            categories=[mapped.field(i, "category") for i in range(n)],
+            brands=[mapped.field(i, "brand") for i in range(n)],
+            is_trending=(flags & 1).astype(bool),
+            is_seasonal=(flags & 2).astype(bool),
+            is_bestseller=(flags & 4).astype(bool),
+            version=snapshot.version
+        )
+
+    return from_arrays(
+        ids=[p["id"] for p in products],
+        price=[p["price"] for p in products],
+        rating=[p["rating"] for p in products],
+        categories=[p["category"] for p in products],
+        brands=[p["brand"] for p in products],
+        is_trending=[bool(p.get("is_trending")) for p in products],
+        is_seasonal=[bool(p.get("is_seasonal")) for p in products],
+        is_bestseller=[bool(p.get("is_bestseller")) for p in products],
+        version=snapshot.version
+    )
+
+
+class ColumnCache:
+    """Keeps the columns of the most recent snapshot version"""
+
+    def __init__(self):
+        self._columns: Optional[CatalogColumns] = None
+        self._lock = threading.Lock()
+
+    def get(self, snapshot: Optional[CatalogSnapshot] = None) -> CatalogColumns:
+        snapshot = snapshot or catalog_store.snapshot
+        columns = self._columns
+        if columns is not None and columns.version == snapshot.version:
+            return columns
+
+        with self._lock:
+            columns = self._columns
+            if columns is None or columns.version != snapshot.version:
+                columns = build_columns(snapshot)
+                self._columns = columns
+        return columns
+
+
+# Singleton instance
+catalog_columns = ColumnCache()
@@ -0,0 +1,334 @@
+from array import array
+from collections.abc import ItemsView, Mapping, Sequence
+from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, Optional
+import json
+import mmap
+import os
+import struct
+import sys
+
+from apis.catalog_store import CatalogSnapshot
+
+# Binary catalog snapshot shared by all workers through the page cache.
+#
+# Layout (little-endian, every section 8-byte aligned):
+#   header    magic, format, field count, row count, versions, section offsets
+#   price     float64[count]
+#   rating    float64[count]
+#   flags     uint8[count]      bit 0 trending, bit 1 seasonal, bit 2 bestseller
+#   refs      uint32[count][field count][2]   (offset, length) into strings
+#   order     uint32[count]     row numbers sorted by product id
+#   stock     uint32[stocked][4]  (id offset, id length, record offset, record length)
+#                                  sorted by product id; records are JSON
+#   strings   UTF-8 string table, identical strings stored once
+MAGIC = b"RCAT"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<4sHHI16s16sQQQQQQQQI")
+
+STRING_FIELDS = ("id", "name", "image_url", "description", "category", "brand", "sizes", "colors")
+JSON_FIELDS = {"sizes", "colors"}
+FLAG_FIELDS = ("is_trending", "is_seasonal", "is_bestseller")
+
+ROW_CACHE_SIZE = int(os.getenv("CATALOG_ROW_CACHE_SIZE", "4096"))
+STOCK_CACHE_SIZE = int(os.getenv("CATALOG_STOCK_CACHE_SIZE", "4096"))
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def write_catalog_file(snapshot: CatalogSnapshot, path: str):
+    """Serialize a snapshot to the binary format, replacing ``path`` atomically"""
+    if sys.byteorder != "little":
+        raise RuntimeError("Binary catalog snapshots require a little-endian host")
+
+    products = snapshot.products
+    strings = bytearray()
+    interned: Dict[bytes, tuple] = {}
+
+    def intern(value: str) -> tuple:
+        encoded = value.encode("utf-8")
+        if encoded not in interned:
+            interned[encoded] = (len(strings), len(encoded))
+            strings.extend(encoded)
+        return interned[encoded]
+
+    refs = array("I")
+    for product in products:
+        for field in STRING_FIELDS:
+            value = product[field]
+            if field in JSON_FIELDS:
+                value = json.dumps(value, separators=(",", ":"))
+            refs.extend(intern(value))
+
+    stock = array("I")
+    for product_id in sorted(snapshot.inventory):
+        record = snapshot.inventory[product_id]
+        stock.extend(intern(product_id))
+        stock.extend(intern(json.dumps(
+            {"warehouse": record["warehouse"], "stores": dict(record["stores"])}, separators=(",", ":")
+        )))
+
+    price = array("d", (p["price"] for p in products))
+    rating = array("d", (p["rating"] for p in products))
+    flags = bytes(
+        sum(1 << bit for bit, field in enumerate(FLAG_FIELDS) if p[field])
+        for p in products
+    )
+    order = array("I", sorted(range(len(products)), key=lambda i: products[i]["id"]))
+
+    sections = [price.tobytes(), rating.tobytes(), flags, refs.tobytes(), order.tobytes(), stock.tobytes(), bytes(strings)]
+    offsets = []
+    position = _align(HEADER.size)
+    for section in sections:
+        offsets.append(position)
+        position = _align(position + len(section))
+
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, len(STRING_FIELDS), len(products),
+        snapshot.version.encode().ljust(16), snapshot.inventory_version.encode().ljust(16),
+        *offsets, len(strings), len(stock) // 4
+    )
+
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for offset, section in zip(offsets, sections):
+            f.seek(offset)
+            f.write(section)
+        f.truncate(position)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_versions(path: str) -> Optional[tuple]:
+    """Read (version, inventory_version) from a snapshot file header"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(HEADER.size)
+        header = HEADER.unpack(data)
+    except (OSError, struct.error):
+        return None
+
+    if header[0] != MAGIC or header[1] != FORMAT_VERSION:
+        return None
+    return header[4].decode().strip(), header[5].decode().strip()
+
+
+class MmapCatalog:
+    """Zero-copy reader over a memory-mapped catalog snapshot file"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        buf = memoryview(self._mmap)
+        (magic, fmt, field_count, count, version, inventory_version,
+         price_off, rating_off, flags_off, refs_off, order_off, stock_off, strings_off,
+         strings_len, stocked) = HEADER.unpack_from(buf, 0)
+
+        if magic != MAGIC or fmt != FORMAT_VERSION or field_count != len(STRING_FIELDS):
+            raise ValueError(f"Unsupported catalog snapshot file: {path}")
+
+        self.path = path
+        self.count = count
+        self.stocked = stocked
+        self.version = version.decode().strip()
+        self.inventory_version = inventory_version.decode().strip()
+
+        # Column views share memory with the mapping, nothing is copied
+        self.price = buf[price_off:price_off + 8 * count].cast("d")
+        self.rating = buf[rating_off:rating_off + 8 * count].cast("d")
+        self.flags = buf[flags_off:flags_off + count]
+        self._refs = buf[refs_off:refs_off + 8 * field_count * count].cast("I")
+        self._order = buf[order_off:order_off + 4 * count].cast("I")
+        self._stock = buf[stock_off:stock_off + 16 * stocked].cast("I")
+        self._strings = buf[strings_off:strings_off + strings_len]
+
+    def _string(self, offset: int, length: int) -> str:
+        return str(self._strings[offset:offset + length], "utf-8")
+
+    def field(self, row: int, field: str) -> str:
+        """Decode a single string field without materializing the product"""
+        base = (row * len(STRING_FIELDS) + STRING_FIELDS.index(field)) * 2
+        return self._string(self._refs[base], self._refs[base + 1])
+
+    def product(self, row: int) -> Dict:
+        """Materialize one product dict"""
+        base = row * len(STRING_FIELDS) * 2
+        product = {}
+        for i, field in enumerate(STRING_FIELDS):
+            value = self._string(self._refs[base + 2 * i], self._refs[base + 2 * i + 1])
+            product[field] = json.loads(value) if field in JSON_FIELDS else value
+
+        flags = self.flags[row]
+        return {
+            "id": product["id"],
+            "name": product["name"],
+            "price": self.price[row],
+            "rating": self.rating[row],
+            "image_url": product["image_url"],
+            "description": product["description"],
+            "category": product["category"],
+            "brand": product["brand"],
+            "sizes": product["sizes"],
+            "colors": product["colors"],
+            "is_trending": bool(flags & 1),
+            "is_seasonal": bool(flags & 2),
+            "is_bestseller": bool(flags & 4)
+        }
+
+    def find(self, product_id: str) -> Optional[int]:
+        """Binary search the id-ordered index for a row number"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.field(self._order[mid], "id") < product_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            row = self._order[lo]
+            if self.field(row, "id") == product_id:
+                return row
+        return None
+
+    def stock_id(self, i: int) -> str:
+        return self._string(self._stock[4 * i], self._stock[4 * i + 1])
+
+    def find_stock(self, product_id: str) -> Optional[int]:
+        """Binary search the stock index for a product's entry"""
+        lo, hi = 0, self.stocked
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.stock_id(mid) < product_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.stocked and self.stock_id(lo) == product_id:
+            return lo
+        return None
+
+    def stock(self, i: int) -> Mapping:
+        """Decode one stock record"""
+        record = json.loads(self._string(self._stock[4 * i + 2], self._stock[4 * i + 3]))
+        return MappingProxyType({"warehouse": record["warehouse"], "stores": MappingProxyType(record["stores"])})
+
+
+class MmapProductSequence(Sequence):
+    """Read-only sequence of product dicts backed by an MmapCatalog.
+
+    Rows are decoded on access; a bounded cache keeps hot products
+    materialized without holding the whole catalog in Python objects.
+    """
+
+    def __init__(self, catalog: MmapCatalog, cache_size: int = ROW_CACHE_SIZE):
+        self.catalog = catalog
+        self._row = lru_cache(maxsize=cache_size)(catalog.product)
+
+    def __len__(self) -> int:
+        return self.catalog.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self.catalog.count))]
+        if index < 0:
+            index += self.catalog.count
+        if not 0 <= index < self.catalog.count:
+            raise IndexError("product index out of range")
+        return self._row(index)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self.catalog.count):
+            yield self._row(i)
+
+    def project(self, fields: Sequence[str]) -> Iterator[Dict]:
+        """Decode only these string fields of every row, bypassing the row cache"""
+        catalog = self.catalog
+        decoders = [(field, json.loads if field in JSON_FIELDS else None) for field in fields]
+        for i in range(catalog.count):
+            row = {}
+            for field, decode in decoders:
+                value = catalog.field(i, field)
+                row[field] = decode(value) if decode else value
+            yield row
+
+
+class MmapProductIndex(Mapping):
+    """Read-only product-id mapping over an MmapProductSequence"""
+
+    def __init__(self, products: MmapProductSequence):
+        self.products = products
+
+    def __getitem__(self, product_id: str) -> Dict:
+        row = self.products.catalog.find(product_id)
+        if row is None:
+            raise KeyError(product_id)
+        return self.products[row]
+
+    def __iter__(self) -> Iterator[str]:
+        catalog = self.products.catalog
+        for i in range(catalog.count):
+            yield catalog.field(i, "id")
+
+    def __len__(self) -> int:
+        return self.products.catalog.count
+
+
+class MmapInventory(Mapping):
+    """Read-only product-id -> stock record mapping decoded from the file on lookup"""
+
+    def __init__(self, catalog: MmapCatalog, cache_size: int = STOCK_CACHE_SIZE):
+        self.catalog = catalog
+        self._record = lru_cache(maxsize=cache_size)(catalog.stock)
+
+    def __getitem__(self, product_id: str) -> Mapping:
+        i = self.catalog.find_stock(product_id)
+        if i is None:
+            raise KeyError(product_id)
+        return self._record(i)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(self.catalog.stocked):
+            yield self.catalog.stock_id(i)
+
+    def __len__(self) -> int:
+        return self.catalog.stocked
+
+    def items(self) -> ItemsView:
+        return _MmapInventoryItems(self)
+
+
+class _MmapInventoryItems(ItemsView):
+    def __iter__(self):
+        # Sequential decode without a binary search per key
+        inventory = self._mapping
+        for i in range(inventory.catalog.stocked):
+            yield inventory.catalog.stock_id(i), inventory._record(i)
+
+
+def project(products: Sequence[Dict], fields: Sequence[str]) -> Iterable[Dict]:
+    """Rows carrying at least these fields; mapped catalogs decode nothing else"""
+    if isinstance(products, MmapProductSequence):
+        return products.project(fields)
+    return products
+
+
+def open_snapshot(path: str) -> CatalogSnapshot:
+    """Open a snapshot file as a CatalogSnapshot served straight from the mapping"""
+    catalog = MmapCatalog(path)
+    products = MmapProductSequence(catalog)
+
+    return CatalogSnapshot(
+        version=catalog.version,
+        products=products,
+        by_id=MmapProductIndex(products),
+        inventory=MmapInventory(catalog),
+        inventory_version=catalog.inventory_version,
+        loaded_at=datetime.fromtimestamp(os.path.getmtime(path)),
+        source="mmap"
+    )
@@ -0,0 +1,294 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+import hashlib
+import json
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from models.seed_data import MOCK_PRODUCTS, MOCK_INVENTORY
+
+load_dotenv()
+
+CATALOG_REFRESH_INTERVAL = float(os.getenv("CATALOG_REFRESH_INTERVAL", "60"))
+# When set, workers share one memory-mapped binary snapshot at this path
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", "")
+
+PRODUCT_FIELDS = (
+    "id", "name", "price", "rating", "image_url", "description", "category",
+    "brand", "sizes", "colors", "is_trending", "is_seasonal", "is_bestseller"
+)
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable, versioned view of the product catalog.
+
+    A snapshot is never modified after it is built. Refreshes build a new
+    snapshot and swap the reference, so readers grab ``catalog_store.snapshot``
+    once and work on a consistent catalog without taking any lock. Product
+    dicts are shared between all readers and must be treated as read-only.
+    """
+    version: str
+    products: Sequence[Dict]
+    by_id: Mapping[str, Dict]
+    inventory: Mapping[str, Dict]
+    inventory_version: str
+    loaded_at: datetime
+    source: str
+
+    def get(self, product_id: str) -> Optional[Dict]:
+        """Get a product by ID"""
+        return self.by_id.get(product_id)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+
+def _normalize_product(row: Mapping) -> Dict:
+    """Coerce a product row (seed dict or DB row) into the API shape"""
+    return {
+        "id": row["id"],
+        "name": row["name"],
+        "price": float(row["price"]),
+        "rating": float(row["rating"] or 0),
+        "image_url": row["image_url"],
+        "description": row["description"],
+        "category": row["category"],
+        "brand": row["brand"],
+        "sizes": list(row["sizes"] or []),
+        "colors": list(row["colors"] or []),
+        "is_trending": bool(row["is_trending"]),
+        "is_seasonal": bool(row["is_seasonal"]),
+        "is_bestseller": bool(row["is_bestseller"])
+    }
+
+
+def _digest(payload) -> str:
+    """Content hash used as a version, stable across workers and restarts"""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def build_snapshot(products: Iterable[Mapping], inventory: Mapping[str, Mapping], source: str) -> CatalogSnapshot:
+    """Build an immutable snapshot from product rows and stock records"""
+    rows = tuple(_normalize_product(p) for p in products)
+    stock = {
+        product_id: MappingProxyType({
+            "warehouse": int(record["warehouse"] or 0),
+            "stores": MappingProxyType({store: int(qty) for store, qty in (record["stores"] or {}).items()})
+        })
+        for product_id, record in inventory.items()
+    }
+
+    return CatalogSnapshot(
+        version=_digest(rows),
+        products=rows,
+        by_id=MappingProxyType({p["id"]: p for p in rows}),
+        inventory=MappingProxyType(stock),
+        inventory_version=_digest({pid: {"warehouse": s["warehouse"], "stores": dict(s["stores"])} for pid, s in stock.items()}),
+        loaded_at=datetime.now(),
+        source=source
+    )
+
+
+@contextmanager
+def _try_exclusive_lock(path: str):
+    """Non-blocking inter-process lock; yields whether it was acquired"""
+    try:
+        import fcntl
+    except ImportError:
+        # No flock on this platform: every worker acts as the writer
+        yield True
+        return
+
+    with open(path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class CatalogStore:
+    """Holds the current catalog snapshot and refreshes it from the database"""
+
+    def __init__(self, snapshot_path: str = CATALOG_SNAPSHOT_PATH):
+        # Serve the seed catalog until the database has been loaded
+        self._snapshot = build_snapshot(MOCK_PRODUCTS, MOCK_INVENTORY, source="seed")
+        self.snapshot_path = snapshot_path
+        self.refresh_interval = CATALOG_REFRESH_INTERVAL
+        self._listeners: List[Callable[[CatalogSnapshot, CatalogSnapshot], None]] = []
+        self._write_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """Current snapshot; a plain attribute read, readers never lock"""
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+
+    def subscribe(self, listener: Callable[[CatalogSnapshot, CatalogSnapshot], None]):
+        """Register a callback invoked with (old, new) whenever the catalog changes"""
+        self._listeners.append(listener)
+
+    def load(self) -> CatalogSnapshot:
+        """Create tables, seed an empty database and load the catalog"""
+        # Workers attach to an existing shared snapshot without querying the database
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            try:
+                return self._attach_file()
+            except Exception as e:
+                print(f"⚠️  Catalog snapshot file unreadable, loading from database: {e}")
+
+        try:
+            from models.database import init_db
+            init_db()
+            self._seed_if_empty()
+            return self.refresh(force=True)
+        except Exception as e:
+            print(f"⚠️  Catalog database not available, serving seed catalog: {e}")
+            return self._snapshot
+
+    def refresh(self, force: bool = False) -> CatalogSnapshot:
+        """Bulk-load the catalog from the database and swap it in if it changed"""
+        if self.snapshot_path:
+            return self._refresh_shared(force)
+
+        products, inventory = self._fetch_from_db()
+        return self.publish(build_snapshot(products, inventory, source="database"))
+
+    def _refresh_shared(self, force: bool) -> CatalogSnapshot:
+        """Refresh through the snapshot file so all workers map the same pages.
+
+        Whichever worker wins the file lock reloads the database and rewrites
+        the file if the catalog changed; every worker then re-maps the file.
+        """
+        from apis.catalog_mmap import read_versions, write_catalog_file
+
+        path = self.snapshot_path
+        with _try_exclusive_lock(f"{path}.lock") as is_writer:
+            if is_writer and (force or self._file_is_stale()):
+                products, inventory = self._fetch_from_db()
+                snapshot = build_snapshot(products, inventory, source="database")
+                if read_versions(path) != (snapshot.version, snapshot.inventory_version):
+                    write_catalog_file(snapshot, path)
+                else:
+                    os.utime(path)
+
+        return self._attach_file()
+
+    def _file_is_stale(self) -> bool:
+        try:
+            age = time.time() - os.path.getmtime(self.snapshot_path)
+        except OSError:
+            return True
+        return age >= self.refresh_interval / 2
+
+    def _attach_file(self) -> CatalogSnapshot:
+        """Map the snapshot file unless the current snapshot already matches it"""
+        from apis.catalog_mmap import open_snapshot, read_versions
+
+        current = self._snapshot
+        if (current.source == "mmap" and
+                read_versions(self.snapshot_path) == (current.version, current.inventory_version)):
+            return current
+        return self.publish(open_snapshot(self.snapshot_path))
+
+    def publish(self, snapshot: CatalogSnapshot) -> CatalogSnapshot:
+        """Atomically replace the current snapshot (copy-on-write)"""
+        with self._write_lock:
+            old = self._snapshot
+            if (snapshot.version == old.version and
+                    snapshot.inventory_version == old.inventory_version and
+                    snapshot.source == old.source):
+                return old
+            self._snapshot = snapshot
+
+        print(f"✓ Catalog loaded from {snapshot.source}: {len(snapshot)} products (version {snapshot.version})")
+        for listener in list(self._listeners):
+            try:
+                listener(old, snapshot)
+            except Exception as e:
+                print(f"Catalog listener error: {e}")
+        return snapshot
+
+    def start_background_refresh(self, interval: float = CATALOG_REFRESH_INTERVAL):
+        """Periodically reload the catalog in a daemon thread"""
+        if interval <= 0 or self._refresh_thread is not None:
+            return
+
+        self.refresh_interval = interval
+        self._stop_event.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop,
+            args=(interval,),
+            name="catalog-refresh",
+            daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        self._stop_event.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout=5)
+            self._refresh_thread = None
+
+    def _refresh_loop(self, interval: float):
+        while not self._stop_event.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Catalog refresh error: {e}")
+
+    def _fetch_from_db(self):
+        from sqlalchemy import select
+        from models.database import SessionLocal, Product, Inventory
+
+        columns = [Product.__table__.c[name] for name in PRODUCT_FIELDS]
+        with SessionLocal() as db:
+            products = db.execute(select(*columns).order_by(Product.id)).mappings().all()
+            stock_rows = db.execute(
+                select(Inventory.product_id, Inventory.warehouse_stock, Inventory.store_stocks)
+                .order_by(Inventory.id)
+            ).all()
+
+        # Later rows win if a product has several inventory records
+        inventory = {
+            product_id: {"warehouse": warehouse, "stores": stores}
+            for product_id, warehouse, stores in stock_rows
+        }
+        return products, inventory
+
+    def _seed_if_empty(self):
+        from sqlalchemy import insert, select
+        from models.database import SessionLocal, Product, Inventory
+
+        with SessionLocal() as db:
+            if db.execute(select(Product.id).limit(1)).first() is not None:
+                return
+
+            db.execute(insert(Product), [dict(p) for p in MOCK_PRODUCTS])
+            db.execute(insert(Inventory), [
+                {"product_id": product_id, "warehouse_stock": stock["warehouse"], "store_stocks": stock["stores"]}
+                for product_id, stock in MOCK_INVENTORY.items()
+            ])
+            db.commit()
+            print(f"✓ Seeded catalog database with {len(MOCK_PRODUCTS)} products")
+
+
+# Singleton instance
+catalog_store = CatalogStore()
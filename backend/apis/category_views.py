@@ -0,0 +1,82 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+import threading
+
+import numpy as np
+
+from apis.catalog_columns import CatalogColumns, catalog_columns
+from apis.catalog_store import CatalogSnapshot, catalog_store
+
+# Orderings ProductsAPI.get_products offers that have a pre-ranked view
+VIEW_ORDERS = ("rating", "trending")
+
+
+@dataclass(frozen=True)
+class CategoryViews:
+    """Catalog rows grouped by (case-insensitive) category, pre-sorted.
+
+    Within a category, ``by_rating`` is rating descending and
+    ``by_trending`` is (is_trending, rating) descending. Equal keys keep
+    catalog order, exactly like the stable sorts in get_products, so the
+    first N entries of a view equal ``get_products(category, sort, N)``.
+    """
+    version: str
+    codes: Dict[str, int]
+    offsets: np.ndarray
+    by_rating: np.ndarray
+    by_trending: np.ndarray
+
+    def top(self, category: str, n: int, order: str = "rating") -> np.ndarray:
+        """First ``n`` rows of a category's view; empty for unknown categories"""
+        code = self.codes.get(category.lower())
+        if code is None:
+            return np.empty(0, dtype=np.intp)
+        view = self.by_trending if order == "trending" else self.by_rating
+        start = self.offsets[code]
+        return view[start:min(start + max(n, 0), self.offsets[code + 1])]
+
+
+def build_views(columns: CatalogColumns) -> CategoryViews:
+    """Sort every category at once with one lexsort per ordering"""
+    lowered = [name.lower() for name in columns.categories]
+    codes: Dict[str, int] = {}
+    remap = np.array([codes.setdefault(name, len(codes)) for name in lowered], dtype=np.int32)
+    group = remap[columns.category] if len(columns) else np.empty(0, dtype=np.int32)
+
+    rows = np.arange(len(columns))
+    by_rating = np.lexsort((rows, -columns.rating, group))
+    by_trending = np.lexsort((rows, -columns.rating, -columns.is_trending.astype(np.int8), group))
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(group, minlength=len(codes)))])
+    return CategoryViews(
+        version=columns.version,
+        codes=codes,
+        offsets=offsets,
+        by_rating=by_rating,
+        by_trending=by_trending
+    )
+
+
+class CategoryViewCache:
+    """Keeps the views of the current snapshot, rebuilt as soon as it is published"""
+
+    def __init__(self):
+        self._views: Optional[CategoryViews] = None
+        self._lock = threading.Lock()
+        catalog_store.subscribe(lambda old, new: self.get(new))
+
+    def get(self, snapshot: Optional[CatalogSnapshot] = None) -> CategoryViews:
+        snapshot = snapshot or catalog_store.snapshot
+        views = self._views
+        if views is not None and views.version == snapshot.version:
+            return views
+
+        with self._lock:
+            views = self._views
+            if views is None or views.version != snapshot.version:
+                views = build_views(catalog_columns.get(snapshot))
+                self._views = views
+        return views
+
+
+# Singleton instance
+category_views = CategoryViewCache()
@@ -0,0 +1,349 @@
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+COOCCURRENCE_HALF_LIFE_DAYS = float(os.getenv("COOCCURRENCE_HALF_LIFE_DAYS", "30"))
+COOCCURRENCE_SNAPSHOT_PATH = os.getenv("COOCCURRENCE_SNAPSHOT_PATH", "./cooccurrence.npz")
+COOCCURRENCE_SNAPSHOT_INTERVAL = float(os.getenv("COOCCURRENCE_SNAPSHOT_INTERVAL", "300"))
+
+# Forward-decay weights are renormalized before exp() gets near overflow
+_MAX_EXPONENT = 200.0
+
+
+@contextmanager
+def _exclusive_lock(path: str):
+    """Blocking inter-process lock around the shared snapshot file"""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+
+    with open(path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class CountMinSketch:
+    """Fixed-size frequency estimator: never underestimates, bounded overestimate"""
+
+    def __init__(self, width: int = 1 << 16, depth: int = 4, table: Optional[np.ndarray] = None):
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else np.zeros((depth, width), dtype=np.float64)
+
+    def _columns(self, key: str) -> np.ndarray:
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        return np.frombuffer(digest, dtype="<u4") % self.width
+
+    def add(self, key: str, weight: float):
+        self.table[np.arange(self.depth), self._columns(key)] += weight
+
+    def estimate(self, key: str) -> float:
+        return float(self.table[np.arange(self.depth), self._columns(key)].min())
+
+    def scale(self, factor: float):
+        self.table *= factor
+
+
+class HeavyHitters:
+    """Space-Saving top-k summary of one product's co-purchase partners"""
+
+    __slots__ = ("capacity", "counts")
+
+    def __init__(self, capacity: int, counts: Optional[Dict[str, float]] = None):
+        self.capacity = capacity
+        self.counts: Dict[str, float] = counts or {}
+
+    def add(self, item: str, weight: float):
+        if item in self.counts or len(self.counts) < self.capacity:
+            self.counts[item] = self.counts.get(item, 0.0) + weight
+            return
+        # Replace the smallest entry; it inherits that count as its error bound
+        victim = min(self.counts, key=self.counts.get)
+        self.counts[item] = self.counts.pop(victim) + weight
+
+    def top(self, k: int) -> List[Tuple[str, float]]:
+        return sorted(self.counts.items(), key=lambda x: x[1], reverse=True)[:k]
+
+    def scale(self, factor: float):
+        for item in self.counts:
+            self.counts[item] *= factor
+
+    def merge(self, counts: Dict[str, float]):
+        """Fold in another summary of the same stream, keeping the top ``capacity``"""
+        for item, count in counts.items():
+            self.counts[item] = self.counts.get(item, 0.0) + count
+        if len(self.counts) > self.capacity:
+            self.counts = dict(self.top(self.capacity))
+
+
+class CooccurrenceEngine:
+    """Streaming, time-decayed "bought together" counts fed by completed orders.
+
+    Memory is bounded by the sketch size plus ``capacity`` partners per
+    product. Counts decay with the configured half-life using forward decay:
+    each event is stored with weight ``exp(λ·(t - t0))`` and reads divide by
+    the weight of "now", so nothing has to be touched as time passes.
+
+    Every worker counts its own orders. Orders not yet persisted are also
+    kept in a pending delta that save() adds into the shared snapshot file
+    under a file lock, so workers never overwrite each other's counts.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 20,
+        half_life_days: float = COOCCURRENCE_HALF_LIFE_DAYS,
+        snapshot_path: str = COOCCURRENCE_SNAPSHOT_PATH
+    ):
+        self.capacity = capacity
+        self.decay_rate = math.log(2) / (half_life_days * 86400)
+        self.snapshot_path = snapshot_path
+        self.sketch = CountMinSketch()
+        self.partners: Dict[str, HeavyHitters] = {}
+        self.landmark = time.time()
+        self.orders = 0
+        # Orders counted here but not yet merged into the snapshot file
+        self._pending_sketch = CountMinSketch()
+        self._pending_partners: Dict[str, HeavyHitters] = {}
+        self._pending_orders = 0
+        # Process-local epoch: equal order counts in two workers never share a version
+        self._epoch = uuid.uuid4().hex[:12]
+        self._changes = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._snapshot_thread: Optional[threading.Thread] = None
+
+    @property
+    def version(self) -> str:
+        """Changes whenever counts change, for cache validators"""
+        return f"{self._epoch}.{self._changes}"
+
+    def record_order(self, product_ids: Iterable[str], timestamp: Optional[float] = None):
+        """Count every pair of distinct products in a completed order"""
+        items = sorted(set(product_ids))
+        if len(items) < 2:
+            return
+
+        with self._lock:
+            now = timestamp if timestamp is not None else time.time()
+            weight = self._weight(now)
+            for partners, sketch in ((self.partners, self.sketch), (self._pending_partners, self._pending_sketch)):
+                for a in items:
+                    summary = partners.get(a)
+                    if summary is None:
+                        summary = partners[a] = HeavyHitters(self.capacity)
+                    for b in items:
+                        if a != b:
+                            summary.add(b, weight)
+                            if a < b:
+                                sketch.add(f"{a}|{b}", weight)
+            self.orders += 1
+            self._pending_orders += 1
+            self._changes += 1
+
+    def pair_count(self, a: str, b: str, now: Optional[float] = None) -> float:
+        """Decayed co-purchase count of a pair"""
+        key = f"{a}|{b}" if a < b else f"{b}|{a}"
+        with self._lock:
+            return self.sketch.estimate(key) / self._weight(now or time.time())
+
+    def top_pairs(self, product_id: str, k: int, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Top-k partners of a product with decayed counts, O(capacity)"""
+        with self._lock:
+            summary = self.partners.get(product_id)
+            if summary is None:
+                return []
+            norm = self._weight(now or time.time())
+            top = []
+            for partner, count in summary.top(k):
+                # Space-Saving can overestimate; the sketch bounds it from above too
+                key = f"{product_id}|{partner}" if product_id < partner else f"{partner}|{product_id}"
+                top.append((partner, min(count, self.sketch.estimate(key)) / norm))
+            return top
+
+    def _weight(self, now: float) -> float:
+        exponent = self.decay_rate * (now - self.landmark)
+        if exponent > _MAX_EXPONENT:
+            self._renormalize(now)
+            exponent = 0.0
+        return math.exp(exponent)
+
+    def _renormalize(self, now: float):
+        factor = math.exp(-self.decay_rate * (now - self.landmark))
+        for sketch, partners in ((self.sketch, self.partners), (self._pending_sketch, self._pending_partners)):
+            sketch.scale(factor)
+            for summary in partners.values():
+                summary.scale(factor)
+        self.landmark = now
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """Add the pending orders into the snapshot file atomically"""
+        path = path or self.snapshot_path
+        if not path:
+            return False
+
+        with self._lock:
+            pending = self._take_pending()
+
+        try:
+            with _exclusive_lock(f"{path}.lock"):
+                landmark, table, partners, orders = pending
+                stored = self._read(path) if os.path.exists(path) else None
+                if stored is not None and stored[1].shape == table.shape:
+                    landmark, table, partners, orders = self._combine(stored, pending)
+                state = json.dumps({
+                    "landmark": landmark,
+                    "orders": orders,
+                    "capacity": self.capacity,
+                    "partners": partners
+                })
+                tmp_path = f"{path}.tmp.{os.getpid()}.npz"
+                np.savez_compressed(tmp_path, sketch=table, state=np.array(state))
+                os.replace(tmp_path, path)
+        except Exception:
+            # Keep the orders pending so the next save retries them
+            with self._lock:
+                self._restore_pending(pending)
+            raise
+        return True
+
+    def _take_pending(self) -> Tuple[float, np.ndarray, Dict[str, Dict[str, float]], int]:
+        pending = (
+            self.landmark,
+            self._pending_sketch.table,
+            {pid: s.counts for pid, s in self._pending_partners.items()},
+            self._pending_orders
+        )
+        self._pending_sketch = CountMinSketch(width=self.sketch.width, depth=self.sketch.depth)
+        self._pending_partners = {}
+        self._pending_orders = 0
+        return pending
+
+    def _restore_pending(self, pending: Tuple[float, np.ndarray, Dict[str, Dict[str, float]], int]):
+        landmark, table, partners, orders = pending
+        # The live landmark can only have moved forward since the delta was taken
+        factor = math.exp(-self.decay_rate * (self.landmark - landmark))
+        if table.shape == self._pending_sketch.table.shape:
+            self._pending_sketch.table += table * factor
+        for pid, counts in partners.items():
+            summary = self._pending_partners.get(pid)
+            if summary is None:
+                summary = self._pending_partners[pid] = HeavyHitters(self.capacity)
+            summary.merge({item: count * factor for item, count in counts.items()})
+        self._pending_orders += orders
+
+    def _combine(self, *parts) -> Tuple[float, np.ndarray, Dict[str, Dict[str, float]], int]:
+        """Sum (landmark, table, partners, orders) states on their latest landmark"""
+        landmark = max(part[0] for part in parts)
+        table = np.zeros_like(parts[0][1])
+        summaries: Dict[str, HeavyHitters] = {}
+        orders = 0
+        for part_landmark, part_table, part_partners, part_orders in parts:
+            factor = math.exp(-self.decay_rate * (landmark - part_landmark))
+            table += part_table * factor
+            for pid, counts in part_partners.items():
+                summary = summaries.get(pid)
+                if summary is None:
+                    summary = summaries[pid] = HeavyHitters(self.capacity)
+                summary.merge({item: count * factor for item, count in counts.items()})
+            orders += part_orders
+        return landmark, table, {pid: s.counts for pid, s in summaries.items()}, orders
+
+    def _read(self, path: str) -> Optional[Tuple[float, np.ndarray, Dict[str, Dict[str, float]], int]]:
+        try:
+            with np.load(path) as data:
+                table = data["sketch"]
+                state = json.loads(str(data["state"]))
+        except Exception as e:
+            print(f"⚠️  Could not load co-occurrence snapshot: {e}")
+            return None
+        return state["landmark"], table, state["partners"], state["orders"]
+
+    def load(self, path: Optional[str] = None) -> bool:
+        """Restore counter state saved by save()"""
+        path = path or self.snapshot_path
+        if not path or not os.path.exists(path):
+            return False
+
+        stored = self._read(path)
+        if stored is None:
+            return False
+        landmark, table, partners, orders = stored
+
+        with self._lock:
+            # Pending orders stay pending, re-weighted onto the loaded landmark
+            factor = math.exp(-self.decay_rate * (landmark - self.landmark))
+            self._pending_sketch.scale(factor)
+            for summary in self._pending_partners.values():
+                summary.scale(factor)
+            depth, width = table.shape
+            self.sketch = CountMinSketch(width=width, depth=depth, table=table)
+            self.landmark = landmark
+            self.orders = orders
+            self.partners = {
+                pid: HeavyHitters(self.capacity, counts)
+                for pid, counts in partners.items()
+            }
+            if self._pending_sketch.table.shape != table.shape:
+                self._pending_sketch = CountMinSketch(width=width, depth=depth)
+            self._changes += 1
+        print(f"✓ Loaded co-occurrence counts from {self.orders} orders")
+        return True
+
+    def start_snapshots(self, interval: float = COOCCURRENCE_SNAPSHOT_INTERVAL):
+        """Periodically persist the counters in a daemon thread"""
+        if interval <= 0 or not self.snapshot_path or self._snapshot_thread is not None:
+            return
+        self._stop_event.clear()
+        self._snapshot_thread = threading.Thread(
+            target=self._snapshot_loop,
+            args=(interval,),
+            name="cooccurrence-snapshot",
+            daemon=True
+        )
+        self._snapshot_thread.start()
+
+    def stop_snapshots(self):
+        self._stop_event.set()
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join(timeout=5)
+            self._snapshot_thread = None
+        if self._pending_orders:
+            self.save()
+
+    def _snapshot_loop(self, interval: float):
+        while not self._stop_event.wait(interval):
+            if not self._pending_orders:
+                continue
+            try:
+                self.save()
+            except Exception as e:
+                print(f"Co-occurrence snapshot error: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "orders": self.orders,
+            "products": len(self.partners),
+            "sketch_cells": int(self.sketch.table.size),
+            "capacity": self.capacity
+        }
+
+
+# Singleton instance
+cooccurrence_engine = CooccurrenceEngine()
@@ -0,0 +1,261 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+import os
+import threading
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+from apis.catalog_columns import CatalogColumns, catalog_columns
+from apis.catalog_store import CatalogSnapshot, catalog_store
+
+load_dotenv()
+
+CUSTOMER_PROFILE_CACHE_SIZE = int(os.getenv("CUSTOMER_PROFILE_CACHE_SIZE", "10000"))
+CUSTOMER_PROFILE_REFRESH_INTERVAL = float(os.getenv("CUSTOMER_PROFILE_REFRESH_INTERVAL", "300"))
+CUSTOMER_AFFINITY_WEIGHT = float(os.getenv("CUSTOMER_AFFINITY_WEIGHT", "1.0"))
+
+# Upper edges (INR) of the price bands; the last band is open-ended
+PRICE_BAND_EDGES = np.array([1000, 2000, 3000, 5000, 8000], dtype=np.float64)
+# Relative weight of each signal in a profile
+SIGNAL_WEIGHTS = {"preferences": 2.0, "browsing": 1.0, "purchases": 3.0}
+# Customers loaded per database query
+_BATCH = 500
+
+
+def price_band(prices) -> np.ndarray:
+    return np.searchsorted(PRICE_BAND_EDGES, prices, side="right")
+
+
+def feature_index(columns: CatalogColumns, rows) -> np.ndarray:
+    """Positions of each row's category, brand and price band in a profile vector.
+
+    The layout is ``[categories | brands | price bands]`` using the
+    vocabulary of ``columns``, so a product is a three-hot vector.
+    """
+    n_categories, n_brands = len(columns.categories), len(columns.brands)
+    return np.stack([
+        columns.category[rows],
+        n_categories + columns.brand[rows],
+        n_categories + n_brands + price_band(columns.price[rows])
+    ], axis=-1)
+
+
+@dataclass(frozen=True)
+class CustomerProfile:
+    """Unit-length affinity vector of one customer for one catalog version"""
+    customer_id: str
+    version: str
+    vector: np.ndarray
+
+    def affinity(self, columns: CatalogColumns, rows) -> np.ndarray:
+        """Dot product of the profile with the three-hot vector of every row"""
+        return self.vector[feature_index(columns, rows)].sum(axis=-1)
+
+
+def _history_ids(entries: Any) -> Iterator[str]:
+    """Product ids from a history column: ids, event dicts or order dicts"""
+    if not isinstance(entries, list):
+        return
+    for entry in entries:
+        if isinstance(entry, str):
+            yield entry
+        elif isinstance(entry, dict):
+            product_id = entry.get("product_id") or entry.get("id")
+            if isinstance(product_id, str):
+                yield product_id
+            yield from _history_ids(entry.get("items"))
+
+
+def _preference_terms(preferences: Any) -> Tuple[List[str], List[float]]:
+    """Free-text terms and budget amounts from the preferences column"""
+    terms: List[str] = []
+    budgets: List[float] = []
+    if isinstance(preferences, list):
+        terms.extend(p for p in preferences if isinstance(p, str))
+    elif isinstance(preferences, dict):
+        for key in ("categories", "category", "brands", "brand", "styles", "style"):
+            value = preferences.get(key)
+            if isinstance(value, str):
+                terms.append(value)
+            elif isinstance(value, list):
+                terms.extend(v for v in value if isinstance(v, str))
+        for key in ("budget", "price_range"):
+            value = preferences.get(key)
+            if isinstance(value, (int, float)):
+                budgets.append(float(value))
+            elif isinstance(value, list):
+                budgets.extend(float(v) for v in value if isinstance(v, (int, float)))
+    return terms, budgets
+
+
+def build_profile(
+    customer_id: str,
+    preferences: Any,
+    browsing_history: Any,
+    purchase_history: Any,
+    columns: CatalogColumns
+) -> Optional[CustomerProfile]:
+    """Fold a customer's JSON columns into an affinity vector; None without signal"""
+    n_categories, n_brands = len(columns.categories), len(columns.brands)
+    vector = np.zeros(n_categories + n_brands + len(PRICE_BAND_EDGES) + 1)
+
+    for signal, entries in (("browsing", browsing_history), ("purchases", purchase_history)):
+        rows = columns.rows(_history_ids(entries))
+        if rows:
+            np.add.at(vector, feature_index(columns, np.asarray(rows)).ravel(), SIGNAL_WEIGHTS[signal])
+
+    terms, budgets = _preference_terms(preferences)
+    weight = SIGNAL_WEIGHTS["preferences"]
+    for code in columns.category_codes(t.lower() for t in terms):
+        vector[code] += weight
+    for code in columns.brand_codes(terms):
+        vector[n_categories + code] += weight
+    for band in price_band(budgets):
+        vector[n_categories + n_brands + band] += weight
+
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return None
+    return CustomerProfile(customer_id=customer_id, version=columns.version, vector=(vector / norm).astype(np.float32))
+
+
+class CustomerProfileStore:
+    """Bounded LRU of customer profiles, loaded and refreshed in the background.
+
+    Lookups never touch the database: a miss returns None and queues the
+    customer for the worker thread, so the recommendation path only pays
+    for a dot product. Customers without a row or without any signal are
+    cached as None too.
+    """
+
+    def __init__(
+        self,
+        max_size: int = CUSTOMER_PROFILE_CACHE_SIZE,
+        refresh_interval: float = CUSTOMER_PROFILE_REFRESH_INTERVAL
+    ):
+        self.max_size = max_size
+        self.refresh_interval = refresh_interval
+        self._profiles: "OrderedDict[str, Optional[CustomerProfile]]" = OrderedDict()
+        self._queued: set = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"hits": 0, "misses": 0, "loads": 0, "refreshes": 0, "evictions": 0}
+
+    def get(self, customer_id: str, snapshot: Optional[CatalogSnapshot] = None) -> Optional[CustomerProfile]:
+        """Profile for the current catalog version, or None (and queue a load)"""
+        if not customer_id or self.max_size <= 0:
+            return None
+        version = (snapshot or catalog_store.snapshot).version
+
+        with self._lock:
+            if customer_id in self._profiles:
+                profile = self._profiles[customer_id]
+                self._profiles.move_to_end(customer_id)
+                if profile is None or profile.version == version:
+                    self._stats["hits"] += 1
+                    return profile
+            self._stats["misses"] += 1
+            if len(self._queued) < self.max_size:
+                self._queued.add(customer_id)
+        self._wake.set()
+        return None
+
+    def start(self):
+        """Prewarm from the database and keep profiles fresh in a daemon thread"""
+        if self.max_size <= 0 or self._worker is not None:
+            return
+        catalog_store.subscribe(self._on_catalog_change)
+        self._worker = threading.Thread(target=self._run, name="customer-profiles", daemon=True)
+        self._worker.start()
+
+    def refresh(self, customer_ids: Optional[Iterable[str]] = None) -> int:
+        """Rebuild profiles of ``customer_ids`` (default: every cached customer)"""
+        if customer_ids is None:
+            with self._lock:
+                customer_ids = list(self._profiles)
+        customer_ids = list(customer_ids)
+        columns = catalog_columns.get(catalog_store.snapshot)
+
+        loaded = 0
+        for start in range(0, len(customer_ids), _BATCH):
+            batch = customer_ids[start:start + _BATCH]
+            rows = {row[0]: row for row in self._fetch(batch)}
+            self._store({
+                cid: build_profile(cid, *rows[cid][1:], columns) if cid in rows else None
+                for cid in batch
+            })
+            loaded += len(rows)
+        return loaded
+
+    def prewarm(self) -> int:
+        """Load the most recently created customers, up to the cache size"""
+        from sqlalchemy import select
+        from models.database import SessionLocal, Customer
+
+        with SessionLocal() as db:
+            ids = db.execute(
+                select(Customer.id).order_by(Customer.created_at.desc()).limit(self.max_size)
+            ).scalars().all()
+        return self.refresh(ids)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            cached = len(self._profiles)
+            empty = sum(1 for p in self._profiles.values() if p is None)
+        return {**self._stats, "size": cached, "empty": empty, "max_size": self.max_size}
+
+    def _fetch(self, customer_ids: Sequence[str]) -> List[tuple]:
+        from sqlalchemy import select
+        from models.database import SessionLocal, Customer
+
+        with SessionLocal() as db:
+            return db.execute(
+                select(Customer.id, Customer.preferences, Customer.browsing_history, Customer.purchase_history)
+                .where(Customer.id.in_(customer_ids))
+            ).all()
+
+    def _store(self, profiles: Dict[str, Optional[CustomerProfile]]):
+        with self._lock:
+            for customer_id, profile in profiles.items():
+                self._profiles[customer_id] = profile
+                self._profiles.move_to_end(customer_id)
+            while len(self._profiles) > self.max_size:
+                self._profiles.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _on_catalog_change(self, old: CatalogSnapshot, new: CatalogSnapshot):
+        if old.version == new.version:
+            return
+        # Vectors are laid out for one vocabulary; re-fold all of them
+        with self._lock:
+            self._queued.update(self._profiles)
+        self._wake.set()
+
+    def _run(self):
+        try:
+            self.prewarm()
+        except Exception as e:
+            print(f"Customer profile prewarm error: {e}")
+
+        while True:
+            woke = self._wake.wait(self.refresh_interval if self.refresh_interval > 0 else None)
+            self._wake.clear()
+            try:
+                if woke:
+                    with self._lock:
+                        queued, self._queued = self._queued, set()
+                    self._stats["loads"] += self.refresh(queued)
+                else:
+                    self.refresh()
+                    self._stats["refreshes"] += 1
+            except Exception as e:
+                print(f"Customer profile refresh error: {e}")
+                time.sleep(1)
+
+
+# Singleton instance
+customer_profiles = CustomerProfileStore()
@@ -0,0 +1,83 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from apis.catalog_columns import CatalogColumns
+
+# Candidates considered per requested result when diversifying
+POOL_FACTOR = 5
+MIN_POOL = 20
+# Weights of the item-to-item similarity used to penalize redundancy
+SAME_CATEGORY = 0.5
+SAME_BRAND = 0.3
+PRICE_CLOSENESS = 0.2
+
+
+def pool_size(k: int, diversity: float) -> int:
+    """How many top candidates to fetch before re-ranking ``k`` of them"""
+    return max(k * POOL_FACTOR, MIN_POOL) if diversity > 0 else k
+
+
+def item_similarity(columns: CatalogColumns, row: int, pool: np.ndarray) -> np.ndarray:
+    """Similarity in [0, 1] of one product to every pool product, O(pool)"""
+    price = columns.price[pool]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        closeness = 1 - np.abs(price - columns.price[row]) / np.maximum(price, columns.price[row])
+    return (
+        SAME_CATEGORY * (columns.category[pool] == columns.category[row])
+        + SAME_BRAND * (columns.brand[pool] == columns.brand[row])
+        + PRICE_CLOSENESS * np.nan_to_num(np.clip(closeness, 0, 1), nan=1.0)
+    )
+
+
+def mmr_rerank(
+    columns: CatalogColumns,
+    pool: np.ndarray,
+    relevance: np.ndarray,
+    k: int,
+    diversity: float
+) -> np.ndarray:
+    """Maximal marginal relevance: positions in ``pool`` of the k picks, in order.
+
+    Each step picks the candidate maximizing
+    ``(1 - diversity) * relevance - diversity * max_sim_to_picked``, where
+    relevance is min-max scaled over the pool. Only the similarity to the
+    newest pick is computed per step and folded into a running maximum, so
+    the cost is O(k * pool). With ``diversity == 0`` this is the input
+    order; ties always go to the earlier pool position.
+    """
+    pool = np.asarray(pool, dtype=np.intp)
+    k = min(k, len(pool))
+    if diversity <= 0 or k <= 1:
+        return np.arange(k)
+
+    relevance = np.asarray(relevance, dtype=np.float64)
+    span = relevance.max() - relevance.min()
+    scaled = (relevance - relevance.min()) / span if span > 0 else np.ones(len(pool))
+
+    max_sim = np.zeros(len(pool))
+    available = np.ones(len(pool), dtype=bool)
+    picked = np.empty(k, dtype=np.intp)
+    for step in range(k):
+        mmr = np.where(available, (1 - diversity) * scaled - diversity * max_sim, -np.inf)
+        choice = int(np.argmax(mmr))
+        picked[step] = choice
+        available[choice] = False
+        np.maximum(max_sim, item_similarity(columns, pool[choice], pool), out=max_sim)
+    return picked
+
+
+def diversify_products(
+    columns: CatalogColumns,
+    products: Sequence[Dict],
+    relevance: Sequence[float],
+    k: int,
+    diversity: float
+) -> List[Dict]:
+    """mmr_rerank for an already-materialized candidate list"""
+    if diversity <= 0:
+        return list(products[:k])
+    known = [i for i, p in enumerate(products) if p["id"] in columns.row_of]
+    pool = np.array([columns.row_of[products[i]["id"]] for i in known], dtype=np.intp)
+    picked = mmr_rerank(columns, pool, np.asarray(relevance, dtype=np.float64)[known], k, diversity)
+    return [products[known[i]] for i in picked]
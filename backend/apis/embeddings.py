@@ -0,0 +1,288 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import os
+import re
+import threading
+import time
+import zlib
+
+import numpy as np
+from dotenv import load_dotenv
+
+from apis.catalog_mmap import project
+from apis.catalog_store import CatalogSnapshot, catalog_store
+from apis.similarity import top_k
+
+load_dotenv()
+
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "64"))
+EMBEDDING_NPROBE = int(os.getenv("EMBEDDING_NPROBE", "8"))
+HASH_FEATURES = 1 << 14
+# Bound on nonzeros expanded at once during sparse products
+_CHUNK_NNZ = 1 << 20
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Product fields product_tokens reads
+TEXT_FIELDS = ("name", "description", "category", "brand", "colors")
+
+
+def product_tokens(product: Dict) -> List[str]:
+    """Free-text words plus field-tagged category, brand and colour tokens"""
+    words = _TOKEN.findall(f"{product['name']} {product['description']}".lower())
+    words.append(f"cat:{product['category'].lower()}")
+    words.append(f"brand:{product['brand'].lower()}")
+    words.extend(f"color:{c.lower()}" for c in product.get("colors") or [])
+    return words
+
+
+def _segment_dot(ptr: np.ndarray, gather: np.ndarray, weights: np.ndarray, dense: np.ndarray) -> np.ndarray:
+    """out[s] = sum(weights[j] * dense[gather[j]] for j in segment s)"""
+    n_out = len(ptr) - 1
+    out = np.zeros((n_out, dense.shape[1]))
+    first = 0
+    while first < n_out:
+        # Largest run of segments whose nonzeros fit in one chunk
+        last = int(np.searchsorted(ptr, ptr[first] + _CHUNK_NNZ, side="right")) - 1
+        last = min(max(last, first + 1), n_out)
+        lo, hi = ptr[first], ptr[last]
+        if hi > lo:
+            values = weights[lo:hi, None] * dense[gather[lo:hi]]
+            counts = np.diff(ptr[first:last + 1])
+            nonempty = counts > 0
+            out[first:last][nonempty] = np.add.reduceat(values, (ptr[first:last] - lo)[nonempty], axis=0)
+        first = last
+    return out
+
+
+class _HashedCSR:
+    """Minimal sparse matrix: just the products the randomized SVD needs"""
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, data: np.ndarray, n_cols: int):
+        self.indptr, self.indices, self.data, self.n_cols = indptr, indices, data, n_cols
+        self.n_rows = len(indptr) - 1
+        # Column-major view for transposed products
+        row_of_nnz = np.repeat(np.arange(self.n_rows), np.diff(indptr))
+        by_col = np.argsort(indices, kind="stable")
+        self._col_ptr = np.concatenate([[0], np.cumsum(np.bincount(indices, minlength=n_cols))])
+        self._col_rows = row_of_nnz[by_col]
+        self._col_data = data[by_col]
+
+    def dot(self, dense: np.ndarray) -> np.ndarray:
+        """self @ dense"""
+        return _segment_dot(self.indptr, self.indices, self.data, dense)
+
+    def tdot(self, dense: np.ndarray) -> np.ndarray:
+        """self.T @ dense"""
+        return _segment_dot(self._col_ptr, self._col_rows, self._col_data, dense)
+
+
+def tfidf_matrix(products: Iterable[Dict], n_features: int = HASH_FEATURES) -> _HashedCSR:
+    """Signed feature-hashed TF-IDF rows, L2-normalized"""
+    hashes: Dict[str, Tuple[int, float]] = {}
+    indptr, indices, counts = [0], [], []
+
+    for product in products:
+        bag = Counter()
+        for token in product_tokens(product):
+            slot = hashes.get(token)
+            if slot is None:
+                h = zlib.crc32(token.encode())
+                slot = hashes[token] = (h % n_features, 1.0 if h & 0x80000000 else -1.0)
+            bag[slot] += 1
+        for (index, sign), count in bag.items():
+            indices.append(index)
+            counts.append(sign * (1 + np.log(count)))
+        indptr.append(len(indices))
+
+    indptr = np.asarray(indptr, dtype=np.int64)
+    indices = np.asarray(indices, dtype=np.int64)
+    data = np.asarray(counts, dtype=np.float64)
+
+    n_docs = len(indptr) - 1
+    df = np.bincount(indices, minlength=n_features)
+    data *= (np.log((1 + n_docs) / (1 + df)) + 1)[indices]
+
+    norms = np.sqrt(np.add.reduceat(data ** 2, indptr[:-1])) if len(data) else np.zeros(0)
+    norms = np.where(np.diff(indptr) > 0, norms, 1.0)
+    data /= np.repeat(norms, np.diff(indptr))
+    return _HashedCSR(indptr, indices, data, n_features)
+
+
+def embed_products(products: Sequence[Dict], dim: int = EMBEDDING_DIM, seed: int = 0) -> np.ndarray:
+    """Dense unit-length embeddings via randomized truncated SVD of the TF-IDF matrix"""
+    matrix = tfidf_matrix(project(products, TEXT_FIELDS))
+    n = matrix.n_rows
+    rank = max(1, min(dim, n))
+    rng = np.random.default_rng(seed)
+
+    # Randomized range finder with two power iterations
+    sample = matrix.dot(rng.standard_normal((matrix.n_cols, min(rank + 8, matrix.n_cols))))
+    for _ in range(2):
+        sample, _ = np.linalg.qr(sample)
+        sample, _ = np.linalg.qr(matrix.tdot(sample))
+        sample = matrix.dot(sample)
+    basis, _ = np.linalg.qr(sample)
+
+    small = matrix.tdot(basis).T
+    _, _, components = np.linalg.svd(small, full_matrices=False)
+    vectors = matrix.dot(components[:rank].T)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = (vectors / np.where(norms > 0, norms, 1.0)).astype(np.float32)
+    if rank < dim:
+        vectors = np.pad(vectors, ((0, 0), (0, dim - rank)))
+    return vectors
+
+
+@dataclass(frozen=True)
+class IVFIndex:
+    """Inverted-file ANN index over unit vectors (inner product = cosine).
+
+    Vectors are stored grouped by cluster so each probed list is one
+    contiguous slice.
+    """
+    version: str
+    centroids: np.ndarray
+    offsets: np.ndarray
+    order: np.ndarray
+    vectors: np.ndarray
+    embeddings: np.ndarray
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        exclude: Iterable[int] = (),
+        nprobe: int = EMBEDDING_NPROBE
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Catalog rows of the (approximately) k most similar products"""
+        nprobe = min(nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+
+        rows = np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in probe])
+        sims = np.concatenate([self.vectors[self.offsets[c]:self.offsets[c + 1]] @ query for c in probe])
+
+        # top_k breaks ties by position, so present candidates in catalog order
+        by_row = np.argsort(rows, kind="stable")
+        rows, sims = rows[by_row], sims[by_row].astype(np.float64)
+        excluded = set(exclude)
+        if excluded:
+            sims[np.isin(rows, list(excluded))] = -np.inf
+        best = top_k(sims, k)
+        return rows[best], sims[best]
+
+    def query_vector(self, rows: Sequence[int]) -> Optional[np.ndarray]:
+        """Normalized mean embedding of several catalog rows"""
+        if not len(rows):
+            return None
+        mean = self.embeddings[list(rows)].mean(axis=0)
+        norm = np.linalg.norm(mean)
+        return mean / norm if norm > 0 else None
+
+
+def _spherical_kmeans(vectors: np.ndarray, n_clusters: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # Train on a sample; assignment of the full set happens once afterwards
+    sample = vectors[rng.choice(len(vectors), size=min(len(vectors), 256 * n_clusters), replace=False)]
+    centroids = sample[rng.choice(len(sample), size=n_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        # Re-seed empty clusters from random sample points
+        empty = ~sums.any(axis=1)
+        sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+    return centroids.astype(np.float32)
+
+
+def build_ivf(embeddings: np.ndarray, version: str = "", n_clusters: Optional[int] = None) -> IVFIndex:
+    """Cluster embeddings into ~sqrt(n) inverted lists"""
+    n = len(embeddings)
+    n_clusters = n_clusters or max(1, int(np.sqrt(n)))
+    n_clusters = min(n_clusters, n)
+    centroids = _spherical_kmeans(embeddings, n_clusters)
+
+    assign = np.empty(n, dtype=np.int64)
+    for start in range(0, n, 65536):
+        assign[start:start + 65536] = np.argmax(embeddings[start:start + 65536] @ centroids.T, axis=1)
+
+    order = np.argsort(assign, kind="stable")
+    offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_clusters))])
+    return IVFIndex(
+        version=version,
+        centroids=centroids,
+        offsets=offsets,
+        order=order,
+        vectors=embeddings[order],
+        embeddings=embeddings
+    )
+
+
+class EmbeddingIndex:
+    """Keeps product embeddings and their IVF index in sync with the catalog"""
+
+    def __init__(self, dim: int = EMBEDDING_DIM):
+        self.dim = dim
+        self.index: Optional[IVFIndex] = None
+        self._pending = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"builds": 0, "last_build_ms": 0.0}
+
+    def index_for(self, snapshot: CatalogSnapshot) -> Optional[IVFIndex]:
+        """The index if it was built for this snapshot version"""
+        index = self.index
+        if index is not None and index.version == snapshot.version:
+            return index
+        return None
+
+    def install(self, index: IVFIndex):
+        """Adopt a prebuilt index"""
+        self.index = index
+        self._pending.set()
+
+    def start(self):
+        """Build the index in the background and rebuild on catalog updates"""
+        if self.dim <= 0 or self._worker is not None:
+            return
+        catalog_store.subscribe(lambda old, new: self._pending.set())
+        self._worker = threading.Thread(target=self._run, name="embedding-index", daemon=True)
+        self._pending.set()
+        self._worker.start()
+
+    def refresh(self, snapshot: Optional[CatalogSnapshot] = None) -> IVFIndex:
+        snapshot = snapshot or catalog_store.snapshot
+        if self.index is not None and self.index.version == snapshot.version:
+            return self.index
+
+        started = time.perf_counter()
+        index = build_ivf(embed_products(snapshot.products, self.dim), version=snapshot.version)
+        self._stats["builds"] += 1
+        self._stats["last_build_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self.index = index
+        return index
+
+    def stats(self) -> Dict:
+        index = self.index
+        return {
+            **self._stats,
+            "version": index.version if index else None,
+            "products": len(index.embeddings) if index else 0,
+            "clusters": len(index.centroids) if index else 0,
+            "dim": self.dim
+        }
+
+    def _run(self):
+        while True:
+            self._pending.wait()
+            self._pending.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Embedding index refresh error: {e}")
+
+
+# Singleton instance
+embedding_index = EmbeddingIndex()
@@ -1,33 +1,183 @@
-from typing import Dict, Optional
-import random
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
+import os
+import threading
+import time
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+from apis.catalog_store import catalog_store
+from apis.reservations import ReservationError, reservation_ledger
+from apis.store_locator import store_registry
+from utils.inventory_events import inventory_events
 
-# Mock inventory data
-MOCK_INVENTORY = {
-    "P001": {"warehouse": 50, "stores": {"Mumbai": 15, "Delhi": 12, "Bangalore": 8}},
-    "P002": {"warehouse": 30, "stores": {"Mumbai": 8, "Delhi": 10, "Bangalore": 5}},
-    "P003": {"warehouse": 45, "stores": {"Mumbai": 10, "Delhi": 15, "Bangalore": 12}},
-    "P004": {"warehouse": 20, "stores": {"Mumbai": 5, "Delhi": 3, "Bangalore": 4}},
-    "P005": {"warehouse": 60, "stores": {"Mumbai": 20, "Delhi": 18, "Bangalore": 15}},
-    "P006": {"warehouse": 100, "stores": {"Mumbai": 25, "Delhi": 30, "Bangalore": 20}},
-    "P007": {"warehouse": 80, "stores": {"Mumbai": 18, "Delhi": 22, "Bangalore": 16}},
-    "P008": {"warehouse": 70, "stores": {"Mumbai": 20, "Delhi": 25, "Bangalore": 18}},
-    "P009": {"warehouse": 55, "stores": {"Mumbai": 15, "Delhi": 18, "Bangalore": 12}},
-    "P010": {"warehouse": 40, "stores": {"Mumbai": 12, "Delhi": 10, "Bangalore": 8}},
-}
+load_dotenv()
+
+# Backstop lifetime of cached live stock; the change feed evicts entries as stock moves
+INVENTORY_CACHE_TTL = int(os.getenv("INVENTORY_CACHE_TTL", "3600"))
+# Products whose live stock is cached at once, least recently used evicted first
+INVENTORY_CACHE_SIZE = int(os.getenv("INVENTORY_CACHE_SIZE", "50000"))
+# Warehouse stock above this ships free
+FREE_SHIPPING_STOCK = 5
+# Distinct fulfillment option lists kept before the table is rebuilt from scratch
+OPTION_LIST_LIMIT = 4096
 
 
 class InventoryAPI:
-    def __init__(self):
-        self.inventory = MOCK_INVENTORY
+    def __init__(self, cache_ttl: int = INVENTORY_CACHE_TTL, cache_size: int = INVENTORY_CACHE_SIZE):
+        self.catalog = catalog_store
+        self.ledger = reservation_ledger
+        self.stores = store_registry
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        # product_id -> (expires_at, live stock record or None, {location: materialized availability}),
+        # catalog products only, in least recently used order
+        self._stock_cache: "OrderedDict[str, Tuple[float, Optional[Dict], Dict[Optional[str], Dict]]]" = OrderedDict()
+        # Bumped by every invalidation so reads that raced one are not cached
+        self._epoch = 0
+        self._cache_lock = threading.Lock()
+        # Option lists by stock bands; shared by every product and location in the same bands
+        self._option_lists: Dict[Tuple, list] = {}
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0, "option_builds": 0}
+        inventory_events.subscribe(self._on_stock_change)
+    
+    @property
+    def inventory(self) -> Mapping[str, Dict]:
+        """Stock records of the current catalog snapshot"""
+        return self.catalog.snapshot.inventory
     
     def get_stock(self, product_id: str) -> Optional[Dict]:
-        """Get stock information for a product"""
-        return self.inventory.get(product_id)
+        """Get live stock for a product (on-hand minus held and sold units)"""
+        return self._entries([product_id])[product_id][1]
+    
+    def _entries(self, product_ids: List[str]) -> Dict[str, Tuple]:
+        """Cache entries for live stock, with all misses fetched in one ledger read"""
+        now = time.monotonic()
+        cache = self._stock_cache
+        entries, missing = {}, []
+        for product_id in product_ids:
+            entry = cache.get(product_id)
+            if entry is not None and entry[0] > now:
+                entries[product_id] = entry
+                try:
+                    cache.move_to_end(product_id)
+                except KeyError:
+                    # Invalidated by another thread since the lookup
+                    pass
+            else:
+                missing.append(product_id)
+        self._stats["hits"] += len(entries)
+        
+        if missing:
+            self._stats["misses"] += len(missing)
+            epoch = self._epoch
+            expires_at = now + self.cache_ttl
+            fetched = {
+                product_id: (expires_at, stock, {})
+                for product_id, stock in self.ledger.available_many(missing).items()
+            }
+            # Ids outside the catalog are answered but never cached, so clients can't grow the cache
+            by_id = self.catalog.snapshot.by_id
+            cacheable = [product_id for product_id in fetched if product_id in by_id]
+            with self._cache_lock:
+                if epoch == self._epoch:
+                    cache = self._stock_cache
+                    for product_id in cacheable:
+                        cache[product_id] = fetched[product_id]
+                        cache.move_to_end(product_id)
+                    while len(cache) > self.cache_size:
+                        cache.popitem(last=False)
+                        self._stats["evictions"] += 1
+            entries.update(fetched)
+        return {product_id: entries[product_id] for product_id in product_ids}
+    
+    def _on_stock_change(self, product_ids: Optional[FrozenSet[str]]):
+        # Runs on the publishing request or on the event feed thread
+        with self._cache_lock:
+            self._epoch += 1
+            self._stats["invalidations"] += 1
+            if product_ids is None:
+                self._stock_cache = OrderedDict()
+                return
+            for product_id in product_ids:
+                self._stock_cache.pop(product_id, None)
+    
+    def stats(self) -> Dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "cached": len(self._stock_cache),
+            "max_cached": self.cache_size,
+            "ttl": self.cache_ttl,
+            "option_lists": len(self._option_lists),
+            "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0
+        }
+    
+    def get_version(self, product_id: str) -> str:
+        """Content token of a product's stock record, used for cache validators"""
+        return self._version(self.get_stock(product_id))
+    
+    @staticmethod
+    def _version(stock: Optional[Dict]) -> str:
+        if not stock:
+            return "none"
+        stores = ",".join(f"{store}={qty}" for store, qty in sorted(stock["stores"].items()))
+        return f"{stock['warehouse']};{stores}"
     
     def check_availability(self, product_id: str, location: Optional[str] = None) -> Dict:
         """Check if product is available"""
-        stock = self.get_stock(product_id)
+        return self.check_availability_batch([product_id], location)[product_id]["availability"]
+    
+    def get_fulfillment_options(self, product_id: str, location: Optional[str] = None) -> list:
+        """Get available fulfillment options"""
+        return self.check_availability_batch([product_id], location)[product_id]["fulfillment_options"]
+    
+    def check_availability_batch(self, product_ids: Iterable[str], location: Optional[str] = None) -> Dict[str, Dict]:
+        """Availability and fulfillment options for many products in one pass.
         
+        Results for all locations, and for stores the product or the store
+        registry knows, are materialized next to the cached live stock and
+        dropped with it by the change feed, so repeat reads are dict
+        lookups and all misses share a single backend round trip.
+        The returned dicts are shared and must be treated as read-only.
+        """
+        entries = self._entries(list(dict.fromkeys(product_ids)))
+        known_store = location is not None and self.stores.get(location) is not None
+        results = {}
+        for product_id, (_, stock, views) in entries.items():
+            result = views.get(location)
+            if result is None:
+                result = self._materialize(stock, location)
+                # Only a bounded set of locations is kept; arbitrary strings are computed per call
+                if location is None or known_store or (stock and location in stock["stores"]):
+                    views[location] = result
+            results[product_id] = result
+        return results
+    
+    async def check_availability_batch_async(
+        self,
+        product_ids: Iterable[str],
+        location: Optional[str] = None
+    ) -> Dict[str, Dict]:
+        """check_availability_batch for coroutines; Redis reads run in the threadpool"""
+        return await self._read(self.check_availability_batch, list(product_ids), location)
+    
+    async def _read(self, method, *args):
+        # In-memory counters are only safe to read on the event loop, and cheap there
+        if self.ledger.remote:
+            return await run_in_threadpool(method, *args)
+        return method(*args)
+    
+    def _materialize(self, stock: Optional[Dict], location: Optional[str]) -> Dict:
+        availability = self._availability(stock, location)
+        return {
+            "availability": availability,
+            "fulfillment_options": self._fulfillment_options(availability),
+            "in_stock": availability["available"],
+            "version": self._version(stock)
+        }
+    
+    @staticmethod
+    def _availability(stock: Optional[Dict], location: Optional[str] = None) -> Dict:
         if not stock:
             return {
                 "available": False,
@@ -60,99 +210,130 @@ class InventoryAPI:
             "message": "In stock" if (warehouse_available or store_available) else "Out of stock"
         }
     
-    def get_fulfillment_options(self, product_id: str, location: Optional[str] = None) -> list:
-        """Get available fulfillment options"""
-        availability = self.check_availability(product_id, location)
+    @staticmethod
+    def _option_signature(availability: Dict) -> Tuple:
+        """What the option list depends on: stock bands, not exact counts"""
+        warehouse = availability["warehouse"]
+        band = 0 if warehouse <= 0 else 1 if warehouse <= FREE_SHIPPING_STOCK else 2
+        return band, tuple(store for store, qty in availability["stores"].items() if qty > 0)
+    
+    def _fulfillment_options(self, availability: Dict) -> list:
+        """Option list for an availability, rebuilt only when stock crosses a band"""
+        signature = self._option_signature(availability)
+        options = self._option_lists.get(signature)
+        if options is None:
+            if len(self._option_lists) >= OPTION_LIST_LIMIT:
+                self._option_lists = {}
+            options = self._option_lists[signature] = self._build_fulfillment_options(*signature)
+            self._stats["option_builds"] += 1
+        return options
+    
+    @staticmethod
+    def _build_fulfillment_options(warehouse_band: int, stores: Tuple[str, ...]) -> list:
         options = []
         
-        if availability["warehouse"] > 0:
+        if warehouse_band > 0:
             options.append({
                 "type": "Ship to Home",
                 "available": True,
                 "estimated_time": "2-3 days",
-                "cost": 0 if availability["warehouse"] > 5 else 50,
+                "cost": 0 if warehouse_band > 1 else 50,
                 "description": "Free shipping on orders above ₹500"
             })
         
-        if availability["stores"]:
-            for store, qty in availability["stores"].items():
-                if qty > 0:
-                    options.append({
-                        "type": "Click & Collect",
-                        "available": True,
-                        "location": store,
-                        "estimated_time": "Same day",
-                        "cost": 0,
-                        "description": f"Pick up from {store} store today"
-                    })
-                    
-                    options.append({
-                        "type": "In-Store Try-on",
-                        "available": True,
-                        "location": store,
-                        "estimated_time": "Visit anytime",
-                        "cost": 0,
-                        "description": f"Try before you buy at {store}"
-                    })
+        for store in stores:
+            options.append({
+                "type": "Click & Collect",
+                "available": True,
+                "location": store,
+                "estimated_time": "Same day",
+                "cost": 0,
+                "description": f"Pick up from {store} store today"
+            })
+            
+            options.append({
+                "type": "In-Store Try-on",
+                "available": True,
+                "location": store,
+                "estimated_time": "Visit anytime",
+                "cost": 0,
+                "description": f"Try before you buy at {store}"
+            })
         
         return options
     
-    def reserve_stock(self, product_id: str, quantity: int, location: Optional[str] = None) -> Dict:
-        """Reserve stock for a product (mock operation)"""
-        stock = self.get_stock(product_id)
-        
-        if not stock:
-            return {
-                "success": False,
-                "message": "Product not found"
-            }
-        
-        # Check if enough stock available
-        if location and location in stock["stores"]:
-            available = stock["stores"][location]
-        else:
-            available = stock["warehouse"]
-        
-        if available >= quantity:
-            return {
-                "success": True,
-                "message": f"Reserved {quantity} units",
-                "reservation_id": f"RES_{product_id}_{random.randint(1000, 9999)}"
-            }
-        else:
+    async def reserve_stock(self, product_id: str, quantity: int, location: Optional[str] = None) -> Dict:
+        """Hold stock for a product until it is committed, released or expires"""
+        return await self.reserve_items([(product_id, quantity)], location)
+    
+    async def reserve_items(
+        self,
+        items: Iterable[Tuple[str, int]],
+        location: Optional[str] = None,
+        ttl: Optional[int] = None
+    ) -> Dict:
+        """Hold stock for several products at once, all or none"""
+        try:
+            hold = await self.ledger.reserve(items, location, ttl)
+        except ReservationError as e:
             return {
                 "success": False,
-                "message": f"Only {available} units available"
-            }
-    
-    def get_nearby_stores(self, location: str) -> list:
-        """Get nearby stores based on location"""
-        # Mock store data
-        all_stores = {
-            "Mumbai": {
-                "name": "Phoenix Mills Store",
-                "address": "High Street Phoenix, Lower Parel, Mumbai",
-                "distance": "2.5 km",
-                "hours": "10 AM - 10 PM"
-            },
-            "Delhi": {
-                "name": "Select Citywalk Store",
-                "address": "Saket, New Delhi",
-                "distance": "3.2 km",
-                "hours": "11 AM - 9 PM"
-            },
-            "Bangalore": {
-                "name": "UB City Store",
-                "address": "Vittal Mallya Road, Bangalore",
-                "distance": "1.8 km",
-                "hours": "10 AM - 9 PM"
+                "message": str(e)
             }
+        units = sum(item["quantity"] for item in hold["items"])
+        return {
+            "success": True,
+            "message": f"Reserved {units} units",
+            **hold
         }
+    
+    async def commit_reservation(self, reservation_id: str) -> Dict:
+        """Convert a hold into a sale after successful payment"""
+        try:
+            await self.ledger.commit(reservation_id)
+        except ReservationError as e:
+            return {"success": False, "message": str(e)}
+        return {"success": True, "message": "Reservation committed"}
+    
+    async def release_reservation(self, reservation_id: str) -> Dict:
+        """Return a hold's stock, e.g. after a failed payment"""
+        if await self.ledger.release(reservation_id):
+            return {"success": True, "message": "Reservation released"}
+        return {"success": False, "message": f"Reservation {reservation_id} not found or already closed"}
+    
+    def get_nearby_stores(
+        self,
+        location: str,
+        limit: int = 3,
+        product_id: Optional[str] = None,
+        quantity: int = 1
+    ) -> list:
+        """Get the nearest stores to a city, store id or "lat,lon" location.
         
-        if location in all_stores:
-            return [all_stores[location]]
+        With ``product_id`` only stores holding ``quantity`` units of it in
+        live stock are returned. Unknown locations get the first ``limit``
+        stores without distances.
+        """
+        point = self.stores.resolve(location)
+        if point is None:
+            return [{**store.to_dict(), "distance_km": None, "distance": None} for store in self.stores.stores(limit)]
         
-        return list(all_stores.values())
+        stock = None
+        if product_id:
+            record = self.get_stock(product_id)
+            stock = record["stores"] if record else {}
+        return self.stores.nearest(point[0], point[1], k=limit, stock=stock, min_quantity=quantity)
+
+    
+    async def get_nearby_stores_async(
+        self,
+        location: str,
+        limit: int = 3,
+        product_id: Optional[str] = None,
+        quantity: int = 1
+    ) -> list:
+        """get_nearby_stores for coroutines; Redis reads run in the threadpool"""
+        return await self._read(self.get_nearby_stores, location, limit, product_id, quantity)
 
 
 # Singleton instance
@@ -0,0 +1,175 @@
+from array import array
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+import asyncio
+import os
+import zlib
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Lock partitions of the in-memory inventory; SKUs only contend with SKUs in the same shard
+INVENTORY_SHARDS = int(os.getenv("INVENTORY_SHARDS", "64"))
+
+WAREHOUSE = "warehouse"
+
+
+class StockLayout:
+    """Location order shared by every record with the same set of stores"""
+
+    __slots__ = ("locations", "position")
+
+    def __init__(self, locations: Tuple[str, ...]):
+        self.locations = locations
+        self.position = {location: i for i, location in enumerate(locations)}
+
+
+class StockRecord:
+    """Live and on-hand counts of one SKU, one array slot per location.
+
+    ``on_hand`` is the snapshot quantity each live count was last
+    reconciled against, so restocks can be applied as deltas.
+    """
+
+    __slots__ = ("layout", "available", "on_hand")
+
+    def __init__(self, layout: StockLayout, quantities: Iterable[int]):
+        self.layout = layout
+        self.available = array("q", quantities)
+        self.on_hand = array("q", self.available)
+
+    def get(self, location: str) -> Optional[int]:
+        i = self.layout.position.get(location)
+        return self.available[i] if i is not None else None
+
+    def adjust(self, location: str, delta: int):
+        self.available[self.layout.position[location]] += delta
+
+    def to_stock(self) -> Dict:
+        """Stock record in the snapshot shape"""
+        counts = dict(zip(self.layout.locations, self.available))
+        return {"warehouse": counts.pop(WAREHOUSE), "stores": counts}
+
+
+class ShardLocks:
+    """Acquires several shard locks in index order and releases them in reverse"""
+
+    __slots__ = ("locks",)
+
+    def __init__(self, locks: List[asyncio.Lock]):
+        self.locks = locks
+
+    async def __aenter__(self):
+        acquired = []
+        try:
+            for lock in self.locks:
+                await lock.acquire()
+                acquired.append(lock)
+        except BaseException:
+            for lock in reversed(acquired):
+                lock.release()
+            raise
+
+    async def __aexit__(self, *exc_info):
+        for lock in reversed(self.locks):
+            lock.release()
+
+
+class InventoryShard:
+    __slots__ = ("lock", "records")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.records: Dict[str, StockRecord] = {}
+
+
+class InventoryStore:
+    """Mutable in-memory inventory partitioned by product hash.
+
+    Each shard has its own asyncio lock, so concurrent reservations on SKUs
+    in different shards never wait on each other. Multi-product operations
+    lock their shards in index order, which rules out deadlocks. Records
+    are created from the catalog snapshot the first time a SKU is touched.
+    Reads and single-statement updates never await, so they are atomic on
+    the event loop without taking a lock.
+    """
+
+    def __init__(self, shards: int = INVENTORY_SHARDS):
+        self.shards = [InventoryShard() for _ in range(max(shards, 1))]
+        self._layouts: Dict[Tuple[str, ...], StockLayout] = {}
+
+    def shard_index(self, product_id: str) -> int:
+        # crc32 rather than hash(): stable across processes and restarts
+        return zlib.crc32(product_id.encode()) % len(self.shards)
+
+    def shard(self, product_id: str) -> InventoryShard:
+        return self.shards[self.shard_index(product_id)]
+
+    def locked(self, product_ids: Iterable[str]):
+        """Async context holding the locks of every shard these products live in"""
+        indexes = sorted({self.shard_index(product_id) for product_id in product_ids})
+        if len(indexes) == 1:
+            return self.shards[indexes[0]].lock
+        return ShardLocks([self.shards[index].lock for index in indexes])
+
+    def get(self, product_id: str) -> Optional[StockRecord]:
+        return self.shard(product_id).records.get(product_id)
+
+    def _layout(self, locations: Tuple[str, ...]) -> StockLayout:
+        layout = self._layouts.get(locations)
+        if layout is None:
+            layout = self._layouts[locations] = StockLayout(locations)
+        return layout
+
+    def seed(self, product_id: str, stock: Optional[Mapping]) -> StockRecord:
+        """The product's record, created from a snapshot stock record if missing"""
+        records = self.shard(product_id).records
+        record = records.get(product_id)
+        if record is None:
+            stores = dict(stock["stores"]) if stock else {}
+            layout = self._layout((WAREHOUSE, *stores))
+            record = records[product_id] = StockRecord(
+                layout, [int(stock["warehouse"]) if stock else 0, *map(int, stores.values())]
+            )
+        return record
+
+    def restore(self, product_id: str, locations: Tuple[str, ...], available: bytes, on_hand: bytes) -> StockRecord:
+        """Recreate a record from its persisted counter arrays"""
+        record = StockRecord(self._layout(tuple(locations)), ())
+        record.available.frombytes(available)
+        record.on_hand.frombytes(on_hand)
+        self.shard(product_id).records[product_id] = record
+        return record
+
+    def quantity(self, product_id: str, location: str, default: int) -> int:
+        record = self.get(product_id)
+        quantity = record.get(location) if record is not None else None
+        return default if quantity is None else quantity
+
+    def rebase(self, product_id: str, location: str, on_hand: int):
+        """Shift a live count by the change in its on-hand quantity"""
+        record = self.get(product_id)
+        if record is None:
+            return
+        i = record.layout.position.get(location)
+        if i is None:
+            # A store started stocking the product: widen the record
+            layout = self._layout((*record.layout.locations, location))
+            record.layout = layout
+            record.available.append(on_hand)
+            record.on_hand.append(on_hand)
+            return
+        record.available[i] += on_hand - record.on_hand[i]
+        record.on_hand[i] = on_hand
+
+    def records(self) -> List[Tuple[str, StockRecord]]:
+        return [item for shard in self.shards for item in shard.records.items()]
+
+    def stats(self) -> Dict:
+        sizes = [len(shard.records) for shard in self.shards]
+        return {
+            "shards": len(self.shards),
+            "records": sum(sizes),
+            "largest_shard": max(sizes),
+            "layouts": len(self._layouts)
+        }
@@ -0,0 +1,429 @@
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+import asyncio
+import json
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Directory of the in-memory inventory's write-ahead log and snapshots (empty disables persistence)
+INVENTORY_WAL_DIR = os.getenv("INVENTORY_WAL_DIR", "./inventory_wal")
+# Seconds to gather more records before each fsync; 0 syncs whatever queued during the previous one
+INVENTORY_WAL_FLUSH_INTERVAL = float(os.getenv("INVENTORY_WAL_FLUSH_INTERVAL", "0"))
+# Compact the log into a snapshot after this many seconds or bytes of log, whichever comes first
+INVENTORY_SNAPSHOT_INTERVAL = float(os.getenv("INVENTORY_SNAPSHOT_INTERVAL", "300"))
+INVENTORY_SNAPSHOT_LOG_BYTES = int(os.getenv("INVENTORY_SNAPSHOT_LOG_BYTES", str(64 * 1024 * 1024)))
+
+# Record header: payload length and crc32; a short or mismatching record marks a torn write
+FRAME = struct.Struct("<II")
+# Seconds between checks whether a snapshot is due
+SNAPSHOT_CHECK_INTERVAL = 1.0
+# Held with flock while a process owns the directory
+LOCK_NAME = "LOCK"
+
+
+class WALError(Exception):
+    """The log cannot be written or replayed"""
+
+
+def _segment_name(sequence: int) -> str:
+    return f"wal-{sequence:08d}.log"
+
+
+def _snapshot_name(sequence: int) -> str:
+    return f"snapshot-{sequence:08d}.pkl"
+
+
+def encode(record: Dict) -> bytes:
+    payload = json.dumps(record, separators=(",", ":")).encode()
+    return FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+_decode = json.JSONDecoder().decode
+
+
+def read_segment(path: str) -> Iterator[Tuple[Dict, int]]:
+    """Records of a segment with the offset after each, stopping at the first damaged one.
+
+    Segments are bounded by the snapshot threshold, so the file is read in
+    one call and records are sliced out of the buffer.
+    """
+    with open(path, "rb") as f:
+        data = memoryview(f.read())
+    offset, size = 0, len(data)
+    while offset + FRAME.size <= size:
+        length, crc = FRAME.unpack_from(data, offset)
+        start, end = offset + FRAME.size, offset + FRAME.size + length
+        payload = data[start:end]
+        if end > size or zlib.crc32(payload) != crc:
+            return
+        offset = end
+        yield _decode(str(payload, "utf-8")), offset
+
+
+class WriteAheadLog:
+    """Append-only log of inventory mutations with group commit and compaction.
+
+    Mutations are appended to an in-memory queue on the event loop, and one
+    writer drains the queue with a single write and fsync per batch in an
+    executor thread, so concurrent requests share an fsync instead of each
+    paying for one. Callers await ``sync()`` before acknowledging a change.
+
+    Snapshots capture the full state and start a new log segment in the same
+    event loop step, so a snapshot plus the segments after it always replay
+    to the live state. Older segments and snapshots are deleted once the
+    snapshot is on disk. Recovery loads the newest snapshot, replays the
+    segments after it and truncates a torn record at the end of the log.
+
+    One log directory belongs to one process, enforced with an flock on
+    its LOCK file: a second process fails to recover instead of corrupting
+    the log. Multi-worker deployments keep their counters in Redis instead.
+    """
+
+    def __init__(
+        self,
+        directory: str = INVENTORY_WAL_DIR,
+        flush_interval: float = INVENTORY_WAL_FLUSH_INTERVAL,
+        snapshot_interval: float = INVENTORY_SNAPSHOT_INTERVAL,
+        snapshot_log_bytes: int = INVENTORY_SNAPSHOT_LOG_BYTES
+    ):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_log_bytes = snapshot_log_bytes
+        # Encoded records, and segment numbers where the writer switches files
+        self._queue: List[Union[bytes, int]] = []
+        self._queued = 0
+        self._synced = 0
+        self._waiters: Deque[Tuple[int, asyncio.Future]] = deque()
+        self._error: Optional[Exception] = None
+        # Segment the writer appends to, and the one new records belong to
+        self._segment = 0
+        self._tail = 0
+        self._file = None
+        self._lock_file = None
+        # Batches are written strictly in the order they were taken off the queue
+        self._write_turn = threading.Condition()
+        self._tickets = 0
+        self._turn = 0
+        self._capture: Optional[Callable[[], Any]] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._snapshotting = False
+        self._log_bytes = 0
+        self._last_snapshot = time.monotonic()
+        self._stats = {
+            "records": 0, "fsyncs": 0, "bytes_written": 0, "snapshots": 0,
+            "replayed": 0, "recovery_ms": 0.0, "last_snapshot_ms": 0.0
+        }
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _sequences(self, prefix: str, suffix: str) -> List[int]:
+        sequences = []
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(suffix):
+                try:
+                    sequences.append(int(name[len(prefix):-len(suffix)]))
+                except ValueError:
+                    continue
+        return sorted(sequences)
+
+    def _fsync_directory(self):
+        # Makes file creations, renames and deletions durable
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def recover(self, restore: Callable[[Any], None], apply: Callable[[Dict], None]) -> int:
+        """Hand the newest snapshot to ``restore`` and every later record to ``apply``.
+
+        Returns the number of records replayed. Appends go to a fresh
+        segment afterwards.
+        """
+        started = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+        self._acquire_lock()
+        try:
+            replayed = self._replay(restore, apply)
+        except BaseException:
+            self._release_lock()
+            raise
+        self._stats["replayed"] = replayed
+        self._stats["recovery_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return replayed
+
+    def _acquire_lock(self):
+        try:
+            import fcntl
+        except ImportError:
+            # No flock on this platform; single-process use is up to the deployment
+            return
+        if self._lock_file is not None:
+            return
+
+        lock_file = open(self._path(LOCK_NAME), "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise WALError(
+                f"Inventory log {self.directory} is in use by another process; "
+                "run a single worker, give each worker its own INVENTORY_WAL_DIR or use Redis"
+            )
+        self._lock_file = lock_file
+
+    def _release_lock(self):
+        if self._lock_file is not None:
+            # Closing the descriptor drops the flock
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _replay(self, restore: Callable[[Any], None], apply: Callable[[Dict], None]) -> int:
+        snapshots = self._sequences("snapshot-", ".pkl")
+        base = snapshots[-1] if snapshots else 0
+        if snapshots:
+            with open(self._path(_snapshot_name(base)), "rb") as f:
+                restore(pickle.load(f))
+
+        segments = [sequence for sequence in self._sequences("wal-", ".log") if sequence >= base]
+        replayed = 0
+        for sequence in segments:
+            path = self._path(_segment_name(sequence))
+            end = 0
+            for record, end in read_segment(path):
+                apply(record)
+                replayed += 1
+            size = os.path.getsize(path)
+            self._log_bytes += end
+            if end < size:
+                if sequence != segments[-1]:
+                    raise WALError(f"Damaged record in {path} at byte {end}; later segments cannot be replayed")
+                # The tail of the last segment was being written when the process stopped
+                print(f"⚠️  Truncating torn inventory log record: {path} at byte {end} of {size}")
+                os.truncate(path, end)
+
+        self._prune(base)
+        self._segment = self._tail = segments[-1] + 1 if segments else base
+        self._file = open(self._path(_segment_name(self._segment)), "ab")
+        self._fsync_directory()
+        return replayed
+
+    def append(self, record: Dict):
+        """Queue a mutation; it is durable once a later ``sync()`` returns"""
+        frame = encode(record)
+        self._queue.append(frame)
+        self._queued += 1
+        self._log_bytes += len(frame)
+        self._stats["records"] += 1
+        if self._wake is not None:
+            self._wake.set()
+
+    async def sync(self):
+        """Wait until everything queued so far is on disk"""
+        if self._error is not None:
+            raise WALError(f"Inventory log unavailable: {self._error}")
+        target = self._queued
+        if self._synced >= target:
+            return
+        if self._wake is None:
+            # Not started: write inline
+            self._flush()
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((target, future))
+        await future
+
+    def _take(self) -> Tuple[int, List[Union[bytes, int]], int]:
+        """Everything queued so far, with the queue position it reaches and its write ticket"""
+        target, batch, ticket = self._queued, self._queue, self._tickets
+        self._queue = []
+        self._tickets += 1
+        return target, batch, ticket
+
+    def _flush(self):
+        target, batch, ticket = self._take()
+        self._write(batch, ticket)
+        self._mark_synced(target)
+
+    def _mark_synced(self, target: int):
+        self._synced = target
+        while self._waiters and self._waiters[0][0] <= target:
+            future = self._waiters.popleft()[1]
+            if not future.done():
+                future.set_result(None)
+
+    def _write(self, batch: List[Union[bytes, int]], ticket: int):
+        with self._write_turn:
+            while self._turn != ticket:
+                self._write_turn.wait()
+            try:
+                self._write_batch(batch)
+            finally:
+                self._turn += 1
+                self._write_turn.notify_all()
+
+    def _write_batch(self, batch: List[Union[bytes, int]]):
+        frames = []
+        for item in batch:
+            if isinstance(item, int):
+                self._write_frames(frames)
+                frames = []
+                self._file.close()
+                self._segment = item
+                self._file = open(self._path(_segment_name(item)), "ab")
+                self._fsync_directory()
+            else:
+                frames.append(item)
+        self._write_frames(frames)
+
+    def _write_frames(self, frames: List[bytes]):
+        if not frames:
+            return
+        data = b"".join(frames)
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._stats["fsyncs"] += 1
+        self._stats["bytes_written"] += len(data)
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wake.wait()
+            if self.flush_interval > 0:
+                await asyncio.sleep(self.flush_interval)
+            self._wake.clear()
+            target, batch, ticket = self._take()
+            try:
+                await loop.run_in_executor(None, self._write, batch, ticket)
+            except Exception as e:
+                # Records of this batch may or may not be on disk; stop acknowledging anything
+                print(f"Inventory log write error: {e}")
+                self._error = e
+                while self._waiters:
+                    future = self._waiters.popleft()[1]
+                    if not future.done():
+                        future.set_exception(WALError(f"Inventory log unavailable: {e}"))
+                return
+            self._mark_synced(target)
+
+    async def snapshot(self) -> Optional[int]:
+        """Persist the full state and drop the log it replaces; the new base segment"""
+        if self._capture is None or self._snapshotting:
+            return None
+        self._snapshotting = True
+        started = time.perf_counter()
+        try:
+            state, sequence = self._rotate()
+            await self.sync()
+
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_snapshot, sequence, state)
+            self._prune(sequence)
+        finally:
+            self._snapshotting = False
+        self._stats["snapshots"] += 1
+        self._stats["last_snapshot_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return sequence
+
+    def _rotate(self) -> Tuple[Any, int]:
+        """Capture the state and queue the switch to a new segment in the same loop step,
+        so the state holds exactly the records queued before that segment"""
+        state = self._capture()
+        self._tail += 1
+        self._queue.append(self._tail)
+        self._queued += 1
+        self._log_bytes = 0
+        self._last_snapshot = time.monotonic()
+        if self._wake is not None:
+            self._wake.set()
+        return state, self._tail
+
+    def _write_snapshot(self, sequence: int, state: Any):
+        path = self._path(_snapshot_name(sequence))
+        tmp_path = f"{path}.tmp.{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._fsync_directory()
+
+    def _prune(self, base: int):
+        """Delete segments and snapshots older than the snapshot at ``base``"""
+        for sequence in self._sequences("wal-", ".log"):
+            if sequence < base:
+                os.remove(self._path(_segment_name(sequence)))
+        for sequence in self._sequences("snapshot-", ".pkl"):
+            if sequence < base:
+                os.remove(self._path(_snapshot_name(sequence)))
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(SNAPSHOT_CHECK_INTERVAL)
+            due = self._log_bytes >= self.snapshot_log_bytes or (
+                self._log_bytes > 0
+                and self.snapshot_interval > 0
+                and time.monotonic() - self._last_snapshot >= self.snapshot_interval
+            )
+            if not due:
+                continue
+            try:
+                await self.snapshot()
+            except Exception as e:
+                print(f"Inventory snapshot error: {e}")
+
+    def start(self, capture: Callable[[], Any]):
+        """Run the writer and snapshot tasks on the running loop; ``capture`` returns the state to snapshot"""
+        self._capture = capture
+        self._wake = asyncio.Event()
+        if self._queue:
+            self._wake.set()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._flush_loop()), loop.create_task(self._snapshot_loop())]
+
+    def stop(self, snapshot: bool = True):
+        """Write out whatever is still queued, compact the log and close it"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._wake = None
+        if self._file is None:
+            self._release_lock()
+            return
+        if self._error is None:
+            # A clean shutdown leaves nothing to replay
+            pending = self._rotate() if snapshot and self._capture is not None and self._log_bytes else None
+            self._flush()
+            if pending is not None and not self._snapshotting:
+                state, sequence = pending
+                self._write_snapshot(sequence, state)
+                self._prune(sequence)
+                self._stats["snapshots"] += 1
+        with self._write_turn:
+            self._file.close()
+            self._file = None
+        self._release_lock()
+
+    def stats(self) -> Dict:
+        fsyncs = self._stats["fsyncs"]
+        return {
+            "directory": self.directory,
+            "segment": self._tail,
+            "queued": self._queued - self._synced,
+            "log_bytes": self._log_bytes,
+            **self._stats,
+            "records_per_fsync": round(self._stats["records"] / fsyncs, 2) if fsyncs else 0.0,
+            "healthy": self._error is None
+        }
@@ -0,0 +1,391 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+from apis.catalog_columns import CatalogColumns, build_columns, from_arrays
+from apis.catalog_store import CatalogSnapshot
+from apis.cooccurrence import CooccurrenceEngine, cooccurrence_engine
+from apis.embeddings import EMBEDDING_DIM, IVFIndex, build_ivf, embed_products, embedding_index
+from apis.neighbour_table import RECOMMENDATION_NEIGHBOURS, NeighbourTable, build_table, neighbour_index
+from utils.recommendation_cache import recommendation_cache
+
+load_dotenv()
+
+# Directory holding one sub-directory per build plus the CURRENT pointer; empty disables
+RECOMMENDATION_ARTIFACT_DIR = os.getenv("RECOMMENDATION_ARTIFACT_DIR", "./artifacts")
+# Seconds between checks of CURRENT for a new build, 0 disables hot swap
+RECOMMENDATION_ARTIFACT_POLL_INTERVAL = float(os.getenv("RECOMMENDATION_ARTIFACT_POLL_INTERVAL", "30"))
+# Whether workers also build/update indexes themselves when the catalog changes
+RECOMMENDATION_ONLINE_BUILD = os.getenv("RECOMMENDATION_ONLINE_BUILD", "true").lower() == "true"
+
+ARTIFACT_FORMAT = 1
+COMPONENTS = ("neighbours", "embeddings", "cooccurrence")
+CURRENT = "CURRENT"
+MANIFEST = "manifest.json"
+
+
+class ArtifactError(Exception):
+    """A build directory is missing, corrupt or inconsistent"""
+
+
+@dataclass(frozen=True)
+class ArtifactBundle:
+    """Everything one build produced, loaded and validated"""
+    build_id: str
+    manifest: Dict
+    columns: CatalogColumns
+    table: Optional[NeighbourTable]
+    index: Optional[IVFIndex]
+    cooccurrence_path: Optional[str]
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _describe(path: str) -> Dict:
+    return {"file": os.path.basename(path), "bytes": os.path.getsize(path), "sha256": _sha256(path)}
+
+
+def _save_arrays(directory: str, arrays: Dict[str, np.ndarray]) -> Dict[str, Dict]:
+    files = {}
+    for name, array in arrays.items():
+        path = os.path.join(directory, f"{name}.npy")
+        np.save(path, np.ascontiguousarray(array))
+        files[name] = _describe(path)
+    return files
+
+
+def _load_arrays(directory: str, files: Dict[str, Dict], verify: bool) -> Dict[str, np.ndarray]:
+    arrays = {}
+    for name, meta in files.items():
+        path = os.path.join(directory, meta["file"])
+        if not os.path.exists(path):
+            raise ArtifactError(f"missing file {meta['file']}")
+        if verify and _sha256(path) != meta["sha256"]:
+            raise ArtifactError(f"checksum mismatch for {meta['file']}")
+        # Memory-mapped: loading costs page-table setup, not a copy
+        arrays[name] = np.load(path, mmap_mode="r")
+    return arrays
+
+
+def read_orders() -> Iterable[Tuple[List[str], Optional[float]]]:
+    """Stream (product ids, timestamp) of every stored order"""
+    from sqlalchemy import select
+    from models.database import SessionLocal, Order
+
+    with SessionLocal() as db:
+        rows = db.execute(select(Order.items, Order.created_at).order_by(Order.created_at))
+        for items, created_at in rows.yield_per(1000):
+            ids = [i.get("product_id") for i in items or [] if isinstance(i, dict)]
+            yield [pid for pid in ids if pid], created_at.replace(tzinfo=timezone.utc).timestamp() if created_at else None
+
+
+def build_artifacts(
+    root: str,
+    snapshot: CatalogSnapshot,
+    orders: Iterable[Tuple[List[str], Optional[float]]] = (),
+    components: Sequence[str] = COMPONENTS,
+    width: int = RECOMMENDATION_NEIGHBOURS,
+    dim: int = EMBEDDING_DIM,
+    keep: int = 3
+) -> str:
+    """Build, validate and publish a new artifact directory; returns its build id.
+
+    The build is written to a temporary directory, validated, renamed into
+    place and only then made current by atomically replacing CURRENT, so
+    readers never see a partial build.
+    """
+    unknown = set(components) - set(COMPONENTS)
+    if unknown:
+        raise ValueError(f"unknown components: {', '.join(sorted(unknown))}")
+
+    build_id = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')}-{snapshot.version[:8]}"
+    os.makedirs(root, exist_ok=True)
+    staging = os.path.join(root, f".tmp-{build_id}")
+    os.makedirs(staging)
+
+    try:
+        columns = build_columns(snapshot)
+        manifest = {
+            "format": ARTIFACT_FORMAT,
+            "build_id": build_id,
+            "catalog_version": snapshot.version,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "products": len(columns),
+            "components": {}
+        }
+        manifest["catalog"] = _save_arrays(staging, {
+            "ids": np.asarray(columns.ids, dtype=str),
+            "price": columns.price,
+            "rating": columns.rating,
+            "category": np.asarray(columns.categories, dtype=str)[columns.category],
+            "brand": np.asarray(columns.brands, dtype=str)[columns.brand],
+            "is_trending": columns.is_trending,
+            "is_seasonal": columns.is_seasonal,
+            "is_bestseller": columns.is_bestseller
+        })
+
+        if "neighbours" in components and width > 0:
+            started = time.perf_counter()
+            table = build_table(columns, width)
+            manifest["components"]["neighbours"] = {
+                "width": width,
+                "build_ms": round((time.perf_counter() - started) * 1000, 2),
+                "files": _save_arrays(staging, {"neighbours": table.neighbours, "neighbour_scores": table.scores})
+            }
+
+        if "embeddings" in components and dim > 0 and len(columns):
+            started = time.perf_counter()
+            index = build_ivf(embed_products(snapshot.products, dim), version=snapshot.version)
+            manifest["components"]["embeddings"] = {
+                "dim": dim,
+                "clusters": len(index.centroids),
+                "build_ms": round((time.perf_counter() - started) * 1000, 2),
+                "files": _save_arrays(staging, {
+                    "centroids": index.centroids,
+                    "offsets": index.offsets,
+                    "order": index.order,
+                    "vectors": index.vectors,
+                    "embeddings": index.embeddings
+                })
+            }
+
+        if "cooccurrence" in components:
+            engine = CooccurrenceEngine(snapshot_path=os.path.join(staging, "cooccurrence.npz"))
+            for product_ids, timestamp in orders:
+                engine.record_order(product_ids, timestamp)
+            engine.save()
+            manifest["components"]["cooccurrence"] = {
+                "orders": engine.orders,
+                "files": {"cooccurrence": _describe(engine.snapshot_path)}
+            }
+
+        with open(os.path.join(staging, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        load_build(staging)
+        os.rename(staging, os.path.join(root, build_id))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    _write_current(root, build_id)
+    prune_builds(root, keep)
+    return build_id
+
+
+def _write_current(root: str, build_id: str):
+    tmp_path = os.path.join(root, f"{CURRENT}.tmp.{os.getpid()}")
+    with open(tmp_path, "w") as f:
+        f.write(build_id + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(root, CURRENT))
+
+
+def current_build(root: str) -> Optional[str]:
+    try:
+        with open(os.path.join(root, CURRENT)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def list_builds(root: str) -> List[str]:
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if not name.startswith(".") and os.path.isfile(os.path.join(root, name, MANIFEST))
+    )
+
+
+def prune_builds(root: str, keep: int):
+    """Delete all but the newest ``keep`` builds, never the current one"""
+    current = current_build(root)
+    for build_id in list_builds(root)[:-keep] if keep > 0 else []:
+        if build_id != current:
+            shutil.rmtree(os.path.join(root, build_id), ignore_errors=True)
+
+
+def load_build(directory: str, verify: bool = True) -> ArtifactBundle:
+    """Load one build directory and check it is internally consistent"""
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"unreadable manifest: {e}")
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ArtifactError(f"unsupported artifact format {manifest.get('format')}")
+
+    version = manifest["catalog_version"]
+    catalog = _load_arrays(directory, manifest["catalog"], verify)
+    n = len(catalog["ids"])
+    if n != manifest["products"] or any(len(column) != n for column in catalog.values()):
+        raise ArtifactError("catalog columns disagree on the product count")
+    columns = from_arrays(
+        ids=catalog["ids"].tolist(),
+        price=catalog["price"],
+        rating=catalog["rating"],
+        categories=catalog["category"].tolist(),
+        brands=catalog["brand"].tolist(),
+        is_trending=catalog["is_trending"],
+        is_seasonal=catalog["is_seasonal"],
+        is_bestseller=catalog["is_bestseller"],
+        version=version
+    )
+
+    table = None
+    component = manifest["components"].get("neighbours")
+    if component:
+        arrays = _load_arrays(directory, component["files"], verify)
+        neighbours, scores = arrays["neighbours"], arrays["neighbour_scores"]
+        if neighbours.shape != (n, component["width"]) or scores.shape != neighbours.shape:
+            raise ArtifactError("neighbour table has the wrong shape")
+        if n and (neighbours.min() < -1 or neighbours.max() >= n):
+            raise ArtifactError("neighbour table points outside the catalog")
+        table = NeighbourTable(version=version, ids=columns.ids, neighbours=neighbours, scores=scores)
+
+    index = None
+    component = manifest["components"].get("embeddings")
+    if component:
+        arrays = _load_arrays(directory, component["files"], verify)
+        offsets = arrays["offsets"]
+        if arrays["embeddings"].shape != (n, component["dim"]) or arrays["vectors"].shape != (n, component["dim"]):
+            raise ArtifactError("embeddings have the wrong shape")
+        if offsets[0] != 0 or offsets[-1] != n or np.any(np.diff(offsets) < 0):
+            raise ArtifactError("IVF list offsets are inconsistent")
+        if not np.array_equal(np.sort(arrays["order"]), np.arange(n)):
+            raise ArtifactError("IVF lists do not cover the catalog exactly once")
+        index = IVFIndex(
+            version=version,
+            centroids=arrays["centroids"],
+            offsets=offsets,
+            order=arrays["order"],
+            vectors=arrays["vectors"],
+            embeddings=arrays["embeddings"]
+        )
+
+    cooccurrence_path = None
+    component = manifest["components"].get("cooccurrence")
+    if component:
+        meta = component["files"]["cooccurrence"]
+        cooccurrence_path = os.path.join(directory, meta["file"])
+        if verify and _sha256(cooccurrence_path) != meta["sha256"]:
+            raise ArtifactError("checksum mismatch for co-occurrence counts")
+
+    return ArtifactBundle(
+        build_id=manifest["build_id"],
+        manifest=manifest,
+        columns=columns,
+        table=table,
+        index=index,
+        cooccurrence_path=cooccurrence_path
+    )
+
+
+class ModelArtifacts:
+    """Installs the current artifact build into the live recommendation indexes.
+
+    Each index swaps its reference in one assignment, so requests see either
+    the old or the new model. Indexes built for an older catalog version are
+    still installed: the neighbour table is then updated incrementally and the
+    embedding index rebuilt by their background workers.
+    """
+
+    def __init__(self, root: str = RECOMMENDATION_ARTIFACT_DIR):
+        self.root = root
+        self.build_id: Optional[str] = None
+        self.loaded_at: Optional[datetime] = None
+        self._failed: Optional[str] = None
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def load(self, build_id: Optional[str] = None) -> Optional[ArtifactBundle]:
+        """Load and install ``build_id`` (default: CURRENT); None if there is none"""
+        if not self.root:
+            return None
+        requested = build_id is not None
+        build_id = build_id or current_build(self.root)
+        if build_id is None:
+            return None
+
+        with self._lock:
+            if build_id in (self.build_id, self._failed):
+                return None
+            # Only ever join names of real builds onto the root, never caller-supplied paths
+            if build_id not in list_builds(self.root):
+                if not requested:
+                    self._failed = build_id
+                raise ArtifactError(f"Unknown recommendation build: {build_id}")
+            started = time.perf_counter()
+            try:
+                bundle = load_build(os.path.join(self.root, build_id))
+            except ArtifactError:
+                # Don't retry a broken build on every poll
+                self._failed = build_id
+                raise
+            self.install(bundle)
+            self.build_id, self.loaded_at = build_id, datetime.now()
+
+        print(f"✓ Loaded recommendation artifacts {build_id} in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return bundle
+
+    def install(self, bundle: ArtifactBundle):
+        if bundle.table is not None:
+            neighbour_index.install(bundle.table, bundle.columns)
+        if bundle.index is not None:
+            embedding_index.install(bundle.index)
+        # Keep live counts that already cover more orders than the build saw
+        if bundle.cooccurrence_path and bundle.manifest["components"]["cooccurrence"]["orders"] > cooccurrence_engine.orders:
+            cooccurrence_engine.load(bundle.cooccurrence_path)
+        # Results computed with the previous models are keyed by them; drop them eagerly
+        recommendation_cache.clear()
+
+    def start_watching(self, interval: float = RECOMMENDATION_ARTIFACT_POLL_INTERVAL):
+        """Hot-swap new builds as soon as CURRENT points at them"""
+        if interval <= 0 or not self.root or self._watcher is not None:
+            return
+        self._stop_event.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="model-artifacts", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def stats(self) -> Dict:
+        return {
+            "root": self.root,
+            "build_id": self.build_id,
+            "failed_build_id": self._failed,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None
+        }
+
+    def _watch(self, interval: float):
+        while not self._stop_event.wait(interval):
+            try:
+                self.load()
+            except Exception as e:
+                print(f"Recommendation artifact reload error: {e}")
+
+
+# Singleton instance
+model_artifacts = ModelArtifacts()
@@ -0,0 +1,220 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence
+import os
+import threading
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+from apis.catalog_columns import CatalogColumns, catalog_columns
+from apis.catalog_store import CatalogSnapshot, catalog_store
+from apis.similarity import pairwise_scores, top_k
+
+load_dotenv()
+
+# Neighbours kept per product; 0 disables the table
+RECOMMENDATION_NEIGHBOURS = int(os.getenv("RECOMMENDATION_NEIGHBOURS", "50"))
+# Above this share of changed products an update rebuilds the whole table
+FULL_REBUILD_RATIO = 0.25
+# Upper bound on score matrix cells held in memory at once
+BLOCK_CELLS = 4_000_000
+
+
+@dataclass(frozen=True)
+class NeighbourTable:
+    """Top-N related products for every catalog row.
+
+    ``neighbours[i]`` holds the row numbers of the best candidates for a cart
+    containing only product ``i``, best first, padded with -1. ``scores``
+    holds the matching similarity scores, padded with -inf.
+    """
+    version: str
+    ids: Sequence[str]
+    neighbours: np.ndarray
+    scores: np.ndarray
+
+    @property
+    def width(self) -> int:
+        return self.neighbours.shape[1]
+
+    def candidates(self, rows: Sequence[int]) -> np.ndarray:
+        """Union of the neighbour lists of ``rows``, excluding the rows themselves"""
+        merged = self.neighbours[np.asarray(rows, dtype=np.intp)].ravel()
+        merged = np.unique(merged[merged >= 0])
+        return np.setdiff1d(merged, rows, assume_unique=True)
+
+
+def _fill_rows(columns: CatalogColumns, rows: np.ndarray, neighbours: np.ndarray, scores: np.ndarray):
+    """Compute the neighbour lists of ``rows`` from scratch, block by block"""
+    width = neighbours.shape[1]
+    block = max(1, BLOCK_CELLS // max(len(columns), 1))
+
+    for start in range(0, len(rows), block):
+        sources = rows[start:start + block]
+        matrix = pairwise_scores(columns, sources)
+        matrix[np.arange(len(sources)), sources] = -np.inf
+
+        for i, row in enumerate(sources):
+            best = top_k(matrix[i], width)
+            neighbours[row, :len(best)] = best
+            neighbours[row, len(best):] = -1
+            scores[row, :len(best)] = matrix[i, best]
+            scores[row, len(best):] = -np.inf
+
+
+def build_table(columns: CatalogColumns, width: int = RECOMMENDATION_NEIGHBOURS) -> NeighbourTable:
+    """Build the full neighbour table, O(n²) work done in vectorized blocks"""
+    n = len(columns)
+    neighbours = np.full((n, width), -1, dtype=np.int32)
+    scores = np.full((n, width), -np.inf)
+    _fill_rows(columns, np.arange(n), neighbours, scores)
+    return NeighbourTable(version=columns.version, ids=columns.ids, neighbours=neighbours, scores=scores)
+
+
+def _attributes(columns: CatalogColumns, rows: np.ndarray) -> tuple:
+    return (
+        columns.price[rows],
+        columns.rating[rows],
+        np.asarray(columns.categories, dtype=object)[columns.category[rows]],
+        np.asarray(columns.brands, dtype=object)[columns.brand[rows]],
+        columns.is_trending[rows],
+        columns.is_bestseller[rows]
+    )
+
+
+def update_table(table: NeighbourTable, old: CatalogColumns, new: CatalogColumns) -> NeighbourTable:
+    """Derive the table for a new catalog version from the previous one.
+
+    Only rows whose own product changed, or whose list contained a changed
+    or removed product, are recomputed. Every other row keeps its list and
+    merges in the scores of changed and added products, which yields the
+    same result as a full rebuild.
+    """
+    width = table.width
+    n = len(new)
+
+    # Match surviving products between the two versions
+    shared_new = np.array([new.row_of[pid] for pid in old.ids if pid in new.row_of], dtype=np.intp)
+    shared_old = np.array([old.row_of[new.ids[r]] for r in shared_new], dtype=np.intp)
+    unchanged = np.ones(len(shared_new), dtype=bool)
+    for before, after in zip(_attributes(old, shared_old), _attributes(new, shared_new)):
+        unchanged &= before == after
+
+    old_to_new = np.full(len(old) + 1, -1, dtype=np.intp)
+    old_to_new[shared_old[unchanged]] = shared_new[unchanged]
+
+    dirty = np.ones(n, dtype=bool)
+    dirty[shared_new[unchanged]] = False
+    changed_rows = np.flatnonzero(dirty)
+    if len(changed_rows) > FULL_REBUILD_RATIO * n:
+        return build_table(new, width)
+
+    # Old lists are index-shifted to the new catalog; -1 maps to -1
+    remapped = old_to_new[table.neighbours]
+    lost = (table.neighbours >= 0) & (remapped < 0)
+
+    neighbours = np.full((n, width), -1, dtype=np.int32)
+    scores = np.full((n, width), -np.inf)
+    clean_old = shared_old[unchanged]
+    clean_new = shared_new[unchanged]
+    needs_rebuild = lost[clean_old].any(axis=1)
+
+    keep_old, keep_new = clean_old[~needs_rebuild], clean_new[~needs_rebuild]
+    neighbours[keep_new] = remapped[keep_old]
+    scores[keep_new] = table.scores[keep_old]
+
+    if len(changed_rows) and len(keep_new):
+        block = max(1, BLOCK_CELLS // (width + len(changed_rows)))
+        for start in range(0, len(keep_new), block):
+            rows = keep_new[start:start + block]
+            merged_rows = np.concatenate([neighbours[rows], np.broadcast_to(changed_rows, (len(rows), len(changed_rows)))], axis=1)
+            merged_scores = np.concatenate([scores[rows], pairwise_scores(new, rows, changed_rows)], axis=1)
+            merged_scores[merged_rows == rows[:, None]] = -np.inf
+            merged_scores[merged_rows < 0] = -np.inf
+
+            # Best score first, catalog order between equal scores
+            tie_break = np.where(merged_rows < 0, n, merged_rows)
+            order = np.lexsort((tie_break, -merged_scores), axis=-1)[:, :width]
+            picked = np.take_along_axis(merged_rows, order, axis=1)
+            picked_scores = np.take_along_axis(merged_scores, order, axis=1)
+            neighbours[rows] = np.where(np.isfinite(picked_scores), picked, -1)
+            scores[rows] = picked_scores
+
+    recompute = np.union1d(changed_rows, clean_new[needs_rebuild])
+    _fill_rows(new, recompute.astype(np.intp), neighbours, scores)
+    return NeighbourTable(version=new.version, ids=new.ids, neighbours=neighbours, scores=scores)
+
+
+class NeighbourIndex:
+    """Keeps the neighbour table in sync with the catalog in a background thread"""
+
+    def __init__(self, width: int = RECOMMENDATION_NEIGHBOURS):
+        self.width = width
+        self.table: Optional[NeighbourTable] = None
+        self._columns: Optional[CatalogColumns] = None
+        self._pending = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._stats = {"builds": 0, "updates": 0, "last_build_ms": 0.0}
+
+    def table_for(self, snapshot: CatalogSnapshot) -> Optional[NeighbourTable]:
+        """The table if it was built for this snapshot version"""
+        table = self.table
+        if table is not None and table.version == snapshot.version:
+            return table
+        return None
+
+    def install(self, table: NeighbourTable, columns: CatalogColumns):
+        """Adopt a prebuilt table; ``columns`` must describe the catalog it was built for"""
+        self.table, self._columns = table, columns
+        self._pending.set()
+
+    def start(self):
+        """Build the table in the background and follow catalog updates"""
+        if self.width <= 0 or self._worker is not None:
+            return
+        catalog_store.subscribe(lambda old, new: self._pending.set())
+        self._worker = threading.Thread(target=self._run, name="neighbour-table", daemon=True)
+        self._pending.set()
+        self._worker.start()
+
+    def refresh(self, snapshot: Optional[CatalogSnapshot] = None) -> NeighbourTable:
+        """Bring the table up to date with ``snapshot``, incrementally if possible"""
+        snapshot = snapshot or catalog_store.snapshot
+        columns = catalog_columns.get(snapshot)
+        started = time.perf_counter()
+
+        if self.table is not None and self._columns is not None and self.table.width == self.width:
+            if self.table.version == columns.version:
+                return self.table
+            table = update_table(self.table, self._columns, columns)
+            self._stats["updates"] += 1
+        else:
+            table = build_table(columns, self.width)
+            self._stats["builds"] += 1
+
+        self._stats["last_build_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        self.table, self._columns = table, columns
+        return table
+
+    def stats(self) -> Dict:
+        table = self.table
+        return {
+            **self._stats,
+            "version": table.version if table else None,
+            "products": len(table.ids) if table else 0,
+            "width": self.width
+        }
+
+    def _run(self):
+        while True:
+            self._pending.wait()
+            self._pending.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Neighbour table refresh error: {e}")
+
+
+# Singleton instance
+neighbour_index = NeighbourIndex()
@@ -1,5 +1,14 @@
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Tuple
 from apis.products_api import products_api
+from apis.catalog_columns import catalog_columns
+from apis.category_views import category_views
+from apis.similarity import batch_similarity_scores, similarity_scores, top_k
+from apis.neighbour_table import BLOCK_CELLS, neighbour_index
+from apis.cooccurrence import cooccurrence_engine
+from apis.embeddings import embedding_index
+from apis.model_artifacts import ArtifactBundle, model_artifacts
+from apis.diversity import diversify_products, mmr_rerank, pool_size
+from utils.session_interest import rerank
 import random
 
 
@@ -8,19 +17,130 @@ class RecommendationEngine:
     
     def __init__(self):
         self.products_api = products_api
+        self.cooccurrence = cooccurrence_engine
+        self.artifacts = model_artifacts
+    
+    def load_artifacts(self, build_id: Optional[str] = None) -> Optional[ArtifactBundle]:
+        """Install a prebuilt model build (default: the current one), if any"""
+        try:
+            return self.artifacts.load(build_id)
+        except Exception as e:
+            print(f"⚠️  Recommendation artifacts not loaded: {e}")
+            return None
     
     def get_related_products(
         self,
         product_ids: List[str],
         limit: int = 4,
-        strategy: str = "collaborative"
+        strategy: str = "collaborative",
+        diversity: float = 0.0
     ) -> List[Dict]:
-        """Get related products based on cart items"""
+        """Get related products based on cart items.
+        
+        ``diversity`` in [0, 1] trades relevance for variety (MMR re-ranking
+        of the top candidates); 0 keeps the pure relevance order.
+        """
         
         if not product_ids:
             return []
         
-        # Get cart products
+        profile = self._cart_profile(product_ids)
+        if profile is None:
+            return []
+        categories, brands, avg_price = profile
+        
+        snapshot = self.products_api.catalog.snapshot
+        columns = catalog_columns.get(snapshot)
+        cart_rows = columns.rows(product_ids)
+        
+        if strategy == "similar":
+            similar = self._get_similar_products(snapshot, columns, cart_rows, limit, categories, brands, diversity)
+            if similar is not None:
+                return similar
+        
+        table = neighbour_index.table_for(snapshot)
+        pool = pool_size(limit, diversity)
+        
+        if table is not None and cart_rows and pool <= table.width:
+            # Rescore only the merged neighbour lists of the cart items
+            rows = table.candidates(cart_rows)
+            scores = similarity_scores(columns, categories, brands, avg_price, rows=rows)
+            best = top_k(scores, pool)
+            top_rows, top_scores = rows[best], scores[best]
+        else:
+            # Score the whole catalog in one vectorized pass, excluding cart items
+            scores = similarity_scores(columns, categories, brands, avg_price)
+            top_rows = top_k(scores, pool, exclude=cart_rows)
+            top_scores = scores[top_rows]
+        
+        top_rows, top_scores = self._diversify(columns, top_rows, top_scores, limit, diversity)
+        return self._decorate(snapshot, top_rows, top_scores, categories, brands)
+    
+    def _diversify(self, columns, rows, scores, limit: int, diversity: float):
+        """Pick ``limit`` of the ranked candidates, MMR re-ranked when diversity > 0"""
+        picked = mmr_rerank(columns, rows, scores, limit, diversity)
+        return rows[picked], scores[picked]
+    
+    def rerank_for_session(self, recommendations: List[Dict], interest: Optional[Dict], limit: int) -> List[Dict]:
+        """Re-rank computed recommendations by the session's interest model, O(k)"""
+        return rerank(recommendations, interest, limit)
+    
+    def get_recommendations_batch(self, queries: List[Dict]) -> Iterator[List[Dict]]:
+        """Answer many recommendation queries, yielding results in request order.
+        
+        Each query is a dict with ``product_ids``, ``strategy``, ``limit`` and
+        optionally ``diversity``.
+        Related-product queries are scored together, one vectorized pass over
+        the catalog per block of carts; the other strategies go through their
+        single-query methods.
+        """
+        snapshot = self.products_api.catalog.snapshot
+        columns = catalog_columns.get(snapshot)
+        block = max(1, BLOCK_CELLS // max(len(columns), 1))
+        
+        for start in range(0, len(queries), block):
+            yield from self._batch_block(snapshot, columns, queries[start:start + block])
+    
+    def _batch_block(self, snapshot, columns, queries: List[Dict]) -> List[List[Dict]]:
+        results: List[Optional[List[Dict]]] = [None] * len(queries)
+        pending: List[Tuple[int, List[int], set, set, float]] = []
+        
+        for i, query in enumerate(queries):
+            product_ids, strategy, limit = query["product_ids"], query.get("strategy", "collaborative"), query.get("limit", 4)
+            diversity = query.get("diversity", 0.0)
+            
+            if strategy == "frequently-bought":
+                results[i] = self.get_frequently_bought_together(product_ids[0], limit, diversity) if product_ids else []
+                continue
+            if strategy == "complete-look":
+                results[i] = self.get_complete_the_look(product_ids, limit, diversity)
+                continue
+            
+            profile = self._cart_profile(product_ids)
+            if profile is None:
+                results[i] = []
+                continue
+            categories, brands, avg_price = profile
+            cart_rows = columns.rows(product_ids)
+            
+            if strategy == "similar":
+                results[i] = self._get_similar_products(snapshot, columns, cart_rows, limit, categories, brands, diversity)
+                if results[i] is not None:
+                    continue
+            pending.append((i, cart_rows, categories, brands, avg_price))
+        
+        if pending:
+            matrix = batch_similarity_scores(columns, [(c, b, p) for _, _, c, b, p in pending])
+            for scores, (i, cart_rows, categories, brands, _) in zip(matrix, pending):
+                limit, diversity = queries[i].get("limit", 4), queries[i].get("diversity", 0.0)
+                top_rows = top_k(scores, pool_size(limit, diversity), exclude=cart_rows)
+                top_rows, top_scores = self._diversify(columns, top_rows, scores[top_rows], limit, diversity)
+                results[i] = self._decorate(snapshot, top_rows, top_scores, categories, brands)
+        
+        return results
+    
+    def _cart_profile(self, product_ids: List[str]) -> Optional[Tuple[set, set, float]]:
+        """Categories, brands and average price of the known cart products"""
         cart_products = []
         for pid in product_ids:
             product = self.products_api.get_product_by_id(pid)
@@ -28,37 +148,20 @@ class RecommendationEngine:
                 cart_products.append(product)
         
         if not cart_products:
-            return []
+            return None
         
-        # Extract categories and brands from cart
         categories = set(p["category"] for p in cart_products)
         brands = set(p["brand"] for p in cart_products)
         avg_price = sum(p["price"] for p in cart_products) / len(cart_products)
-        
-        # Get all products
-        all_products = self.products_api.products
-        
-        # Filter out products already in cart
-        candidates = [p for p in all_products if p["id"] not in product_ids]
-        
-        # Score each candidate
-        scored_products = []
-        for product in candidates:
-            score = self._calculate_similarity_score(
-                product,
-                categories,
-                brands,
-                avg_price
-            )
-            scored_products.append((score, product))
-        
-        # Sort by score and return top N
-        scored_products.sort(reverse=True, key=lambda x: x[0])
-        
+        return categories, brands, avg_price
+    
+    def _decorate(self, snapshot, rows, scores, categories: set, brands: set) -> List[Dict]:
+        """Copy the chosen catalog rows and attach score and reason"""
         recommendations = []
-        for score, product in scored_products[:limit]:
+        for score, row in zip(scores, rows):
+            product = snapshot.products[int(row)]
             product_copy = product.copy()
-            product_copy["recommendation_score"] = round(score, 2)
+            product_copy["recommendation_score"] = round(float(score), 2)
             product_copy["recommendation_reason"] = self._get_recommendation_reason(
                 product, categories, brands
             )
@@ -66,6 +169,42 @@ class RecommendationEngine:
         
         return recommendations
     
+    def _get_similar_products(
+        self,
+        snapshot,
+        columns,
+        cart_rows: List[int],
+        limit: int,
+        cart_categories: set,
+        cart_brands: set,
+        diversity: float = 0.0
+    ) -> Optional[List[Dict]]:
+        """Nearest neighbours in embedding space; None until the index is built"""
+        index = embedding_index.index_for(snapshot)
+        if index is None:
+            return None
+        
+        query = index.query_vector(cart_rows)
+        if query is None:
+            return None
+        
+        rows, sims = index.search(query, pool_size(limit, diversity), exclude=cart_rows)
+        rows, sims = self._diversify(columns, rows, sims, limit, diversity)
+        recommendations = []
+        for row, sim in zip(rows, sims):
+            product = snapshot.products[int(row)]
+            product_copy = product.copy()
+            product_copy["recommendation_score"] = round(float(sim), 2)
+            product_copy["recommendation_reason"] = " • ".join(
+                ["Similar style"] + [
+                    r for r in self._get_recommendation_reason(product, cart_categories, cart_brands).split(" • ")
+                    if r != "Recommended for you"
+                ]
+            )
+            recommendations.append(product_copy)
+        
+        return recommendations
+    
     def _calculate_similarity_score(
         self,
         product: Dict,
@@ -73,7 +212,7 @@ class RecommendationEngine:
         cart_brands: set,
         avg_price: float
     ) -> float:
-        """Calculate similarity score for a product"""
+        """Calculate similarity score for a product (scalar reference for similarity_scores)"""
         score = 0.0
         
         # Same category bonus
@@ -129,7 +268,8 @@ class RecommendationEngine:
     def get_frequently_bought_together(
         self,
         product_id: str,
-        limit: int = 3
+        limit: int = 3,
+        diversity: float = 0.0
     ) -> List[Dict]:
         """Get products frequently bought together"""
         
@@ -137,7 +277,28 @@ class RecommendationEngine:
         if not product:
             return []
         
-        # Get complementary products based on category
+        if diversity > 0:
+            # Rank a larger pool the usual way, then re-rank it for variety
+            pool = self.get_frequently_bought_together(product_id, pool_size(limit, diversity))
+            relevance = [len(pool) - i for i in range(len(pool))]
+            columns = catalog_columns.get(self.products_api.catalog.snapshot)
+            return diversify_products(columns, pool, relevance, limit, diversity)
+        
+        # Real co-purchase data first
+        result = []
+        for partner_id, count in self.cooccurrence.top_pairs(product_id, limit):
+            partner = self.products_api.get_product_by_id(partner_id)
+            if partner:
+                p_copy = partner.copy()
+                p_copy["recommendation_reason"] = "Frequently bought together"
+                p_copy["co_purchase_score"] = round(count, 2)
+                result.append(p_copy)
+        
+        if len(result) >= limit:
+            return result
+        
+        # Not enough order history yet: fill with complementary categories
+        chosen = {p["id"] for p in result}
         complementary_map = {
             "jackets": ["sweaters", "shirts"],
             "shirts": ["jeans", "jackets"],
@@ -150,22 +311,22 @@ class RecommendationEngine:
             ["jackets", "shirts"]
         )
         
+        snapshot = self.products_api.catalog.snapshot
+        views = category_views.get(snapshot)
         candidates = []
         for cat in target_categories:
-            products = self.products_api.get_products(category=cat, limit=5)
-            candidates.extend(products)
+            candidates.extend(snapshot.products[int(row)] for row in views.top(cat, 5, "trending"))
         
         # Filter and score
         scored = []
         for p in candidates:
-            if p["id"] != product_id:
+            if p["id"] != product_id and p["id"] not in chosen:
                 score = p["rating"] + (0.5 if p.get("is_bestseller") else 0)
                 scored.append((score, p))
         
         scored.sort(reverse=True, key=lambda x: x[0])
         
-        result = []
-        for _, p in scored[:limit]:
+        for _, p in scored[:limit - len(result)]:
             p_copy = p.copy()
             p_copy["recommendation_reason"] = "Frequently bought together"
             result.append(p_copy)
@@ -175,7 +336,8 @@ class RecommendationEngine:
     def get_complete_the_look(
         self,
         product_ids: List[str],
-        limit: int = 3
+        limit: int = 3,
+        diversity: float = 0.0
     ) -> List[Dict]:
         """Get products to complete the look"""
         
@@ -196,21 +358,23 @@ class RecommendationEngine:
         
         if not missing_categories:
             # If outfit is complete, suggest accessories or alternatives
-            return self.get_related_products(product_ids, limit)
+            return self.get_related_products(product_ids, limit, diversity=diversity)
         
-        # Get products from missing categories
+        # Get the top-rated products of each missing category
+        snapshot = self.products_api.catalog.snapshot
+        views = category_views.get(snapshot)
+        per_category = 2 if diversity <= 0 else pool_size(limit, diversity)
         suggestions = []
-        for category in missing_categories:
-            products = self.products_api.get_products(
-                category=category,
-                sort="rating",
-                limit=2
-            )
-            for p in products:
-                p_copy = p.copy()
+        # Sorted: set order varies with per-process string hashing, and the ETag assumes one body per version
+        for category in sorted(missing_categories):
+            for row in views.top(category, per_category, "rating"):
+                p_copy = snapshot.products[int(row)].copy()
                 p_copy["recommendation_reason"] = f"Complete your look with {category}"
                 suggestions.append(p_copy)
         
+        if diversity > 0:
+            columns = catalog_columns.get(snapshot)
+            return diversify_products(columns, suggestions, [p["rating"] for p in suggestions], limit, diversity)
         return suggestions[:limit]
 
 
@@ -0,0 +1,604 @@
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+import asyncio
+import gc
+import heapq
+import os
+import time
+import uuid
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from apis.catalog_store import CatalogSnapshot, catalog_store
+from apis.inventory_store import WAREHOUSE, InventoryStore
+from apis.inventory_wal import INVENTORY_WAL_DIR, WriteAheadLog
+from utils.inventory_events import inventory_events
+from utils.redis_manager import redis_manager
+
+load_dotenv()
+
+# Seconds a hold keeps stock aside before it is returned automatically
+RESERVATION_HOLD_TTL = int(os.getenv("RESERVATION_HOLD_TTL", "600"))
+# Seconds between sweeps for expired holds
+RESERVATION_SWEEP_INTERVAL = float(os.getenv("RESERVATION_SWEEP_INTERVAL", "5"))
+
+# Expired holds returned per sweep call
+SWEEP_BATCH = 100
+
+# (product_id, location)
+StockKey = Tuple[str, str]
+
+
+class ReservationError(Exception):
+    """A hold could not be placed, committed or released"""
+
+
+class InsufficientStock(ReservationError):
+    def __init__(self, product_id: str, location: str, available: int, requested: int):
+        super().__init__(f"Only {max(available, 0)} units of {product_id} available at {location}")
+        self.product_id = product_id
+        self.location = location
+        self.available = max(available, 0)
+        self.requested = requested
+
+
+def stock_location(stock: Optional[Mapping], location: Optional[str]) -> str:
+    """Where a reservation draws from: the named store if it stocks the product, else the warehouse"""
+    if location and stock and location in stock["stores"]:
+        return location
+    return WAREHOUSE
+
+
+def on_hand(stock: Optional[Mapping], location: str) -> int:
+    """Quantity the catalog snapshot records for a product at a location"""
+    if not stock:
+        return 0
+    return int(stock["warehouse"] if location == WAREHOUSE else stock["stores"].get(location, 0))
+
+
+class MemoryLedger:
+    """Single-process ledger on top of the sharded in-memory inventory store.
+
+    Live counters are the store's per-SKU records, created from the
+    snapshot's on-hand stock the first time a SKU is touched. A hold locks
+    only the shards of its own products, so reservations on SKUs in other
+    shards proceed concurrently.
+
+    With a write-ahead log attached every mutation is logged in the same
+    event loop step that applies it, and holds, commits and releases are
+    acknowledged only once their record is on disk.
+    """
+
+    def __init__(self, store: Optional[InventoryStore] = None):
+        self.store = store or InventoryStore()
+        self.wal: Optional[WriteAheadLog] = None
+        self._holds: Dict[str, Dict] = {}
+        self._expiry: List[Tuple[float, str]] = []
+
+    def _log(self, record: Dict):
+        if self.wal is not None:
+            self.wal.append(record)
+
+    async def _durable(self):
+        if self.wal is not None:
+            await self.wal.sync()
+
+    def quantities(self, keys: Iterable[StockKey], seeds: Iterable[int]) -> List[int]:
+        return [self.store.quantity(product_id, location, seed) for (product_id, location), seed in zip(keys, seeds)]
+
+    async def reserve(
+        self,
+        hold_id: str,
+        lines: Dict[StockKey, Tuple[int, int]],
+        expires_at: float,
+        inventory: Mapping[str, Mapping]
+    ):
+        """Place a hold for ``{key: (quantity, on_hand)}``, all lines or none"""
+        async with self.store.locked({product_id for product_id, _ in lines}):
+            for (product_id, location), (quantity, seed) in lines.items():
+                available = self.store.quantity(product_id, location, seed)
+                if available < quantity:
+                    raise InsufficientStock(product_id, location, available, quantity)
+            # Records created here are logged with their seed so replay creates them identically
+            seeds = {}
+            for (product_id, location), (quantity, _) in lines.items():
+                record = self.store.get(product_id)
+                if record is None:
+                    record = self.store.seed(product_id, inventory.get(product_id))
+                    seeds[product_id] = record.to_stock()
+                record.adjust(location, -quantity)
+            self._holds[hold_id] = {"lines": {key: q for key, (q, _) in lines.items()}, "expires_at": expires_at}
+            heapq.heappush(self._expiry, (expires_at, hold_id))
+            self._log({
+                "op": "reserve",
+                "id": hold_id,
+                "lines": [[product_id, location, quantity] for (product_id, location), (quantity, _) in lines.items()],
+                "expires_at": expires_at,
+                "seeds": seeds
+            })
+        await self._durable()
+
+    async def commit(self, hold_id: str) -> bool:
+        # The stock stays deducted; only the hold record goes
+        if self._holds.pop(hold_id, None) is None:
+            return False
+        self._log({"op": "commit", "id": hold_id})
+        await self._durable()
+        return True
+
+    async def release(self, hold_id: str) -> Optional[Set[str]]:
+        """Return a hold's stock; the products it touched, or None if there was no hold"""
+        touched = await self._release(hold_id)
+        if touched is not None:
+            await self._durable()
+        return touched
+
+    async def _release(self, hold_id: str) -> Optional[Set[str]]:
+        hold = self._holds.get(hold_id)
+        if hold is None:
+            return None
+        touched = {product_id for product_id, _ in hold["lines"]}
+        async with self.store.locked(touched):
+            # Removed in the same step that returns its stock, so a snapshot never sees only half
+            if self._holds.pop(hold_id, None) is None:
+                return None
+            for (product_id, location), quantity in hold["lines"].items():
+                self.store.get(product_id).adjust(location, quantity)
+            self._log({"op": "release", "id": hold_id})
+        return touched
+
+    async def sweep(self, now: float) -> Tuple[int, Set[str]]:
+        expired, touched = 0, set()
+        while self._expiry and self._expiry[0][0] <= now and expired < SWEEP_BATCH:
+            expires_at, hold_id = heapq.heappop(self._expiry)
+            hold = self._holds.get(hold_id)
+            # Committed and released holds leave stale heap entries behind
+            if hold is not None and hold["expires_at"] == expires_at:
+                touched |= await self._release(hold_id) or set()
+                expired += 1
+        # One durability wait for the whole batch
+        if expired:
+            await self._durable()
+        return expired, touched
+
+    def rebase(self, changes: Dict[StockKey, int]):
+        """Apply restocks and corrections from a new snapshot to live counters.
+
+        Runs on the event loop thread without awaiting, so it can never land
+        between a hold's check and its decrement.
+        """
+        logged = []
+        for (product_id, location), quantity in changes.items():
+            if self.store.get(product_id) is not None:
+                self.store.rebase(product_id, location, quantity)
+                logged.append([product_id, location, quantity])
+        if logged:
+            self._log({"op": "rebase", "changes": logged})
+
+    def recover(self, wal: WriteAheadLog, inventory: Mapping[str, Mapping]) -> int:
+        """Rebuild counters and holds from ``wal`` and log every later mutation to it.
+
+        Stock the catalog received while the process was down is applied
+        afterwards like any other restock. Returns the records replayed.
+        """
+        self.store = InventoryStore(len(self.store.shards))
+        self._holds = {}
+        # Rebuilding holds allocates millions of small objects; collection passes would dominate
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            replayed = wal.recover(self._restore, self._apply)
+            self._expiry = [(hold["expires_at"], hold_id) for hold_id, hold in self._holds.items()]
+            heapq.heapify(self._expiry)
+        finally:
+            if collecting:
+                gc.enable()
+        self.wal = wal
+
+        changes = {}
+        for product_id, record in self.store.records():
+            stock = inventory.get(product_id)
+            for location in ([WAREHOUSE, *stock["stores"]] if stock else ()):
+                i = record.layout.position.get(location)
+                quantity = on_hand(stock, location)
+                if quantity != (record.on_hand[i] if i is not None else 0):
+                    changes[(product_id, location)] = quantity
+        if changes:
+            self.rebase(changes)
+        return replayed
+
+    def capture(self) -> Dict:
+        """Copy of the full ledger state for a snapshot"""
+        return {
+            "records": [
+                (product_id, record.layout.locations, record.available.tobytes(), record.on_hand.tobytes())
+                for product_id, record in self.store.records()
+            ],
+            "holds": [(hold_id, list(hold["lines"].items()), hold["expires_at"]) for hold_id, hold in self._holds.items()]
+        }
+
+    def _restore(self, state: Dict):
+        for product_id, locations, available, quantities in state["records"]:
+            self.store.restore(product_id, locations, available, quantities)
+        self._holds = {
+            hold_id: {"lines": dict(lines), "expires_at": expires_at}
+            for hold_id, lines, expires_at in state["holds"]
+        }
+
+    def _apply(self, record: Dict):
+        """Redo one logged mutation during recovery"""
+        op = record["op"]
+        if op == "reserve":
+            for product_id, stock in record["seeds"].items():
+                self.store.seed(product_id, stock)
+            lines = {}
+            for product_id, location, quantity in record["lines"]:
+                self.store.get(product_id).adjust(location, -quantity)
+                lines[(product_id, location)] = quantity
+            self._holds[record["id"]] = {"lines": lines, "expires_at": record["expires_at"]}
+        elif op == "release":
+            hold = self._holds.pop(record["id"], None)
+            for (product_id, location), quantity in (hold["lines"].items() if hold else ()):
+                self.store.get(product_id).adjust(location, quantity)
+        elif op == "commit":
+            self._holds.pop(record["id"], None)
+        elif op == "rebase":
+            for product_id, location, quantity in record["changes"]:
+                self.store.rebase(product_id, location, quantity)
+
+    def active_holds(self) -> int:
+        return len(self._holds)
+
+    def get_hold(self, hold_id: str) -> Optional[Dict]:
+        return self._holds.get(hold_id)
+
+
+# Hold hash fields: stock key -> quantity, "__product:" .. stock key -> product id, and "__expires_at".
+# Product ids are stored rather than parsed back out of keys, since locations may contain ':'.
+
+# KEYS: hold hash, expiry zset, then one stock key and one base key per line.
+# ARGV: hold id, expires_at, then quantity, on-hand seed and product id per line.
+_RESERVE_SCRIPT = """
+local lines = (#KEYS - 2) / 2
+for i = 1, lines do
+  local stock, base = KEYS[1 + 2 * i], KEYS[2 + 2 * i]
+  if redis.call('SET', stock, ARGV[1 + 3 * i], 'NX') then
+    redis.call('SET', base, ARGV[1 + 3 * i])
+  end
+  local available = tonumber(redis.call('GET', stock))
+  if available < tonumber(ARGV[3 * i]) then
+    return {i, available}
+  end
+end
+for i = 1, lines do
+  redis.call('DECRBY', KEYS[1 + 2 * i], ARGV[3 * i])
+  redis.call('HSET', KEYS[1], KEYS[1 + 2 * i], ARGV[3 * i], '__product:' .. KEYS[1 + 2 * i], ARGV[2 + 3 * i])
+end
+redis.call('HSET', KEYS[1], '__expires_at', ARGV[2])
+redis.call('ZADD', KEYS[2], ARGV[2], ARGV[1])
+return {0, 0}
+"""
+
+# Returns the stock of a hold's fields and appends the products it touched to ``restored``
+_RETURN_STOCK = """
+local function return_stock(fields, restored)
+  for i = 1, #fields, 2 do
+    local field = fields[i]
+    if string.sub(field, 1, 10) == '__product:' then
+      restored[#restored + 1] = fields[i + 1]
+    elseif string.sub(field, 1, 2) ~= '__' then
+      redis.call('INCRBY', field, fields[i + 1])
+    end
+  end
+end
+"""
+
+# KEYS: hold hash, expiry zset. ARGV: hold id, 1 to return the stock (release) or 0 (commit).
+# Returns 0 if there was no hold, else {1, product ids returned...}.
+_FINISH_SCRIPT = _RETURN_STOCK + """
+local fields = redis.call('HGETALL', KEYS[1])
+if #fields == 0 then
+  return 0
+end
+local restored = {1}
+if ARGV[2] == '1' then
+  return_stock(fields, restored)
+end
+redis.call('DEL', KEYS[1])
+redis.call('ZREM', KEYS[2], ARGV[1])
+return restored
+"""
+
+# KEYS: expiry zset. ARGV: now, batch size, hold key prefix.
+# Returns {expired holds, product ids returned...}.
+_SWEEP_SCRIPT = _RETURN_STOCK + """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[2]))
+local restored = {#expired}
+for _, hold_id in ipairs(expired) do
+  local hold = ARGV[3] .. hold_id
+  return_stock(redis.call('HGETALL', hold), restored)
+  redis.call('DEL', hold)
+  redis.call('ZREM', KEYS[1], hold_id)
+end
+return restored
+"""
+
+# KEYS: stock key, base key. ARGV: new on-hand quantity.
+_REBASE_SCRIPT = """
+local base = redis.call('GET', KEYS[2])
+if base then
+  redis.call('INCRBY', KEYS[1], tonumber(ARGV[1]) - tonumber(base))
+  redis.call('SET', KEYS[2], ARGV[1])
+end
+return 0
+"""
+
+
+class RedisLedger:
+    """Ledger shared by every worker; each operation is one atomic Lua script.
+
+    The client is synchronous, so coroutines run their round trips in the
+    threadpool and never block the event loop while Redis answers.
+    """
+
+    EXPIRY_KEY = "reservations:expiry"
+    HOLD_PREFIX = "reservation:"
+
+    def __init__(self, client):
+        self.client = client
+        self._reserve = client.register_script(_RESERVE_SCRIPT)
+        self._finish = client.register_script(_FINISH_SCRIPT)
+        self._sweep = client.register_script(_SWEEP_SCRIPT)
+        self._rebase = client.register_script(_REBASE_SCRIPT)
+
+    @staticmethod
+    def _stock_key(key: StockKey) -> str:
+        return f"stock:{key[0]}:{key[1]}"
+
+    @staticmethod
+    def _base_key(key: StockKey) -> str:
+        return f"stock_base:{key[0]}:{key[1]}"
+
+    def quantities(self, keys: Iterable[StockKey], seeds: Iterable[int]) -> List[int]:
+        keys = list(keys)
+        if not keys:
+            return []
+        values = self.client.mget([self._stock_key(key) for key in keys])
+        return [int(value) if value is not None else seed for value, seed in zip(values, seeds)]
+
+    async def reserve(
+        self,
+        hold_id: str,
+        lines: Dict[StockKey, Tuple[int, int]],
+        expires_at: float,
+        inventory: Mapping[str, Mapping]
+    ):
+        keys = [self.HOLD_PREFIX + hold_id, self.EXPIRY_KEY]
+        args = [hold_id, expires_at]
+        ordered = list(lines.items())
+        for key, (quantity, seed) in ordered:
+            keys += [self._stock_key(key), self._base_key(key)]
+            args += [quantity, seed, key[0]]
+        failed, available = await run_in_threadpool(self._reserve, keys=keys, args=args)
+        if failed:
+            key, (quantity, _) = ordered[failed - 1]
+            raise InsufficientStock(key[0], key[1], int(available), quantity)
+
+    async def _finish_hold(self, hold_id: str, release: bool) -> Optional[Set[str]]:
+        keys = [self.HOLD_PREFIX + hold_id, self.EXPIRY_KEY]
+        result = await run_in_threadpool(self._finish, keys=keys, args=[hold_id, 1 if release else 0])
+        return set(result[1:]) if result else None
+
+    async def commit(self, hold_id: str) -> bool:
+        return await self._finish_hold(hold_id, release=False) is not None
+
+    async def release(self, hold_id: str) -> Optional[Set[str]]:
+        return await self._finish_hold(hold_id, release=True)
+
+    async def sweep(self, now: float) -> Tuple[int, Set[str]]:
+        result = await run_in_threadpool(self._sweep, keys=[self.EXPIRY_KEY], args=[now, SWEEP_BATCH, self.HOLD_PREFIX])
+        return int(result[0]), set(result[1:])
+
+    def rebase(self, changes: Dict[StockKey, int]):
+        pipe = self.client.pipeline(transaction=False)
+        for key, quantity in changes.items():
+            self._rebase(keys=[self._stock_key(key), self._base_key(key)], args=[quantity], client=pipe)
+        pipe.execute()
+
+    def active_holds(self) -> int:
+        return int(self.client.zcard(self.EXPIRY_KEY))
+
+    def get_hold(self, hold_id: str) -> Optional[Dict]:
+        fields = self.client.hgetall(self.HOLD_PREFIX + hold_id)
+        return {"expires_at": float(fields["__expires_at"])} if fields else None
+
+
+class ReservationLedger:
+    """Atomic stock holds on top of the catalog snapshot.
+
+    The snapshot's stock records are the on-hand quantities; the ledger
+    keeps live counters per (product, location) that holds decrement
+    immediately. A hold is committed when payment succeeds (the stock stays
+    deducted), released when it fails, and returned automatically once its
+    TTL passes. Catalog refreshes shift live counters by the change in
+    on-hand stock, so restocks show up without losing open holds. Every
+    change to a live counter is announced on the inventory event feed.
+    """
+
+    def __init__(self):
+        self.backend = RedisLedger(redis_manager.client) if redis_manager.use_redis else MemoryLedger()
+        self.hold_ttl = RESERVATION_HOLD_TTL
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._sweeper: Optional[asyncio.Task] = None
+        self._stats = {"reserved": 0, "rejected": 0, "committed": 0, "released": 0, "expired": 0}
+        catalog_store.subscribe(self._on_catalog_change)
+
+    @property
+    def remote(self) -> bool:
+        """Whether live stock reads are Redis round trips, to be kept off the event loop"""
+        return isinstance(self.backend, RedisLedger)
+
+    def available(self, product_id: str, snapshot: Optional[CatalogSnapshot] = None) -> Optional[Dict]:
+        """Live stock record of a product: on-hand quantities minus holds and sales"""
+        return self.available_many([product_id], snapshot)[product_id]
+
+    def available_many(
+        self,
+        product_ids: Iterable[str],
+        snapshot: Optional[CatalogSnapshot] = None
+    ) -> Dict[str, Optional[Dict]]:
+        """Live stock records of many products, read from the backend in one round trip"""
+        snapshot = snapshot or catalog_store.snapshot
+        records = {product_id: snapshot.inventory.get(product_id) for product_id in product_ids}
+        keys, seeds = [], []
+        for product_id, stock in records.items():
+            for location in ([WAREHOUSE, *stock["stores"]] if stock else ()):
+                keys.append((product_id, location))
+                seeds.append(on_hand(stock, location))
+
+        live = {product_id: {"warehouse": 0, "stores": {}} for product_id, stock in records.items() if stock}
+        for (product_id, location), quantity in zip(keys, self.backend.quantities(keys, seeds)):
+            if location == WAREHOUSE:
+                live[product_id]["warehouse"] = max(quantity, 0)
+            else:
+                live[product_id]["stores"][location] = max(quantity, 0)
+        return {product_id: live.get(product_id) for product_id in records}
+
+    async def reserve(
+        self,
+        items: Iterable[Tuple[str, int]],
+        location: Optional[str] = None,
+        ttl: Optional[int] = None
+    ) -> Dict:
+        """Hold ``quantity`` of every ``(product_id, quantity)`` item, all or none"""
+        snapshot = catalog_store.snapshot
+        lines: Dict[StockKey, Tuple[int, int]] = {}
+        for product_id, quantity in items:
+            if quantity <= 0:
+                raise ReservationError(f"Invalid quantity {quantity} for {product_id}")
+            stock = snapshot.inventory.get(product_id)
+            if not stock:
+                raise ReservationError(f"Product {product_id} not found")
+            key = (product_id, stock_location(stock, location))
+            held = lines.get(key, (0, 0))[0]
+            lines[key] = (held + quantity, on_hand(stock, key[1]))
+        if not lines:
+            raise ReservationError("Nothing to reserve")
+
+        ttl = ttl or self.hold_ttl
+        hold_id = f"RES_{uuid.uuid4().hex[:16].upper()}"
+        expires_at = time.time() + ttl
+        try:
+            await self.backend.reserve(hold_id, lines, expires_at, snapshot.inventory)
+        except InsufficientStock:
+            self._stats["rejected"] += 1
+            raise
+        self._stats["reserved"] += 1
+        inventory_events.publish({product_id for product_id, _ in lines}, "reserve")
+        return {
+            "reservation_id": hold_id,
+            "items": [
+                {"product_id": pid, "location": loc, "quantity": quantity}
+                for (pid, loc), (quantity, _) in lines.items()
+            ],
+            "expires_at": expires_at,
+            "ttl": ttl
+        }
+
+    async def commit(self, hold_id: str):
+        """Turn a hold into a sale once payment succeeded"""
+        if not await self.backend.commit(hold_id):
+            raise ReservationError(f"Reservation {hold_id} not found or expired")
+        self._stats["committed"] += 1
+
+    async def release(self, hold_id: str) -> bool:
+        """Return a hold's stock; False if it was already committed, released or expired"""
+        touched = await self.backend.release(hold_id)
+        if touched is None:
+            return False
+        self._stats["released"] += 1
+        inventory_events.publish(touched, "release")
+        return True
+
+    def get_hold(self, hold_id: str) -> Optional[Dict]:
+        return self.backend.get_hold(hold_id)
+
+    async def sweep(self) -> int:
+        expired, touched = await self.backend.sweep(time.time())
+        self._stats["expired"] += expired
+        if touched:
+            inventory_events.publish(touched, "expire")
+        return expired
+
+    def start(self, interval: float = RESERVATION_SWEEP_INTERVAL):
+        """Recover persisted counters and sweep expired holds on the running event loop"""
+        self._loop = asyncio.get_running_loop()
+        if isinstance(self.backend, MemoryLedger) and INVENTORY_WAL_DIR and self.backend.wal is None:
+            wal = WriteAheadLog(INVENTORY_WAL_DIR)
+            replayed = self.backend.recover(wal, catalog_store.snapshot.inventory)
+            wal.start(self.backend.capture)
+            print(f"✓ Recovered {self.backend.active_holds()} stock holds from {INVENTORY_WAL_DIR} "
+                  f"({replayed} log records in {wal.stats()['recovery_ms']} ms)")
+        if interval > 0 and self._sweeper is None:
+            self._sweeper = self._loop.create_task(self._sweep_loop(interval))
+
+    def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        if isinstance(self.backend, MemoryLedger) and self.backend.wal is not None:
+            self.backend.wal.stop()
+            self.backend.wal = None
+
+    async def _sweep_loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                while await self.sweep() >= SWEEP_BATCH:
+                    pass
+            except Exception as e:
+                print(f"Reservation sweep error: {e}")
+
+    def _on_catalog_change(self, old: CatalogSnapshot, new: CatalogSnapshot):
+        if old.inventory_version == new.inventory_version:
+            return
+        changes = {}
+        # Products whose stock record changed shape (removed, or stores dropped) without a counter to shift
+        touched = set(old.inventory.keys() - new.inventory.keys())
+        for product_id, stock in new.inventory.items():
+            previous = old.inventory.get(product_id)
+            for location in [WAREHOUSE, *stock["stores"]]:
+                quantity = on_hand(stock, location)
+                if quantity != on_hand(previous, location):
+                    changes[(product_id, location)] = quantity
+            if previous and previous["stores"].keys() - stock["stores"].keys():
+                touched.add(product_id)
+        if not changes and not touched:
+            return
+        # Redis applies each shift atomically: do the round trips here on the catalog thread
+        if self.remote:
+            self._rebase(changes, touched)
+        # In-memory counters belong to the event loop; refreshes arrive on the catalog thread
+        elif self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._rebase, changes, touched)
+        else:
+            self._rebase(changes, touched)
+
+    def _rebase(self, changes: Dict[StockKey, int], touched: Set[str]):
+        if changes:
+            self.backend.rebase(changes)
+        inventory_events.publish(touched | {product_id for product_id, _ in changes}, "restock")
+
+    def stats(self) -> Dict:
+        return {
+            "backend": "redis" if isinstance(self.backend, RedisLedger) else "memory",
+            "active_holds": self.backend.active_holds(),
+            "hold_ttl": self.hold_ttl,
+            **self._stats,
+            **({"store": self.backend.store.stats()} if isinstance(self.backend, MemoryLedger) else {}),
+            **({"wal": self.backend.wal.stats()} if getattr(self.backend, "wal", None) is not None else {})
+        }
+
+
+# Singleton instance
+reservation_ledger = ReservationLedger()
@@ -0,0 +1,105 @@
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from apis.catalog_columns import CatalogColumns
+
+
+def _combine(columns: CatalogColumns, rows, category_match, brand_match, avg_price) -> np.ndarray:
+    """Shared term-by-term sum of the similarity score"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price_diff = np.abs(columns.price[rows] - avg_price) / avg_price
+
+    score = np.where(category_match, 0.4, 0.0)
+    score += np.where(brand_match, 0.2, 0.0)
+    score += np.where(price_diff < 0.5, 0.2 * (1 - price_diff), 0.0)
+    score += columns.rating[rows] * 0.05
+    score += np.where(columns.is_trending[rows], 0.1, 0.0)
+    score += np.where(columns.is_bestseller[rows], 0.1, 0.0)
+    return score
+
+
+def similarity_scores(
+    columns: CatalogColumns,
+    cart_categories: Iterable[str],
+    cart_brands: Iterable[str],
+    avg_price: float,
+    rows: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Vectorized RecommendationEngine._calculate_similarity_score.
+
+    Scores every catalog row, or only ``rows`` when given. Terms are added
+    in the same order as the scalar version and every skipped bonus becomes
+    ``+ 0.0``, so each score is bit-identical to the per-product loop.
+    """
+    rows = slice(None) if rows is None else rows
+    category_match = np.isin(columns.category[rows], columns.category_codes(cart_categories))
+    brand_match = np.isin(columns.brand[rows], columns.brand_codes(cart_brands))
+    return _combine(columns, rows, category_match, brand_match, avg_price)
+
+
+def batch_similarity_scores(
+    columns: CatalogColumns,
+    carts: Sequence[Tuple[Iterable[str], Iterable[str], float]]
+) -> np.ndarray:
+    """similarity_scores for many carts at once: one row per cart.
+
+    Each cart is a ``(categories, brands, avg_price)`` triple. Category and
+    brand membership become boolean lookup tables indexed by the catalog's
+    code columns, so the whole batch is scored without a Python loop over
+    products, and row ``i`` is bit-identical to scoring cart ``i`` alone.
+    """
+    category_mask = np.zeros((len(carts), len(columns.categories)), dtype=bool)
+    brand_mask = np.zeros((len(carts), len(columns.brands)), dtype=bool)
+    avg_price = np.empty((len(carts), 1))
+    for i, (categories, brands, price) in enumerate(carts):
+        category_mask[i, columns.category_codes(categories)] = True
+        brand_mask[i, columns.brand_codes(brands)] = True
+        avg_price[i, 0] = price
+
+    category_match = category_mask[:, columns.category]
+    brand_match = brand_mask[:, columns.brand]
+    return _combine(columns, slice(None), category_match, brand_match, avg_price)
+
+
+def pairwise_scores(
+    columns: CatalogColumns,
+    sources: np.ndarray,
+    candidates: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """Score matrix for single-product carts: one row per source product.
+
+    Entry ``[i, j]`` equals the score of candidate ``j`` for a cart holding
+    only ``sources[i]``, exactly as similarity_scores would compute it.
+    """
+    candidates = slice(None) if candidates is None else candidates
+    category_match = columns.category[sources][:, None] == columns.category[candidates][None, :]
+    brand_match = columns.brand[sources][:, None] == columns.brand[candidates][None, :]
+    avg_price = columns.price[sources][:, None]
+    return _combine(columns, candidates, category_match, brand_match, avg_price)
+
+
+def top_k(scores: np.ndarray, k: int, exclude: Iterable[int] = ()) -> np.ndarray:
+    """Row numbers of the k best scores, highest first.
+
+    Equal scores keep catalog order, matching a stable descending sort.
+    Only the candidates at or above the k-th score are fully sorted.
+    """
+    scores = scores.astype(np.float64, copy=True)
+    exclude = list(exclude)
+    if exclude:
+        scores[exclude] = -np.inf
+
+    valid = int(np.count_nonzero(scores > -np.inf))
+    k = min(k, valid)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    if k < len(scores):
+        threshold = scores[np.argpartition(-scores, k - 1)[:k]].min()
+        candidates = np.flatnonzero(scores >= threshold)
+    else:
+        candidates = np.flatnonzero(scores > -np.inf)
+
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order[:k]]
@@ -0,0 +1,258 @@
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+import heapq
+import json
+import os
+
+import numpy as np
+from dotenv import load_dotenv
+
+from models.seed_data import CITY_COORDINATES, MOCK_STORES
+
+load_dotenv()
+
+# JSON list of stores replacing the seed network (empty uses the seed stores)
+STORE_REGISTRY_PATH = os.getenv("STORE_REGISTRY_PATH", "")
+
+EARTH_RADIUS_KM = 6371.0088
+# Stores per k-d tree leaf; leaves are scanned with one vectorized distance computation
+LEAF_SIZE = 16
+# Stocked stores at or below this count are ranked directly instead of searching the tree
+DIRECT_SCAN_LIMIT = 64
+
+
+@dataclass(frozen=True)
+class Store:
+    id: str
+    name: str
+    address: str
+    city: str
+    latitude: float
+    longitude: float
+    hours: str
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Points on the unit sphere; chord length ranks exactly like great-circle distance"""
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to many, in kilometres"""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class KDTree:
+    """Static k-d tree over 3-D unit vectors.
+
+    Working on the sphere's embedding instead of raw latitude/longitude
+    keeps the search exact across the antimeridian and near the poles.
+    Nodes live in flat lists; leaves are contiguous slices of ``order``.
+    """
+
+    def __init__(self, points: np.ndarray):
+        self.points = points
+        self.order = np.arange(len(points))
+        self._axis: List[int] = []
+        self._split: List[float] = []
+        # Children for internal nodes, order[start:end] bounds for leaves
+        self._lo: List[int] = []
+        self._hi: List[int] = []
+        if len(points):
+            self._build(0, len(points))
+
+    def _build(self, start: int, end: int) -> int:
+        node = len(self._axis)
+        self._axis.append(-1)
+        self._split.append(0.0)
+        self._lo.append(start)
+        self._hi.append(end)
+        if end - start <= LEAF_SIZE:
+            return node
+
+        rows = self.order[start:end]
+        coords = self.points[rows]
+        axis = int(np.argmax(coords.max(axis=0) - coords.min(axis=0)))
+        mid = (end - start) // 2
+        self.order[start:end] = rows[np.argpartition(coords[:, axis], mid)]
+        self._axis[node] = axis
+        self._split[node] = float(self.points[self.order[start + mid], axis])
+        self._lo[node] = self._build(start, start + mid)
+        self._hi[node] = self._build(start + mid, end)
+        return node
+
+    def query(self, point: np.ndarray, k: int, accept: Optional[np.ndarray] = None) -> List[int]:
+        """Rows of the k nearest points, nearest first; ``accept`` masks out rows"""
+        if not len(self.points) or k <= 0:
+            return []
+        heap: List[Tuple[float, int]] = []
+        self._search(0, point, k, accept, heap)
+        return [row for _, row in sorted((-d, row) for d, row in heap)]
+
+    def _search(self, node: int, point: np.ndarray, k: int, accept: Optional[np.ndarray], heap: List):
+        axis = self._axis[node]
+        if axis < 0:
+            rows = self.order[self._lo[node]:self._hi[node]]
+            if accept is not None:
+                rows = rows[accept[rows]]
+            if not len(rows):
+                return
+            distances = ((self.points[rows] - point) ** 2).sum(axis=1)
+            for distance, row in zip(distances.tolist(), rows.tolist()):
+                if len(heap) < k:
+                    heapq.heappush(heap, (-distance, row))
+                elif distance < -heap[0][0]:
+                    heapq.heapreplace(heap, (-distance, row))
+            return
+
+        gap = point[axis] - self._split[node]
+        near, far = (self._hi[node], self._lo[node]) if gap >= 0 else (self._lo[node], self._hi[node])
+        self._search(near, point, k, accept, heap)
+        # The far side can only help if the splitting plane is closer than the current k-th best
+        if len(heap) < k or gap * gap < -heap[0][0]:
+            self._search(far, point, k, accept, heap)
+
+
+class _Network(NamedTuple):
+    stores: Tuple[Store, ...]
+    row_of: Dict[str, int]
+    latitude: np.ndarray
+    longitude: np.ndarray
+    tree: KDTree
+    cities: Dict[str, Tuple[float, float]]
+
+
+def _load_stores() -> List[Mapping]:
+    if STORE_REGISTRY_PATH:
+        try:
+            with open(STORE_REGISTRY_PATH) as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️  Store registry unreadable, using seed stores: {e}")
+    return MOCK_STORES
+
+
+def _build_network(rows: Iterable[Mapping]) -> _Network:
+    stores = tuple(
+        Store(
+            id=str(r["id"]), name=r["name"], address=r.get("address", ""), city=r.get("city", ""),
+            latitude=float(r["latitude"]), longitude=float(r["longitude"]), hours=r.get("hours", "")
+        )
+        for r in rows
+    )
+    latitude = np.array([s.latitude for s in stores], dtype=np.float64)
+    longitude = np.array([s.longitude for s in stores], dtype=np.float64)
+
+    # Known city centres win; other cities fall back to their first store
+    cities = {}
+    for store in stores:
+        if store.city:
+            cities.setdefault(store.city.lower(), (store.latitude, store.longitude))
+    cities.update({city.lower(): point for city, point in CITY_COORDINATES.items()})
+
+    return _Network(
+        stores=stores,
+        row_of={store.id: row for row, store in enumerate(stores)},
+        latitude=latitude,
+        longitude=longitude,
+        tree=KDTree(unit_vectors(latitude, longitude) if stores else np.empty((0, 3))),
+        cities=cities
+    )
+
+
+class StoreRegistry:
+    """Store network with a spatial index for nearest-store queries.
+
+    Stores, coordinate arrays and the k-d tree are built together and
+    swapped as one immutable tuple, so readers never see a half-built
+    index. Queries touch O(log n + k) tree leaves, and a product's
+    stocked stores are ranked directly when there are only a few.
+    """
+
+    def __init__(self, stores: Optional[Iterable[Mapping]] = None):
+        self._network = _build_network(_load_stores() if stores is None else stores)
+
+    def load(self, stores: Iterable[Mapping]):
+        """Replace the store network"""
+        self._network = _build_network(stores)
+
+    def __len__(self) -> int:
+        return len(self._network.stores)
+
+    def get(self, store_id: str) -> Optional[Store]:
+        network = self._network
+        row = network.row_of.get(store_id)
+        return network.stores[row] if row is not None else None
+
+    def stores(self, limit: Optional[int] = None) -> List[Store]:
+        return list(self._network.stores[:limit])
+
+    def resolve(self, location: str) -> Optional[Tuple[float, float]]:
+        """Coordinates for a "lat,lon" string, a store id or a city name"""
+        location = (location or "").strip()
+        if not location:
+            return None
+        parts = location.split(",")
+        if len(parts) == 2:
+            try:
+                lat, lon = float(parts[0]), float(parts[1])
+            except ValueError:
+                pass
+            else:
+                return (lat, lon) if -90 <= lat <= 90 and -180 <= lon <= 180 else None
+
+        store = self.get(location)
+        if store is not None:
+            return store.latitude, store.longitude
+        return self._network.cities.get(location.lower())
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int = 3,
+        stock: Optional[Mapping[str, int]] = None,
+        min_quantity: int = 1,
+        max_distance_km: Optional[float] = None
+    ) -> List[Dict]:
+        """The k closest stores, optionally only those holding ``min_quantity`` per ``stock``"""
+        network = self._network
+        if stock is None:
+            rows = network.tree.query(unit_vectors(latitude, longitude)[0], k)
+        else:
+            stocked = [
+                network.row_of[store_id] for store_id, quantity in stock.items()
+                if quantity >= min_quantity and store_id in network.row_of
+            ]
+            if len(stocked) <= DIRECT_SCAN_LIMIT:
+                stocked = np.array(stocked, dtype=np.intp)
+                distances = haversine_km(latitude, longitude, network.latitude[stocked], network.longitude[stocked])
+                rows = stocked[np.argsort(distances, kind="stable")[:k]].tolist()
+            else:
+                accept = np.zeros(len(network.stores), dtype=bool)
+                accept[stocked] = True
+                rows = network.tree.query(unit_vectors(latitude, longitude)[0], k, accept)
+
+        rows = np.array(rows, dtype=np.intp)
+        distances = haversine_km(latitude, longitude, network.latitude[rows], network.longitude[rows])
+        results = []
+        for row, distance in zip(rows.tolist(), distances.tolist()):
+            if max_distance_km is not None and distance > max_distance_km:
+                break
+            store = network.stores[row]
+            result = {**store.to_dict(), "distance_km": round(distance, 2), "distance": f"{distance:.1f} km"}
+            if stock is not None:
+                result["stock"] = stock.get(store.id, 0)
+            results.append(result)
+        return results
+
+
+# Singleton instance
+store_registry = StoreRegistry()
@@ -0,0 +1,69 @@
+"""Benchmark embedding build, IVF index build and ANN query latency.
+
+Usage (from backend/):
+    python -m benchmarks.bench_embeddings --sizes 10000 100000
+"""
+from typing import Dict, List
+import argparse
+import json
+import time
+
+import numpy as np
+
+from apis.embeddings import build_ivf, embed_products
+from benchmarks.synthetic import synthetic_products
+
+
+def run(sizes: List[int], queries: int, k: int, nprobe: int) -> List[Dict]:
+    results = []
+    for n in sizes:
+        products = synthetic_products(n)
+
+        started = time.perf_counter()
+        embeddings = embed_products(products)
+        embed_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        index = build_ivf(embeddings)
+        index_s = time.perf_counter() - started
+
+        rows = np.random.default_rng(0).choice(n, size=min(queries, n), replace=False)
+        latencies, recall = [], []
+        for row in rows:
+            started = time.perf_counter()
+            found, _ = index.search(embeddings[row], k, exclude=[row], nprobe=nprobe)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+            # Exact neighbours by brute force, for recall@k
+            sims = embeddings @ embeddings[row]
+            sims[row] = -np.inf
+            exact = np.argpartition(-sims, k)[:k]
+            recall.append(len(set(found) & set(exact)) / k)
+
+        row = {
+            "skus": n,
+            "embed_s": round(embed_s, 2),
+            "index_s": round(index_s, 2),
+            "clusters": len(index.centroids),
+            "query_p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "query_p99_ms": round(float(np.percentile(latencies, 99)), 3),
+            f"recall@{k}": round(float(np.mean(recall)), 3)
+        }
+        results.append(row)
+        print(json.dumps(row))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.queries, args.k, args.nprobe)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,225 @@
+"""Benchmark latency, throughput, memory and offline quality of every recommendation strategy.
+
+Generates a synthetic catalog and order history, trains the co-occurrence
+counts, neighbour table, embedding index and customer profiles on the older
+orders, then replays the newest (held-out) orders: the first product of
+each order is the query and the rest are the items the customer actually
+bought. Reports p50/p95/p99 latency, sequential throughput, per-call
+allocation peak, recall@k, hit rate and catalog coverage.
+
+Usage (from backend/):
+    python -m benchmarks.bench_recommendations --skus 10000 --orders 50000 --output recs.json
+"""
+from collections import defaultdict
+from typing import Callable, Dict, List
+import argparse
+import json
+import os
+import platform
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+
+from apis.catalog_columns import catalog_columns
+from apis.catalog_store import build_snapshot, catalog_store
+from apis.cooccurrence import CooccurrenceEngine
+from apis.customer_profiles import build_profile, customer_profiles
+from apis.embeddings import embedding_index
+from apis.neighbour_table import neighbour_index
+from apis.products_api import products_api
+from apis.recommendation_engine import recommendation_engine
+from benchmarks.synthetic import products_from_columns, synthetic_columns, synthetic_orders
+
+STRATEGIES = (
+    "related", "related-full-scan", "related-diverse", "similar",
+    "frequently-bought", "complete-look", "personalized"
+)
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return round(float(np.percentile(samples, q)), 4) if samples else 0.0
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if platform.system() == "Darwin" else 1024
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2 ** 20, 1)
+
+
+def timed(fn: Callable, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return round(time.perf_counter() - started, 3)
+
+
+def setup(args) -> Dict:
+    """Publish the synthetic catalog and train every model on the training orders"""
+    columns = synthetic_columns(args.skus, seed=args.seed)
+    snapshot = build_snapshot(products_from_columns(columns), {}, source="synthetic")
+    catalog_store.publish(snapshot)
+    columns = catalog_columns.get(snapshot)
+
+    orders = synthetic_orders(columns, args.orders, customers=args.customers, seed=args.seed + 1)
+    split = int(len(orders) * (1 - args.holdout))
+    train, held_out = orders[:split], orders[split:]
+    now = time.time()
+
+    report = {"train_orders": len(train), "held_out_orders": len(held_out)}
+
+    engine = CooccurrenceEngine(snapshot_path="")
+    report["cooccurrence_s"] = timed(
+        lambda: [engine.record_order(o["product_ids"], now + o["offset_s"]) for o in train]
+    )
+    recommendation_engine.cooccurrence = engine
+
+    history = defaultdict(list)
+    for order in train:
+        history[order["customer_id"]].append({"items": [{"product_id": pid} for pid in order["product_ids"]]})
+    started = time.perf_counter()
+    customer_profiles._store({
+        cid: build_profile(cid, None, None, purchases, columns) for cid, purchases in history.items()
+    })
+    report["profiles_s"] = round(time.perf_counter() - started, 3)
+
+    if args.skus <= args.neighbour_max:
+        report["neighbour_table_s"] = timed(neighbour_index.refresh, snapshot)
+        report["neighbour_table_mb"] = round((neighbour_index.table.neighbours.nbytes + neighbour_index.table.scores.nbytes) / 2 ** 20, 1)
+    if not args.no_embeddings:
+        report["embeddings_s"] = timed(embedding_index.refresh, snapshot)
+        index = embedding_index.index
+        report["embeddings_mb"] = round((index.embeddings.nbytes + index.vectors.nbytes) / 2 ** 20, 1)
+
+    report["rss_after_setup_mb"] = peak_rss_mb()
+    return {"report": report, "held_out": held_out, "columns": columns}
+
+
+def strategy_call(name: str, k: int) -> Callable[[Dict], List[Dict]]:
+    engine = recommendation_engine
+    if name == "related":
+        return lambda o: engine.get_related_products(o["product_ids"][:1], k)
+    if name == "related-full-scan":
+        def call(o):
+            table, neighbour_index.table = neighbour_index.table, None
+            try:
+                return engine.get_related_products(o["product_ids"][:1], k)
+            finally:
+                neighbour_index.table = table
+        return call
+    if name == "related-diverse":
+        return lambda o: engine.get_related_products(o["product_ids"][:1], k, diversity=0.5)
+    if name == "similar":
+        return lambda o: engine.get_related_products(o["product_ids"][:1], k, strategy="similar")
+    if name == "frequently-bought":
+        return lambda o: engine.get_frequently_bought_together(o["product_ids"][0], k)
+    if name == "complete-look":
+        return lambda o: engine.get_complete_the_look(o["product_ids"][:1], k)
+    if name == "personalized":
+        return lambda o: products_api.get_recommendations(customer_id=o["customer_id"], limit=k)
+    raise ValueError(f"unknown strategy {name}")
+
+
+def evaluate(name: str, queries: List[Dict], n_products: int, k: int, warmup: int, alloc_sample: int) -> Dict:
+    call = strategy_call(name, k)
+    # Personalized ranking is judged on the whole order, the others on the companions of the query item
+    targets = [
+        set(o["product_ids"]) if name == "personalized" else set(o["product_ids"][1:])
+        for o in queries
+    ]
+
+    for query in queries[:warmup]:
+        call(query)
+
+    latencies, results = [], []
+    started = time.perf_counter()
+    for query in queries:
+        t0 = time.perf_counter()
+        results.append(call(query))
+        latencies.append((time.perf_counter() - t0) * 1000)
+    total_s = time.perf_counter() - started
+
+    tracemalloc.start()
+    peaks = []
+    for query in queries[:alloc_sample]:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        call(query)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    recalls, hits, recommended = [], 0, set()
+    for result, wanted in zip(results, targets):
+        ids = {p["id"] for p in result[:k]}
+        recommended |= ids
+        if wanted:
+            found = len(ids & wanted)
+            recalls.append(found / min(len(wanted), k))
+            hits += found > 0
+
+    return {
+        "queries": len(queries),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": round(float(np.mean(latencies)), 4) if latencies else 0.0,
+        "throughput_qps": round(len(queries) / total_s, 1) if total_s else 0.0,
+        "alloc_peak_kb": round(float(np.median(peaks)) / 1024, 1) if peaks else 0.0,
+        f"recall@{k}": round(float(np.mean(recalls)), 4) if recalls else 0.0,
+        f"hit_rate@{k}": round(hits / len(recalls), 4) if recalls else 0.0,
+        "coverage": round(len(recommended) / n_products, 4),
+        "empty_results": sum(1 for r in results if not r)
+    }
+
+
+def run(args) -> Dict:
+    state = setup(args)
+    queries = [o for o in state["held_out"] if len(o["product_ids"]) >= 2][:args.queries]
+    n = len(state["columns"])
+
+    strategies = {}
+    for name in args.strategies:
+        if name == "similar" and args.no_embeddings:
+            continue
+        if name == "related-full-scan" and neighbour_index.table is None:
+            continue
+        strategies[name] = evaluate(name, queries, n, args.k, args.warmup, args.alloc_sample)
+        print(json.dumps({"strategy": name, **strategies[name]}))
+
+    return {
+        "config": {k: v for k, v in vars(args).items() if k != "output"},
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "setup": state["report"],
+        "strategies": strategies,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--skus", type=int, default=10_000)
+    parser.add_argument("--orders", type=int, default=50_000)
+    parser.add_argument("--customers", type=int, default=5_000)
+    parser.add_argument("--holdout", type=float, default=0.1, help="share of newest orders held out")
+    parser.add_argument("--queries", type=int, default=2_000, help="held-out orders replayed per strategy")
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("--neighbour-max", type=int, default=200_000,
+                        help="largest catalog to build the O(n²) neighbour table for")
+    parser.add_argument("--no-embeddings", action="store_true")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--alloc-sample", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args)
+    print(json.dumps({"setup": results["setup"], "peak_rss_mb": results["peak_rss_mb"]}))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
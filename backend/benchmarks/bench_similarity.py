@@ -0,0 +1,120 @@
+"""Benchmark vectorized related-product scoring against the scalar loop.
+
+Usage (from backend/):
+    python -m benchmarks.bench_similarity --sizes 10000 100000 1000000
+"""
+from typing import Dict, List
+import argparse
+import json
+import time
+
+from apis.recommendation_engine import RecommendationEngine
+from apis.similarity import similarity_scores, top_k
+from benchmarks.synthetic import random_carts, synthetic_columns
+
+
+def scalar_related(products: List[Dict], cart: List[Dict], cart_ids: List[str], limit: int):
+    """The pre-vectorization get_related_products scoring loop"""
+    categories = set(p["category"] for p in cart)
+    brands = set(p["brand"] for p in cart)
+    avg_price = sum(p["price"] for p in cart) / len(cart)
+
+    scored = []
+    for product in products:
+        if product["id"] in cart_ids:
+            continue
+        score = RecommendationEngine._calculate_similarity_score(None, product, categories, brands, avg_price)
+        scored.append((score, product))
+    scored.sort(reverse=True, key=lambda x: x[0])
+    return [(score, p["id"]) for score, p in scored[:limit]]
+
+
+def vector_related(columns, cart: List[Dict], cart_ids: List[str], limit: int):
+    categories = set(p["category"] for p in cart)
+    brands = set(p["brand"] for p in cart)
+    avg_price = sum(p["price"] for p in cart) / len(cart)
+
+    scores = similarity_scores(columns, categories, brands, avg_price)
+    rows = top_k(scores, limit, exclude=columns.rows(cart_ids))
+    return [(float(scores[row]), columns.ids[row]) for row in rows]
+
+
+def light_products(columns) -> List[Dict]:
+    """Only the fields the scorer reads, to keep the scalar baseline affordable"""
+    return [
+        {
+            "id": columns.ids[i],
+            "price": float(columns.price[i]),
+            "rating": float(columns.rating[i]),
+            "category": columns.categories[columns.category[i]],
+            "brand": columns.brands[columns.brand[i]],
+            "is_trending": bool(columns.is_trending[i]),
+            "is_bestseller": bool(columns.is_bestseller[i])
+        }
+        for i in range(len(columns))
+    ]
+
+
+def cart_rows(columns, cart_ids: List[str]) -> List[Dict]:
+    """Cart products with the fields get_related_products aggregates"""
+    return [
+        {
+            "id": pid,
+            "price": float(columns.price[columns.row_of[pid]]),
+            "category": columns.categories[columns.category[columns.row_of[pid]]],
+            "brand": columns.brands[columns.brand[columns.row_of[pid]]]
+        }
+        for pid in cart_ids
+    ]
+
+
+def time_calls(fn, carts, repeat: int) -> float:
+    start = time.perf_counter()
+    for i in range(repeat):
+        fn(carts[i % len(carts)])
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(sizes: List[int], limit: int, repeat: int, scalar_max: int) -> List[Dict]:
+    results = []
+    for n in sizes:
+        columns = synthetic_columns(n)
+        carts = random_carts(columns, count=repeat)
+
+        vector_ms = time_calls(lambda ids: vector_related(columns, cart_rows(columns, ids), ids, limit), carts, repeat)
+        row = {"skus": n, "vectorized_ms": round(vector_ms, 3)}
+
+        if n <= scalar_max:
+            products = light_products(columns)
+            scalar_repeat = max(1, min(repeat, 2_000_000 // n))
+            scalar_ms = time_calls(lambda ids: scalar_related(products, cart_rows(columns, ids), ids, limit), carts, scalar_repeat)
+            exact = all(
+                scalar_related(products, cart_rows(columns, ids), ids, limit) ==
+                vector_related(columns, cart_rows(columns, ids), ids, limit)
+                for ids in carts[:5]
+            )
+            row.update({
+                "scalar_ms": round(scalar_ms, 3),
+                "speedup": round(scalar_ms / vector_ms, 1),
+                "exact_match": exact
+            })
+
+        results.append(row)
+        print(json.dumps(row))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--limit", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scalar-max", type=int, default=100_000,
+                        help="largest catalog to also run the scalar loop on")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.limit, args.repeat, args.scalar_max)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
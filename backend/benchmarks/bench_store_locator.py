@@ -0,0 +1,101 @@
+"""Benchmark nearest-store queries against a brute-force haversine scan.
+
+Stores are scattered around a few dozen metro clusters worldwide; queries
+come from random customer locations. Reports index build time, p50/p99
+query latency with and without a stock filter, and whether the k-d tree
+agrees with brute force.
+
+Usage (from backend/):
+    python -m benchmarks.bench_store_locator --sizes 1000 10000 100000
+"""
+from typing import Dict, List
+import argparse
+import json
+import time
+
+import numpy as np
+
+from apis.store_locator import StoreRegistry, haversine_km
+
+
+def synthetic_stores(n: int, seed: int = 5) -> List[Dict]:
+    rng = np.random.default_rng(seed)
+    metros = np.column_stack((rng.uniform(-50, 60, size=40), rng.uniform(-180, 180, size=40)))
+    cluster = rng.integers(0, len(metros), size=n)
+    lat = np.clip(metros[cluster, 0] + rng.normal(0, 0.5, size=n), -89.9, 89.9)
+    lon = (metros[cluster, 1] + rng.normal(0, 0.5, size=n) + 180) % 360 - 180
+    return [
+        {"id": f"ST{i:06d}", "name": f"Store {i}", "latitude": float(lat[i]), "longitude": float(lon[i])}
+        for i in range(n)
+    ]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return round(float(np.percentile(samples, q)), 4)
+
+
+def run(sizes: List[int], queries: int, k: int, stocked_share: float) -> List[Dict]:
+    results = []
+    rng = np.random.default_rng(9)
+    for n in sizes:
+        stores = synthetic_stores(n)
+        started = time.perf_counter()
+        registry = StoreRegistry(stores)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        lat_all = np.array([s["latitude"] for s in stores])
+        lon_all = np.array([s["longitude"] for s in stores])
+        points = [(stores[i]["latitude"] + rng.normal(0, 1), stores[i]["longitude"] + rng.normal(0, 1))
+                  for i in rng.integers(0, n, size=queries)]
+        stock = {s["id"]: 1 for s in stores if rng.random() < stocked_share}
+        stocked_rows = np.array([int(sid[2:]) for sid in stock])
+
+        tree_ms, filtered_ms, brute_ms, mismatches = [], [], [], 0
+        for lat, lon in points:
+            t0 = time.perf_counter()
+            found = registry.nearest(lat, lon, k)
+            tree_ms.append((time.perf_counter() - t0) * 1000)
+
+            t0 = time.perf_counter()
+            filtered = registry.nearest(lat, lon, k, stock=stock)
+            filtered_ms.append((time.perf_counter() - t0) * 1000)
+
+            t0 = time.perf_counter()
+            exact = np.argsort(haversine_km(lat, lon, lat_all, lon_all), kind="stable")[:k]
+            brute_ms.append((time.perf_counter() - t0) * 1000)
+
+            exact_filtered = stocked_rows[np.argsort(
+                haversine_km(lat, lon, lat_all[stocked_rows], lon_all[stocked_rows]), kind="stable"
+            )[:k]]
+            mismatches += [s["id"] for s in found] != [stores[i]["id"] for i in exact]
+            mismatches += [s["id"] for s in filtered] != [stores[i]["id"] for i in exact_filtered]
+
+        row = {
+            "stores": n,
+            "build_ms": round(build_ms, 1),
+            "query_p50_ms": percentile(tree_ms, 50),
+            "query_p99_ms": percentile(tree_ms, 99),
+            "stocked_query_p50_ms": percentile(filtered_ms, 50),
+            "stocked_query_p99_ms": percentile(filtered_ms, 99),
+            "brute_force_p50_ms": percentile(brute_ms, 50),
+            "mismatches": mismatches
+        }
+        results.append(row)
+        print(json.dumps(row))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--stocked-share", type=float, default=0.3,
+                        help="share of stores holding the queried product")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.queries, args.k, args.stocked_share)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
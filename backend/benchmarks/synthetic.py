@@ -0,0 +1,122 @@
+from typing import Dict, List
+import random
+
+import numpy as np
+
+from apis.catalog_columns import CatalogColumns, from_arrays
+
+CATEGORIES = ["jackets", "shirts", "jeans", "sweaters", "shoes", "accessories", "dresses", "shorts"]
+COLORS = ["Black", "Navy", "Grey", "White", "Blue", "Red", "Olive", "Cream", "Brown", "Pink"]
+SIZES = ["S", "M", "L", "XL", "XXL"]
+
+
+def _brand_count(n: int) -> int:
+    return max(10, n // 500)
+
+
+def synthetic_columns(n: int, seed: int = 42) -> CatalogColumns:
+    """Columnar catalog of ``n`` SKUs, cheap enough for millions of rows"""
+    rng = np.random.default_rng(seed)
+    brands = [f"Brand{i:05d}" for i in range(_brand_count(n))]
+    return from_arrays(
+        ids=[f"S{i:07d}" for i in range(n)],
+        price=np.round(rng.lognormal(mean=7.8, sigma=0.5, size=n)),
+        rating=np.round(rng.uniform(3.0, 5.0, size=n), 1),
+        categories=[CATEGORIES[c] for c in rng.integers(0, len(CATEGORIES), size=n)],
+        brands=[brands[b] for b in rng.integers(0, len(brands), size=n)],
+        is_trending=rng.random(n) < 0.2,
+        is_seasonal=rng.random(n) < 0.3,
+        is_bestseller=rng.random(n) < 0.15,
+        version=f"synthetic-{n}-{seed}"
+    )
+
+
+def products_from_columns(columns: CatalogColumns) -> List[Dict]:
+    """Full product dicts in the API shape for a columnar catalog"""
+    rng = random.Random(len(columns))
+    products = []
+    for i, product_id in enumerate(columns.ids):
+        category = columns.categories[columns.category[i]]
+        brand = columns.brands[columns.brand[i]]
+        products.append({
+            "id": product_id,
+            "name": f"{brand} {category.title()} {i}",
+            "price": float(columns.price[i]),
+            "rating": float(columns.rating[i]),
+            "image_url": f"https://example.com/img/{product_id}.jpg",
+            "description": f"{category.title()} by {brand} in {rng.choice(COLORS).lower()}.",
+            "category": category,
+            "brand": brand,
+            "sizes": SIZES[:rng.randint(2, len(SIZES))],
+            "colors": rng.sample(COLORS, 3),
+            "is_trending": bool(columns.is_trending[i]),
+            "is_seasonal": bool(columns.is_seasonal[i]),
+            "is_bestseller": bool(columns.is_bestseller[i])
+        })
+    return products
+
+
+def synthetic_products(n: int, seed: int = 42) -> List[Dict]:
+    """Product dicts for a synthetic catalog of ``n`` SKUs"""
+    return products_from_columns(synthetic_columns(n, seed))
+
+
+def random_carts(columns: CatalogColumns, count: int, size: int = 3, seed: int = 7) -> List[List[str]]:
+    """Random carts of distinct product ids"""
+    rng = random.Random(seed)
+    return [[columns.ids[i] for i in rng.sample(range(len(columns)), size)] for _ in range(count)]
+
+
+def _skewed_pick(rng: np.random.Generator, pool: np.ndarray, skew: float = 3.0) -> int:
+    """One element of ``pool``, earlier elements much more likely (power law, O(1))"""
+    return int(pool[int(len(pool) * rng.random() ** skew)])
+
+
+def synthetic_orders(
+    columns: CatalogColumns,
+    count: int,
+    customers: int = 1000,
+    max_items: int = 4,
+    days: float = 90,
+    seed: int = 11
+) -> List[Dict]:
+    """Order history with learnable structure, oldest first.
+
+    Every customer favours one category and one brand. An order has an
+    anchor product, mostly from the favourite category, plus companions
+    drawn mostly from the anchor's brand and the favourite brand, with a
+    popularity skew so the same pairs recur.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(columns)
+    # Fixed popularity order inside each category and brand
+    popularity = rng.permutation(n)
+    by_category = [popularity[columns.category[popularity] == c] for c in range(len(columns.categories))]
+    by_brand = [popularity[columns.brand[popularity] == b] for b in range(len(columns.brands))]
+
+    favourite_category = rng.integers(0, len(columns.categories), size=customers)
+    favourite_brand = rng.integers(0, len(columns.brands), size=customers)
+    timestamps = np.sort(rng.uniform(-days * 86400, 0, size=count))
+
+    orders = []
+    for i in range(count):
+        customer = int(rng.integers(customers))
+        pool = by_category[favourite_category[customer]] if rng.random() < 0.7 else popularity
+        anchor = _skewed_pick(rng, pool)
+        items = {anchor}
+        for _ in range(int(rng.integers(1, max_items))):
+            roll = rng.random()
+            if roll < 0.5:
+                pool = by_brand[columns.brand[anchor]]
+            elif roll < 0.8:
+                pool = by_brand[favourite_brand[customer]]
+            else:
+                pool = popularity
+            if len(pool):
+                items.add(_skewed_pick(rng, pool))
+        orders.append({
+            "customer_id": f"BC{customer:06d}",
+            "product_ids": [columns.ids[r] for r in sorted(items)],
+            "offset_s": float(timestamps[i])
+        })
+    return orders
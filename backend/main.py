@@ -1,22 +1,37 @@
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List, Optional
 import uvicorn
 import os
 from dotenv import load_dotenv
 
 from models.schemas import (
     QueryRequest, AgentResponse, OrderRequest, OrderConfirmation,
-    FeedbackRequest, CartItem
+    FeedbackRequest, CartItem, BatchRecommendationRequest, FulfillmentOption,
+    InventoryBatchRequest, ReservationRequest
 )
 from agents.master_agent import master_agent
 from utils.redis_manager import redis_manager
 from apis.products_api import products_api
 from apis.inventory_api import inventory_api
+from apis.reservations import reservation_ledger
+from utils.inventory_events import inventory_events
 from apis.payment_api import payment_api
 from apis.loyalty_api import loyalty_api
 from apis.recommendation_engine import recommendation_engine
+from apis.catalog_store import catalog_store
+from apis.neighbour_table import neighbour_index
+from apis.cooccurrence import cooccurrence_engine
+from apis.embeddings import embedding_index
+from apis.customer_profiles import customer_profiles
+from apis.model_artifacts import RECOMMENDATION_ONLINE_BUILD, list_builds, model_artifacts
+from utils.product_json import RawJSONResponse, product_json_cache, dumps
+from utils.product_cache import product_cache
+from utils.http_cache import CACHE_CONTROL, conditional_response, conditional_response_async, make_etag
+from utils.recommendation_cache import cart_key, recommendation_cache
+from utils.session_interest import SESSION_RERANK_POOL, interest_token, update_interest
 import random
 import string
 from datetime import datetime
@@ -32,12 +47,16 @@ app = FastAPI(
 # CORS Configuration
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000,http://localhost:5173").split(",")
 
+# Batches larger than this stream back as NDJSON unless the client chooses
+RECOMMENDATION_BATCH_STREAM_THRESHOLD = int(os.getenv("RECOMMENDATION_BATCH_STREAM_THRESHOLD", "100"))
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -60,6 +79,33 @@ class ConnectionManager:
 manager = ConnectionManager()
 
 
+@app.on_event("startup")
+async def startup():
+    # Bulk-load the catalog snapshot and keep it fresh in the background
+    catalog_store.load()
+    catalog_store.start_background_refresh()
+    cooccurrence_engine.load()
+    # Prebuilt models are memory-mapped; nothing is trained at boot
+    recommendation_engine.load_artifacts()
+    model_artifacts.start_watching()
+    if RECOMMENDATION_ONLINE_BUILD:
+        neighbour_index.start()
+        embedding_index.start()
+    customer_profiles.start()
+    cooccurrence_engine.start_snapshots()
+    reservation_ledger.start()
+    inventory_events.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    catalog_store.stop_background_refresh()
+    model_artifacts.stop_watching()
+    cooccurrence_engine.stop_snapshots()
+    reservation_ledger.stop()
+    inventory_events.stop()
+
+
 @app.get("/")
 async def root():
     return {
@@ -71,7 +117,11 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    return {
+        "status": "healthy",
+        "catalog_version": catalog_store.version,
+        "timestamp": datetime.now().isoformat()
+    }
 
 
 # Chat endpoint
@@ -85,7 +135,7 @@ async def chat(request: QueryRequest):
             customer_id=request.customer_id
         )
         
-        return JSONResponse(content=response)
+        return RawJSONResponse(content=dumps(response))
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -134,6 +184,7 @@ async def websocket_chat(websocket: WebSocket):
 # Products endpoints
 @app.get("/api/products")
 async def get_products(
+    request: Request,
     category: Optional[str] = None,
     budget: Optional[float] = None,
     sort: Optional[str] = "trending",
@@ -141,20 +192,31 @@ async def get_products(
 ):
     """Get products with filters"""
     try:
-        products = products_api.get_products(category, budget, sort, limit)
-        return {"success": True, "products": products, "count": len(products)}
+        # Read before the products, so fragments are only cached for the version they came from
+        version = catalog_store.version
+        etag = make_etag(version, "products", category, budget, sort, limit)
+        return conditional_response(
+            request, etag, CACHE_CONTROL["products"],
+            lambda: product_json_cache.list_body(products_api.get_products(category, budget, sort, limit), version)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/products/{product_id}")
-async def get_product(product_id: str):
+async def get_product(request: Request, product_id: str):
     """Get single product by ID"""
     try:
-        product = products_api.get_product_by_id(product_id)
-        if not product:
-            raise HTTPException(status_code=404, detail="Product not found")
-        return {"success": True, "product": product}
+        version = catalog_store.version
+        
+        def build():
+            product = products_api.get_product_by_id(product_id)
+            if not product:
+                raise HTTPException(status_code=404, detail="Product not found")
+            return product_json_cache.item_body(product, version)
+        
+        etag = make_etag(version, "product", product_id)
+        return conditional_response(request, etag, CACHE_CONTROL["product"], build)
     except HTTPException:
         raise
     except Exception as e:
@@ -162,33 +224,172 @@ async def get_product(product_id: str):
 
 
 @app.get("/api/products/search/{query}")
-async def search_products(query: str, limit: int = 10):
+async def search_products(request: Request, query: str, limit: int = 10):
     """Search products"""
     try:
-        products = products_api.search_products(query, limit)
-        return {"success": True, "products": products, "count": len(products)}
+        version = catalog_store.version
+        etag = make_etag(version, "search", query, limit)
+        return conditional_response(
+            request, etag, CACHE_CONTROL["search"],
+            lambda: product_json_cache.list_body(products_api.search_products(query, limit), version)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/catalog/reload")
+async def reload_catalog():
+    """Reload the catalog snapshot from the database"""
+    try:
+        snapshot = catalog_store.refresh(force=True)
+        return {
+            "success": True,
+            "version": snapshot.version,
+            "count": len(snapshot),
+            "loaded_at": snapshot.loaded_at.isoformat()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/recommendations/models/reload")
+async def reload_recommendation_models(build_id: Optional[str] = None):
+    """Hot-swap a prebuilt recommendation model build (default: CURRENT)"""
+    try:
+        if build_id is not None and build_id not in list_builds(model_artifacts.root):
+            raise HTTPException(status_code=404, detail="Build not found")
+        bundle = await run_in_threadpool(model_artifacts.load, build_id)
+        return {"success": True, "reloaded": bundle is not None, **model_artifacts.stats()}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Get catalog cache metrics"""
+    return {
+        "success": True,
+        "catalog_version": catalog_store.version,
+        "product_cache": product_cache.stats(),
+        "product_json": product_json_cache.stats(),
+        "neighbour_table": neighbour_index.stats(),
+        "cooccurrence": cooccurrence_engine.stats(),
+        "embeddings": embedding_index.stats(),
+        "recommendations": recommendation_cache.stats(),
+        "customer_profiles": customer_profiles.stats(),
+        "model_artifacts": model_artifacts.stats(),
+        "reservations": reservation_ledger.stats(),
+        "inventory": inventory_api.stats(),
+        "inventory_events": inventory_events.stats()
+    }
+
+
 # Inventory endpoints
 @app.get("/api/inventory/{product_id}")
-async def get_inventory(product_id: str, location: Optional[str] = None):
+async def get_inventory(request: Request, product_id: str, location: Optional[str] = None):
     """Get inventory for product"""
     try:
-        availability = inventory_api.check_availability(product_id, location)
-        fulfillment_options = inventory_api.get_fulfillment_options(product_id, location)
+        # One stock read serves both the validator and the body
+        result = (await inventory_api.check_availability_batch_async([product_id], location))[product_id]
+        
+        def build():
+            return {
+                "success": True,
+                "product_id": product_id,
+                "availability": result["availability"],
+                "fulfillment_options": result["fulfillment_options"]
+            }
         
+        etag = make_etag(result["version"], "inventory", product_id, location)
+        return conditional_response(request, etag, CACHE_CONTROL["inventory"], build)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/inventory/batch")
+async def get_inventory_batch(batch: InventoryBatchRequest):
+    """Get availability and fulfillment options for many products at one location"""
+    try:
+        results = await inventory_api.check_availability_batch_async(batch.product_ids, batch.location)
         return {
             "success": True,
-            "product_id": product_id,
-            "availability": availability,
-            "fulfillment_options": fulfillment_options
+            "location": batch.location,
+            "inventory": [
+                {
+                    "product_id": product_id,
+                    "availability": result["availability"],
+                    "fulfillment_options": result["fulfillment_options"],
+                    "in_stock": result["in_stock"]
+                }
+                for product_id, result in results.items()
+            ]
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/inventory/reserve")
+async def reserve_inventory(reservation: ReservationRequest):
+    """Hold stock for a set of products until commit, release or expiry"""
+    try:
+        result = await inventory_api.reserve_items(
+            [(item.product_id, item.quantity) for item in reservation.items],
+            reservation.location,
+            reservation.ttl
+        )
+        if not result["success"]:
+            raise HTTPException(status_code=409, detail=result["message"])
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/inventory/reservations/{reservation_id}/commit")
+async def commit_reservation(reservation_id: str):
+    """Convert a hold into a sale"""
+    result = await inventory_api.commit_reservation(reservation_id)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["message"])
+    return result
+
+
+@app.delete("/api/inventory/reservations/{reservation_id}")
+async def release_reservation(reservation_id: str):
+    """Return a hold's stock"""
+    result = await inventory_api.release_reservation(reservation_id)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["message"])
+    return result
+
+
+@app.get("/api/stores/nearby")
+async def get_nearby_stores(
+    location: str,
+    limit: int = Query(3, ge=1, le=50),
+    product_id: Optional[str] = None,
+    quantity: int = Query(1, ge=1)
+):
+    """Nearest stores to a city, store id or "lat,lon", optionally only those stocking a product"""
+    try:
+        point = inventory_api.stores.resolve(location)
+        if point is None:
+            raise HTTPException(status_code=400, detail=f"Unknown location: {location}")
+        return {
+            "success": True,
+            "location": location,
+            "coordinates": {"latitude": point[0], "longitude": point[1]},
+            "stores": await inventory_api.get_nearby_stores_async(location, limit, product_id, quantity)
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Cart endpoints
 @app.post("/api/cart/add")
 async def add_to_cart(session_id: str, item: CartItem):
@@ -226,6 +427,7 @@ async def add_to_cart(session_id: str, item: CartItem):
         cart["subtotal"] = sum(i["price"] * i["quantity"] for i in cart["items"])
         
         session_data["active_cart"] = cart
+        update_interest(session_data, [products_api.get_product_by_id(item.product_id)], "cart_add")
         redis_manager.set_session(session_id, session_data)
         
         # Debug logging
@@ -263,10 +465,13 @@ async def remove_from_cart(session_id: str, product_id: str):
             raise HTTPException(status_code=404, detail="Session not found")
         
         cart = session_data.get("active_cart", {"items": [], "subtotal": 0})
+        removed = any(i["product_id"] == product_id for i in cart["items"])
         cart["items"] = [i for i in cart["items"] if i["product_id"] != product_id]
         cart["subtotal"] = sum(i["price"] * i["quantity"] for i in cart["items"])
         
         session_data["active_cart"] = cart
+        if removed:
+            update_interest(session_data, [products_api.get_product_by_id(product_id)], "cart_remove")
         redis_manager.set_session(session_id, session_data)
         
         return {"success": True, "cart": cart}
@@ -314,18 +519,46 @@ async def checkout(order_request: OrderRequest):
             subtotal=cart["subtotal"]
         )
         
-        # Process payment
-        payment_result = payment_api.process_payment(
-            customer_id=order_request.customer_id,
-            method_id="default",
-            method_type=order_request.payment_method.value,
-            amount=pricing["final_amount"],
-            order_id=f"ORD{''.join(random.choices(string.ascii_uppercase + string.digits, k=10))}"
+        # Hold the stock before charging so concurrent checkouts cannot oversell
+        pickup = order_request.fulfillment_option != FulfillmentOption.SHIP_TO_HOME
+        reservation = await inventory_api.reserve_items(
+            [(i["product_id"], i["quantity"]) for i in cart["items"]],
+            order_request.store_location if pickup else None
         )
+        if not reservation["success"]:
+            raise HTTPException(status_code=409, detail=reservation["message"])
+        
+        # Process payment
+        try:
+            payment_result = payment_api.process_payment(
+                customer_id=order_request.customer_id,
+                method_id="default",
+                method_type=order_request.payment_method.value,
+                amount=pricing["final_amount"],
+                order_id=f"ORD{''.join(random.choices(string.ascii_uppercase + string.digits, k=10))}"
+            )
+        except Exception:
+            await inventory_api.release_reservation(reservation["reservation_id"])
+            raise
         
         if not payment_result["success"]:
+            await inventory_api.release_reservation(reservation["reservation_id"])
             raise HTTPException(status_code=400, detail="Payment failed")
         
+        committed = await inventory_api.commit_reservation(reservation["reservation_id"])
+        if not committed["success"]:
+            # The hold lapsed during payment and its stock may already be sold again: void the charge
+            refund = payment_api.refund_payment(
+                payment_result["transaction_id"],
+                pricing["final_amount"],
+                reason="Stock hold expired before payment completed"
+            )
+            print(f"⚠️  {committed['message']}; refund {refund.get('refund_id')} {refund['status']}")
+            raise HTTPException(
+                status_code=409,
+                detail="Your items were released before payment completed and the payment has been refunded. Please check out again."
+            )
+        
         # Generate order ID
         order_id = payment_result["transaction_id"].replace("TXN", "ORD")
         
@@ -351,6 +584,9 @@ async def checkout(order_request: OrderRequest):
         # Add loyalty points
         loyalty_api.add_points(order_request.customer_id, pricing["points_to_earn"])
         
+        # Feed the co-purchase counts behind "frequently bought together"
+        cooccurrence_engine.record_order(i["product_id"] for i in cart["items"])
+        
         # Clear cart
         session_data["active_cart"] = {"items": [], "subtotal": 0}
         redis_manager.set_session(order_request.session_id, session_data)
@@ -430,34 +666,157 @@ async def get_session(session_id: str):
 
 
 # Recommendation endpoints
+def _session_interest(session_id: Optional[str]) -> Optional[Dict]:
+    """Interest model of a session, if the client identified one"""
+    if not session_id:
+        return None
+    session_data = redis_manager.get_session(session_id)
+    return session_data.get("interest") if session_data else None
+
+
+def _related_models_version() -> str:
+    """Artifact build and model versions behind related-product results.
+
+    Until the embedding index or neighbour table is built for the current
+    catalog the engine falls back to other scorers, so those results must
+    not outlive that state. Every worker derives the same token from the
+    same models.
+    """
+    snapshot = catalog_store.snapshot
+    index = embedding_index.index_for(snapshot)
+    table = neighbour_index.table_for(snapshot)
+    return ".".join((
+        str(model_artifacts.build_id),
+        index.version if index is not None else "fallback",
+        table.version if table is not None else "fallback"
+    ))
+
+
 @app.get("/api/recommendations/related")
-async def get_related_products(product_ids: str, limit: int = 4):
+async def get_related_products(
+    request: Request,
+    product_ids: str,
+    limit: int = 4,
+    strategy: str = "collaborative",
+    diversity: float = Query(0.0, ge=0.0, le=1.0),
+    session_id: Optional[str] = None
+):
     """Get related products based on cart items"""
     try:
-        ids = product_ids.split(',')
-        recommendations = recommendation_engine.get_related_products(ids, limit)
-        return {"success": True, "recommendations": recommendations}
+        ids = cart_key(product_ids.split(','))
+        models_version = _related_models_version()
+        interest = _session_interest(session_id)
+        pool = limit * SESSION_RERANK_POOL if interest else limit
+
+        async def build():
+            recommendations = await recommendation_cache.get_or_compute(
+                ("related", ids, models_version, strategy, pool, diversity),
+                lambda: recommendation_engine.get_related_products(list(ids), pool, strategy, diversity)
+            )
+            recommendations = recommendation_engine.rerank_for_session(recommendations, interest, limit)
+            return {"success": True, "recommendations": recommendations}
+
+        etag = make_etag(
+            catalog_store.version, models_version, "related", ",".join(ids), limit, strategy, diversity,
+            interest_token(interest)
+        )
+        return await conditional_response_async(request, etag, CACHE_CONTROL["recommendations"], build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/recommendations/frequently-bought/{product_id}")
-async def get_frequently_bought(product_id: str, limit: int = 3):
+async def get_frequently_bought(
+    request: Request,
+    product_id: str,
+    limit: int = 3,
+    diversity: float = Query(0.0, ge=0.0, le=1.0),
+    session_id: Optional[str] = None
+):
     """Get products frequently bought together"""
     try:
-        recommendations = recommendation_engine.get_frequently_bought_together(product_id, limit)
-        return {"success": True, "recommendations": recommendations}
+        counts_version = cooccurrence_engine.version
+        interest = _session_interest(session_id)
+        pool = limit * SESSION_RERANK_POOL if interest else limit
+
+        async def build():
+            recommendations = await recommendation_cache.get_or_compute(
+                ("frequently-bought", (product_id,), counts_version, pool, diversity),
+                lambda: recommendation_engine.get_frequently_bought_together(product_id, pool, diversity)
+            )
+            recommendations = recommendation_engine.rerank_for_session(recommendations, interest, limit)
+            return {"success": True, "recommendations": recommendations}
+
+        etag = make_etag(
+            catalog_store.version, counts_version, "frequently-bought", product_id, limit, diversity,
+            interest_token(interest)
+        )
+        return await conditional_response_async(request, etag, CACHE_CONTROL["recommendations"], build)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/recommendations/complete-look")
-async def get_complete_look(product_ids: str, limit: int = 3):
+async def get_complete_look(
+    request: Request,
+    product_ids: str,
+    limit: int = 3,
+    diversity: float = Query(0.0, ge=0.0, le=1.0),
+    session_id: Optional[str] = None
+):
     """Get products to complete the look"""
     try:
-        ids = product_ids.split(',')
-        recommendations = recommendation_engine.get_complete_the_look(ids, limit)
-        return {"success": True, "recommendations": recommendations}
+        ids = cart_key(product_ids.split(','))
+        interest = _session_interest(session_id)
+        pool = limit * SESSION_RERANK_POOL if interest else limit
+
+        async def build():
+            recommendations = await recommendation_cache.get_or_compute(
+                ("complete-look", ids, pool, diversity),
+                lambda: recommendation_engine.get_complete_the_look(list(ids), pool, diversity)
+            )
+            recommendations = recommendation_engine.rerank_for_session(recommendations, interest, limit)
+            return {"success": True, "recommendations": recommendations}
+
+        etag = make_etag(
+            catalog_store.version, "complete-look", ",".join(ids), limit, diversity, interest_token(interest)
+        )
+        return await conditional_response_async(request, etag, CACHE_CONTROL["recommendations"], build)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/recommendations/batch")
+async def get_recommendations_batch(request: Request, batch: BatchRecommendationRequest):
+    """Get recommendations for many carts or products in one call"""
+    try:
+        queries = [
+            {"product_ids": q.product_ids, "strategy": q.strategy.value, "limit": q.limit, "diversity": q.diversity}
+            for q in batch.queries
+        ]
+        stream = batch.stream
+        if stream is None:
+            stream = (
+                len(queries) > RECOMMENDATION_BATCH_STREAM_THRESHOLD
+                or "application/x-ndjson" in request.headers.get("accept", "")
+            )
+        
+        if stream:
+            def lines():
+                results = recommendation_engine.get_recommendations_batch(queries)
+                for index, (query, recommendations) in enumerate(zip(queries, results)):
+                    yield dumps({"index": index, **query, "recommendations": recommendations}) + b"\n"
+            
+            return StreamingResponse(lines(), media_type="application/x-ndjson")
+        
+        results = await run_in_threadpool(lambda: list(recommendation_engine.get_recommendations_batch(queries)))
+        return RawJSONResponse(content={
+            "success": True,
+            "results": [
+                {"index": index, **query, "recommendations": recommendations}
+                for index, (query, recommendations) in enumerate(zip(queries, results))
+            ]
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -22,6 +22,13 @@ class PaymentMethod(str, Enum):
     WALLET = "Wallet"
 
 
+class RecommendationStrategy(str, Enum):
+    COLLABORATIVE = "collaborative"
+    SIMILAR = "similar"
+    COMPLETE_LOOK = "complete-look"
+    FREQUENTLY_BOUGHT = "frequently-bought"
+
+
 class ProductBase(BaseModel):
     id: str
     name: str
@@ -117,6 +124,22 @@ class OrderRequest(BaseModel):
     store_location: Optional[str] = None
 
 
+class InventoryBatchRequest(BaseModel):
+    product_ids: List[str] = Field(min_length=1, max_length=1000)
+    location: Optional[str] = None
+
+
+class ReservationItem(BaseModel):
+    product_id: str
+    quantity: int = Field(default=1, ge=1)
+
+
+class ReservationRequest(BaseModel):
+    items: List[ReservationItem] = Field(min_length=1)
+    location: Optional[str] = None
+    ttl: Optional[int] = Field(default=None, ge=1, le=86400)
+
+
 class OrderConfirmation(BaseModel):
     order_id: str
     total_amount: float
@@ -140,3 +163,15 @@ class RecommendationRequest(BaseModel):
     budget: Optional[float] = None
     location: Optional[str] = None
     preferences: Optional[List[str]] = None
+
+
+class RecommendationQuery(BaseModel):
+    product_ids: List[str] = Field(min_length=1)
+    strategy: RecommendationStrategy = RecommendationStrategy.COLLABORATIVE
+    limit: int = Field(default=4, ge=1, le=50)
+    diversity: float = Field(default=0.0, ge=0.0, le=1.0)
+
+
+class BatchRecommendationRequest(BaseModel):
+    queries: List[RecommendationQuery] = Field(min_length=1, max_length=5000)
+    stream: Optional[bool] = None
@@ -0,0 +1,221 @@
+# Seed data used to populate an empty catalog database
+
+# Mock product catalog
+MOCK_PRODUCTS = [
+    {
+        "id": "P001",
+        "name": "Urban Winter Jacket - Premium",
+        "price": 3999,
+        "rating": 4.5,
+        "image_url": "https://images.unsplash.com/photo-1551028719-00167b16eac5?w=400",
+        "description": "Premium winter jacket with waterproof exterior and thermal lining. Perfect for cold weather.",
+        "category": "jackets",
+        "brand": "UrbanWear",
+        "sizes": ["S", "M", "L", "XL"],
+        "colors": ["Black", "Navy", "Grey"],
+        "is_trending": True,
+        "is_seasonal": True,
+        "is_bestseller": True
+    },
+    {
+        "id": "P002",
+        "name": "Classic Denim Jacket",
+        "price": 2499,
+        "rating": 4.3,
+        "image_url": "https://images.unsplash.com/photo-1576995853123-5a10305d93c0?w=400",
+        "description": "Timeless denim jacket with modern fit. Versatile for all seasons.",
+        "category": "jackets",
+        "brand": "DenimCo",
+        "sizes": ["S", "M", "L", "XL", "XXL"],
+        "colors": ["Blue", "Black", "Light Blue"],
+        "is_trending": True,
+        "is_seasonal": False,
+        "is_bestseller": False
+    },
+    {
+        "id": "P003",
+        "name": "Bomber Jacket - Sporty",
+        "price": 4499,
+        "rating": 4.7,
+        "image_url": "https://images.unsplash.com/photo-1591047139829-d91aecb6caea?w=400",
+        "description": "Stylish bomber jacket with ribbed cuffs and hem. Lightweight yet warm.",
+        "category": "jackets",
+        "brand": "SportStyle",
+        "sizes": ["M", "L", "XL"],
+        "colors": ["Olive", "Black", "Maroon"],
+        "is_trending": False,
+        "is_seasonal": True,
+        "is_bestseller": True
+    },
+    {
+        "id": "P004",
+        "name": "Leather Biker Jacket",
+        "price": 7999,
+        "rating": 4.8,
+        "image_url": "https://images.unsplash.com/photo-1520975954732-35dd22299614?w=400",
+        "description": "Genuine leather biker jacket with asymmetric zipper. Premium quality.",
+        "category": "jackets",
+        "brand": "LeatherLux",
+        "sizes": ["S", "M", "L"],
+        "colors": ["Black", "Brown"],
+        "is_trending": True,
+        "is_seasonal": False,
+        "is_bestseller": False
+    },
+    {
+        "id": "P005",
+        "name": "Puffer Jacket - Ultra Warm",
+        "price": 4799,
+        "rating": 4.6,
+        "image_url": "https://images.unsplash.com/photo-1539533018447-63fcce2678e3?w=400",
+        "description": "Ultra-warm puffer jacket with down filling. Water-resistant outer shell.",
+        "category": "jackets",
+        "brand": "WarmTech",
+        "sizes": ["S", "M", "L", "XL"],
+        "colors": ["Red", "Black", "Navy"],
+        "is_trending": True,
+        "is_seasonal": True,
+        "is_bestseller": True
+    },
+    {
+        "id": "P006",
+        "name": "Casual Cotton Shirt",
+        "price": 1299,
+        "rating": 4.2,
+        "image_url": "https://images.unsplash.com/photo-1596755094514-f87e34085b2c?w=400",
+        "description": "Comfortable cotton shirt for everyday wear. Breathable fabric.",
+        "category": "shirts",
+        "brand": "CasualFit",
+        "sizes": ["S", "M", "L", "XL", "XXL"],
+        "colors": ["White", "Blue", "Pink", "Grey"],
+        "is_trending": False,
+        "is_seasonal": False,
+        "is_bestseller": True
+    },
+    {
+        "id": "P007",
+        "name": "Formal Oxford Shirt",
+        "price": 1899,
+        "rating": 4.4,
+        "image_url": "https://images.unsplash.com/photo-1602810318383-e386cc2a3ccf?w=400",
+        "description": "Classic Oxford shirt for formal occasions. Wrinkle-resistant fabric.",
+        "category": "shirts",
+        "brand": "FormalWear",
+        "sizes": ["S", "M", "L", "XL"],
+        "colors": ["White", "Light Blue", "Pink"],
+        "is_trending": False,
+        "is_seasonal": False,
+        "is_bestseller": False
+    },
+    {
+        "id": "P008",
+        "name": "Slim Fit Jeans - Dark Blue",
+        "price": 2199,
+        "rating": 4.5,
+        "image_url": "https://images.unsplash.com/photo-1542272604-787c3835535d?w=400",
+        "description": "Comfortable slim fit jeans with stretch fabric. Perfect fit guaranteed.",
+        "category": "jeans",
+        "brand": "DenimCo",
+        "sizes": ["28", "30", "32", "34", "36"],
+        "colors": ["Dark Blue", "Black", "Light Blue"],
+        "is_trending": True,
+        "is_seasonal": False,
+        "is_bestseller": True
+    },
+    {
+        "id": "P009",
+        "name": "Relaxed Fit Jeans",
+        "price": 1999,
+        "rating": 4.3,
+        "image_url": "https://images.unsplash.com/photo-1475178626620-a4d074967452?w=400",
+        "description": "Relaxed fit jeans for maximum comfort. Classic style.",
+        "category": "jeans",
+        "brand": "ComfortDenim",
+        "sizes": ["28", "30", "32", "34", "36", "38"],
+        "colors": ["Blue", "Black", "Grey"],
+        "is_trending": False,
+        "is_seasonal": False,
+        "is_bestseller": False
+    },
+    {
+        "id": "P010",
+        "name": "Wool Sweater - Cable Knit",
+        "price": 3299,
+        "rating": 4.7,
+        "image_url": "https://images.unsplash.com/photo-1576566588028-4147f3842f27?w=400",
+        "description": "Cozy wool sweater with cable knit pattern. Perfect for winter.",
+        "category": "sweaters",
+        "brand": "WoolCraft",
+        "sizes": ["S", "M", "L", "XL"],
+        "colors": ["Cream", "Navy", "Burgundy"],
+        "is_trending": True,
+        "is_seasonal": True,
+        "is_bestseller": True
+    }
+]
+
+
+# Mock inventory data
+MOCK_INVENTORY = {
+    "P001": {"warehouse": 50, "stores": {"Mumbai": 15, "Delhi": 12, "Bangalore": 8}},
+    "P002": {"warehouse": 30, "stores": {"Mumbai": 8, "Delhi": 10, "Bangalore": 5}},
+    "P003": {"warehouse": 45, "stores": {"Mumbai": 10, "Delhi": 15, "Bangalore": 12}},
+    "P004": {"warehouse": 20, "stores": {"Mumbai": 5, "Delhi": 3, "Bangalore": 4}},
+    "P005": {"warehouse": 60, "stores": {"Mumbai": 20, "Delhi": 18, "Bangalore": 15}},
+    "P006": {"warehouse": 100, "stores": {"Mumbai": 25, "Delhi": 30, "Bangalore": 20}},
+    "P007": {"warehouse": 80, "stores": {"Mumbai": 18, "Delhi": 22, "Bangalore": 16}},
+    "P008": {"warehouse": 70, "stores": {"Mumbai": 20, "Delhi": 25, "Bangalore": 18}},
+    "P009": {"warehouse": 55, "stores": {"Mumbai": 15, "Delhi": 18, "Bangalore": 12}},
+    "P010": {"warehouse": 40, "stores": {"Mumbai": 12, "Delhi": 10, "Bangalore": 8}},
+}
+
+
+
+# Mock store network; ids match the store keys in MOCK_INVENTORY
+MOCK_STORES = [
+    {
+        "id": "Mumbai",
+        "name": "Phoenix Mills Store",
+        "address": "High Street Phoenix, Lower Parel, Mumbai",
+        "city": "Mumbai",
+        "latitude": 18.9947,
+        "longitude": 72.8258,
+        "hours": "10 AM - 10 PM"
+    },
+    {
+        "id": "Delhi",
+        "name": "Select Citywalk Store",
+        "address": "Saket, New Delhi",
+        "city": "Delhi",
+        "latitude": 28.5286,
+        "longitude": 77.2193,
+        "hours": "11 AM - 9 PM"
+    },
+    {
+        "id": "Bangalore",
+        "name": "UB City Store",
+        "address": "Vittal Mallya Road, Bangalore",
+        "city": "Bangalore",
+        "latitude": 12.9716,
+        "longitude": 77.5960,
+        "hours": "10 AM - 9 PM"
+    }
+]
+
+
+# City centres used to place customers who give a city instead of coordinates
+CITY_COORDINATES = {
+    "Mumbai": (19.0760, 72.8777),
+    "Delhi": (28.6139, 77.2090),
+    "New Delhi": (28.6139, 77.2090),
+    "Gurgaon": (28.4595, 77.0266),
+    "Noida": (28.5355, 77.3910),
+    "Bangalore": (12.9716, 77.5946),
+    "Bengaluru": (12.9716, 77.5946),
+    "Chennai": (13.0827, 80.2707),
+    "Hyderabad": (17.3850, 78.4867),
+    "Kolkata": (22.5726, 88.3639),
+    "Pune": (18.5204, 73.8567),
+    "Ahmedabad": (23.0225, 72.5714),
+    "Jaipur": (26.9124, 75.7873)
+}
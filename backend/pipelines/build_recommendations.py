@@ -0,0 +1,91 @@
+"""Build, validate and publish the offline recommendation model artifacts.
+
+Reads the catalog and order tables, builds the neighbour table, the
+embedding/IVF index and the co-occurrence counts, and publishes them as a
+new versioned build under RECOMMENDATION_ARTIFACT_DIR. Running servers pick
+the build up on their next poll, or through POST /api/recommendations/models/reload.
+
+Usage (from backend/):
+    python -m pipelines.build_recommendations
+    python -m pipelines.build_recommendations --components neighbours cooccurrence --keep 5
+    python -m pipelines.build_recommendations --validate 20250101T000000000000Z-1a2b3c4d
+    python -m pipelines.build_recommendations --list
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from apis.catalog_store import catalog_store
+from apis.embeddings import EMBEDDING_DIM
+from apis.model_artifacts import (
+    COMPONENTS, RECOMMENDATION_ARTIFACT_DIR, ArtifactError,
+    build_artifacts, current_build, list_builds, load_build, read_orders
+)
+from apis.neighbour_table import RECOMMENDATION_NEIGHBOURS
+
+
+def build(args) -> int:
+    started = time.perf_counter()
+    snapshot = catalog_store.load()
+    if snapshot.source == "seed":
+        print("⚠️  Building from the seed catalog; the database was not reachable")
+
+    orders = read_orders() if "cooccurrence" in args.components else ()
+    build_id = build_artifacts(
+        args.output,
+        snapshot,
+        orders=orders,
+        components=args.components,
+        width=args.width,
+        dim=args.dim,
+        keep=args.keep
+    )
+
+    with open(os.path.join(args.output, build_id, "manifest.json")) as f:
+        manifest = json.load(f)
+    summary = {
+        "build_id": build_id,
+        "catalog_version": manifest["catalog_version"],
+        "products": manifest["products"],
+        "components": {name: {k: v for k, v in c.items() if k != "files"} for name, c in manifest["components"].items()},
+        "total_s": round(time.perf_counter() - started, 2)
+    }
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+def validate(args) -> int:
+    build_id = args.validate if args.validate != "current" else current_build(args.output)
+    if not build_id:
+        print("No current build", file=sys.stderr)
+        return 1
+    try:
+        bundle = load_build(os.path.join(args.output, build_id))
+    except ArtifactError as e:
+        print(f"✗ {build_id}: {e}", file=sys.stderr)
+        return 1
+    print(f"✓ {build_id}: {len(bundle.columns)} products, components: {', '.join(bundle.manifest['components']) or 'none'}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=RECOMMENDATION_ARTIFACT_DIR)
+    parser.add_argument("--components", nargs="+", choices=COMPONENTS, default=list(COMPONENTS))
+    parser.add_argument("--width", type=int, default=RECOMMENDATION_NEIGHBOURS)
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    parser.add_argument("--keep", type=int, default=3, help="builds to keep on disk")
+    parser.add_argument("--validate", metavar="BUILD_ID", help="validate an existing build ('current' for CURRENT)")
+    parser.add_argument("--list", action="store_true", help="list builds and exit")
+    args = parser.parse_args()
+
+    if not args.output:
+        parser.error("RECOMMENDATION_ARTIFACT_DIR is empty; pass --output")
+    if args.list:
+        current = current_build(args.output)
+        for build_id in list_builds(args.output):
+            print(f"{'*' if build_id == current else ' '} {build_id}")
+        sys.exit(0)
+    sys.exit(validate(args) if args.validate else build(args))
@@ -0,0 +1,432 @@
+"""Stream product or inventory feeds (CSV / NDJSON, optionally gzipped) into the database.
+
+Rows are read one at a time, validated and de-duplicated in chunks, and
+each chunk is written in one transaction with a bulk upsert: COPY into a
+staging table on PostgreSQL, multi-row INSERT ... ON CONFLICT elsewhere.
+Memory stays bounded by the chunk size whatever the file size. After every
+chunk the byte offset is checkpointed, so a failed run resumes where it
+stopped with --resume; replaying a chunk is harmless because writes are
+upserts. Invalid rows go to a rejects file instead of failing the run.
+
+Running servers pick the new data up on their next catalog refresh.
+
+Feed columns:
+    products   id, name, price, rating, image_url, description, category, brand,
+               sizes, colors, is_trending, is_seasonal, is_bestseller
+               (sizes/colors as a JSON array or "S|M|L")
+    inventory  product_id, warehouse, and either stores (JSON object) or one
+               "store:<name>" column per store
+
+Usage (from backend/):
+    python -m pipelines.import_feed products feeds/products.csv
+    python -m pipelines.import_feed inventory feeds/stock.ndjson.gz --chunk-size 20000
+    python -m pipelines.import_feed inventory feeds/stock.csv --resume
+"""
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, NamedTuple, Tuple, Union
+import argparse
+import csv
+import gzip
+import io
+import json
+import math
+import os
+import sys
+import time
+
+from sqlalchemy import delete, insert, text
+
+from models.database import Inventory, Product, engine, init_db
+
+KINDS = ("products", "inventory")
+FORMATS = ("csv", "ndjson")
+METHODS = ("auto", "copy", "executemany")
+
+PRODUCT_COLUMNS = (
+    "id", "name", "price", "rating", "image_url", "description", "category",
+    "brand", "sizes", "colors", "is_trending", "is_seasonal", "is_bestseller"
+)
+INVENTORY_COLUMNS = ("product_id", "warehouse_stock", "store_stocks")
+STORE_COLUMN_PREFIX = "store:"
+# Keeps IN (...) lists under every driver's bind parameter limit
+DELETE_BATCH = 500
+
+
+class FeedError(Exception):
+    """The feed cannot be imported (bad header, too many rejected rows, ...)"""
+
+
+# Readers: yield (record, byte offset just past the record)
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def _lines(f) -> Iterator[Tuple[str, int]]:
+    """Decoded lines with the offset after each one.
+
+    Reading line by line (rather than through a text wrapper) keeps
+    ``tell`` usable, and the csv module only pulls the lines a record
+    needs, so offsets stay exact even for quoted multi-line fields.
+    """
+    while True:
+        line = f.readline()
+        if not line:
+            return
+        yield line.decode("utf-8-sig"), f.tell()
+
+
+def read_csv(f, offset: int) -> Iterator[Tuple[Dict, int]]:
+    position = {"offset": 0}
+
+    def tracked():
+        for line, end in _lines(f):
+            position["offset"] = end
+            yield line
+
+    reader = csv.reader(tracked())
+    header = [h.strip() for h in next(reader, [])]
+    if offset > position["offset"]:
+        f.seek(offset)
+    for values in reader:
+        if not values:
+            continue
+        yield dict(zip(header, values)), position["offset"]
+
+
+class Undecodable(NamedTuple):
+    """A feed line that is not valid JSON; rejected like any invalid row"""
+    line: str
+    error: str
+
+
+def read_ndjson(f, offset: int) -> Iterator[Tuple[Union[Dict, Undecodable], int]]:
+    if offset:
+        f.seek(offset)
+    for line, end in _lines(f):
+        if line.strip():
+            try:
+                yield json.loads(line), end
+            except ValueError as e:
+                yield Undecodable(line.rstrip("\r\n"), str(e)), end
+
+
+# Validation: raw feed record -> table row, ValueError on bad data
+
+def _bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y", "t")
+
+
+def _list(value) -> List[str]:
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    value = (value or "").strip()
+    if value.startswith("["):
+        return [str(v) for v in json.loads(value)]
+    return [v.strip() for v in value.split("|") if v.strip()]
+
+
+def _record(raw) -> Dict:
+    if isinstance(raw, Undecodable):
+        raise ValueError(f"invalid JSON: {raw.error}")
+    if not isinstance(raw, dict):
+        raise ValueError("record must be a JSON object")
+    return raw
+
+
+def _number(value, field: str) -> float:
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{field} must be a finite number")
+    return number
+
+
+def _count(value, field: str) -> int:
+    quantity = int(_number(value, field)) if value not in (None, "") else 0
+    if quantity < 0:
+        raise ValueError(f"{field} must not be negative")
+    return quantity
+
+
+def validate_product(raw: Dict) -> Dict:
+    product_id = str(raw.get("id") or "").strip()
+    name = str(raw.get("name") or "").strip()
+    if not product_id or not name:
+        raise ValueError("id and name are required")
+    price = _number(raw["price"], "price")
+    rating = _number(raw.get("rating") or 0, "rating")
+    if price < 0:
+        raise ValueError("price must not be negative")
+    if not 0 <= rating <= 5:
+        raise ValueError("rating must be between 0 and 5")
+    return {
+        "id": product_id,
+        "name": name,
+        "price": price,
+        "rating": rating,
+        "image_url": raw.get("image_url") or "",
+        "description": raw.get("description") or "",
+        "category": str(raw.get("category") or "").strip().lower(),
+        "brand": str(raw.get("brand") or "").strip(),
+        "sizes": _list(raw.get("sizes")),
+        "colors": _list(raw.get("colors")),
+        "is_trending": _bool(raw.get("is_trending", False)),
+        "is_seasonal": _bool(raw.get("is_seasonal", False)),
+        "is_bestseller": _bool(raw.get("is_bestseller", False))
+    }
+
+
+def validate_inventory(raw: Dict) -> Dict:
+    product_id = str(raw.get("product_id") or "").strip()
+    if not product_id:
+        raise ValueError("product_id is required")
+    stores = raw.get("stores")
+    if isinstance(stores, str):
+        stores = json.loads(stores) if stores.strip() else {}
+    if stores is None:
+        stores = {
+            key[len(STORE_COLUMN_PREFIX):]: value
+            for key, value in raw.items()
+            if key.startswith(STORE_COLUMN_PREFIX) and value not in (None, "")
+        }
+    if not isinstance(stores, dict):
+        raise ValueError("stores must be an object of store -> quantity")
+    return {
+        "product_id": product_id,
+        "warehouse_stock": _count(raw.get("warehouse", raw.get("warehouse_stock")), "warehouse"),
+        "store_stocks": {str(store): _count(qty, f"stores.{store}") for store, qty in stores.items()}
+    }
+
+
+VALIDATORS: Dict[str, Callable[[Dict], Dict]] = {"products": validate_product, "inventory": validate_inventory}
+KEY_FIELD = {"products": "id", "inventory": "product_id"}
+
+
+# Writers: one transaction per chunk
+
+def _upsert_products(conn, rows: List[Dict]):
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(Product.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["id"],
+            set_={column: stmt.excluded[column] for column in PRODUCT_COLUMNS if column != "id"}
+        )
+        conn.execute(stmt, rows)
+        return
+    _replace(conn, Product.__table__.c.id, [r["id"] for r in rows])
+    conn.execute(insert(Product.__table__), rows)
+
+
+def _replace(conn, key_column, keys: List[str]):
+    for start in range(0, len(keys), DELETE_BATCH):
+        conn.execute(delete(key_column.table).where(key_column.in_(keys[start:start + DELETE_BATCH])))
+
+
+def _replace_inventory(conn, rows: List[Dict]):
+    # product_id is not unique in the schema, so replace instead of ON CONFLICT
+    now = datetime.utcnow()
+    _replace(conn, Inventory.__table__.c.product_id, [r["product_id"] for r in rows])
+    conn.execute(insert(Inventory.__table__), [{**r, "last_updated": now} for r in rows])
+
+
+def _copy(conn, table: str, columns: Tuple[str, ...], rows: List[Dict]):
+    """COPY rows into a table through the raw psycopg2 cursor"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            json.dumps(row[c]) if isinstance(row[c], (list, dict)) else row[c]
+            for c in columns
+        ])
+    buffer.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _copy_products(conn, rows: List[Dict]):
+    conn.execute(text("CREATE TEMP TABLE import_products (LIKE products) ON COMMIT DROP"))
+    _copy(conn, "import_products", PRODUCT_COLUMNS, rows)
+    columns = ", ".join(PRODUCT_COLUMNS)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in PRODUCT_COLUMNS if c != "id")
+    conn.execute(text(
+        f"INSERT INTO products ({columns}, created_at) SELECT {columns}, now() FROM import_products "
+        f"ON CONFLICT (id) DO UPDATE SET {updates}"
+    ))
+
+
+def _copy_inventory(conn, rows: List[Dict]):
+    conn.execute(text(
+        "CREATE TEMP TABLE import_inventory "
+        "(product_id varchar, warehouse_stock integer, store_stocks json) ON COMMIT DROP"
+    ))
+    _copy(conn, "import_inventory", INVENTORY_COLUMNS, rows)
+    conn.execute(text("DELETE FROM inventory WHERE product_id IN (SELECT product_id FROM import_inventory)"))
+    conn.execute(text(
+        "INSERT INTO inventory (product_id, warehouse_stock, store_stocks, last_updated) "
+        "SELECT product_id, warehouse_stock, store_stocks, now() FROM import_inventory"
+    ))
+
+
+WRITERS = {
+    ("products", "executemany"): _upsert_products,
+    ("inventory", "executemany"): _replace_inventory,
+    ("products", "copy"): _copy_products,
+    ("inventory", "copy"): _copy_inventory
+}
+
+
+def resolve_method(method: str) -> str:
+    if method == "auto":
+        return "copy" if engine.dialect.name == "postgresql" else "executemany"
+    if method == "copy" and engine.dialect.name != "postgresql":
+        raise FeedError("COPY needs PostgreSQL")
+    return method
+
+
+# Checkpoints
+
+def load_checkpoint(path: str, feed: str) -> Dict:
+    try:
+        with open(path) as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if checkpoint.get("feed") != os.path.abspath(feed) or checkpoint.get("size") != os.path.getsize(feed):
+        raise FeedError(f"Checkpoint {path} belongs to a different or changed feed; delete it to start over")
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: Dict):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+
+def run(args) -> Dict:
+    method = resolve_method(args.method)
+    fmt = args.format or ("ndjson" if ".ndjson" in args.feed or ".jsonl" in args.feed else "csv")
+    checkpoint_path = args.checkpoint or f"{args.feed}.checkpoint.json"
+    checkpoint = load_checkpoint(checkpoint_path, args.feed) if args.resume else {}
+    if checkpoint.get("done"):
+        print(f"Feed already imported ({checkpoint['rows']} rows); delete {checkpoint_path} to run again")
+        return checkpoint
+
+    if args.create_tables:
+        init_db()
+
+    validate = VALIDATORS[args.kind]
+    key_field = KEY_FIELD[args.kind]
+    write = WRITERS[(args.kind, method)]
+    reader = read_csv if fmt == "csv" else read_ndjson
+
+    offset = checkpoint.get("offset", 0)
+    totals = {"rows": checkpoint.get("rows", 0), "rejected": checkpoint.get("rejected", 0), "chunks": 0}
+    record_number = checkpoint.get("records", 0)
+    started = time.perf_counter()
+    last_report = started
+    # Rejects past the checkpoint are rewritten when their chunk is replayed
+    rejects = open(args.rejects or f"{args.feed}.rejects.ndjson", "a" if checkpoint else "w")
+    rejects.truncate(checkpoint.get("rejects_offset", 0))
+
+    def flush(chunk: Dict[str, Dict], end: int, done: bool = False):
+        if chunk:
+            with engine.begin() as conn:
+                write(conn, list(chunk.values()))
+        totals["rows"] += len(chunk)
+        totals["chunks"] += 1
+        rejects.flush()
+        save_checkpoint(checkpoint_path, {
+            "feed": os.path.abspath(args.feed),
+            "size": os.path.getsize(args.feed),
+            "kind": args.kind,
+            "offset": end,
+            "records": record_number,
+            "rows": totals["rows"],
+            "rejected": totals["rejected"],
+            "rejects_offset": rejects.tell(),
+            "done": done
+        })
+
+    try:
+        with _open(args.feed) as f:
+            # Later rows for the same key win, as they would row by row
+            chunk: Dict[str, Dict] = {}
+            end = offset
+            for raw, end in reader(f, offset):
+                record_number += 1
+                try:
+                    row = validate(_record(raw))
+                except (ValueError, KeyError, TypeError, OverflowError) as e:
+                    totals["rejected"] += 1
+                    original = raw.line if isinstance(raw, Undecodable) else raw
+                    rejects.write(json.dumps({"record": record_number, "error": str(e), "row": original}) + "\n")
+                    if args.max_errors is not None and totals["rejected"] > args.max_errors:
+                        raise FeedError(f"More than {args.max_errors} rejected rows; see {rejects.name}")
+                    continue
+                chunk[row[key_field]] = row
+
+                if len(chunk) >= args.chunk_size:
+                    flush(chunk, end)
+                    chunk = {}
+                    now = time.perf_counter()
+                    if now - last_report >= args.report_every:
+                        last_report = now
+                        print(json.dumps({
+                            "rows": totals["rows"],
+                            "rejected": totals["rejected"],
+                            "rows_per_s": round((totals["rows"] - checkpoint.get("rows", 0)) / (now - started), 1)
+                        }), flush=True)
+            flush(chunk, end, done=True)
+    finally:
+        rejects.close()
+
+    elapsed = time.perf_counter() - started
+    imported = totals["rows"] - checkpoint.get("rows", 0)
+    summary = {
+        "kind": args.kind,
+        "feed": args.feed,
+        "format": fmt,
+        "method": method,
+        "rows": totals["rows"],
+        "imported_this_run": imported,
+        "rejected": totals["rejected"],
+        "chunks": totals["chunks"],
+        "elapsed_s": round(elapsed, 2),
+        "rows_per_s": round(imported / elapsed, 1) if elapsed else 0.0,
+        "resumed_from_offset": offset
+    }
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("feed", help="CSV or NDJSON file, optionally .gz")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the file name")
+    parser.add_argument("--method", choices=METHODS, default="auto",
+                        help="COPY on PostgreSQL, multi-row upserts elsewhere")
+    parser.add_argument("--chunk-size", type=int, default=5_000)
+    parser.add_argument("--resume", action="store_true", help="continue from the last checkpoint")
+    parser.add_argument("--checkpoint", help="default: <feed>.checkpoint.json")
+    parser.add_argument("--rejects", help="default: <feed>.rejects.ndjson")
+    parser.add_argument("--max-errors", type=int, help="abort after this many rejected rows")
+    parser.add_argument("--report-every", type=float, default=5.0, help="seconds between progress lines")
+    parser.add_argument("--create-tables", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        print(json.dumps(run(args), indent=2))
+    except FeedError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        sys.exit(1)
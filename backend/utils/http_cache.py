@@ -0,0 +1,70 @@
+from typing import Any, Awaitable, Callable, Dict
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from utils.product_json import RawJSONResponse
+
+# Cache-Control policy per endpoint family
+CACHE_CONTROL = {
+    "products": "public, max-age=60",
+    "product": "public, max-age=300",
+    "search": "public, max-age=60",
+    "inventory": "no-cache",
+    "recommendations": "public, max-age=60"
+}
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag from version tokens and request parameters"""
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Evaluate If-None-Match (weak comparison, as RFC 9110 requires for GET)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _finish(content: Any, headers: Dict[str, str]) -> Response:
+    if isinstance(content, Response):
+        content.headers.update(headers)
+        return content
+    return RawJSONResponse(content=content, headers=headers)
+
+
+def conditional_response(
+    request: Request,
+    etag: str,
+    cache_control: str,
+    build: Callable[[], Any]
+) -> Response:
+    """Answer 304 when the client copy is current, otherwise build the body.
+
+    ``build`` is only called on a miss, so unchanged resources cost neither
+    the lookup nor the serialization.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return _finish(build(), headers)
+
+
+async def conditional_response_async(
+    request: Request,
+    etag: str,
+    cache_control: str,
+    build: Callable[[], Awaitable[Any]]
+) -> Response:
+    """conditional_response for bodies produced by a coroutine"""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return _finish(await build(), headers)
@@ -0,0 +1,127 @@
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+import json
+import os
+import threading
+import time
+import uuid
+
+from dotenv import load_dotenv
+
+from utils.redis_manager import redis_manager
+
+load_dotenv()
+
+INVENTORY_EVENTS_CHANNEL = os.getenv("INVENTORY_EVENTS_CHANNEL", "inventory:changes")
+
+# Called with the products whose stock changed, or None to drop everything
+InventoryListener = Callable[[Optional[FrozenSet[str]]], None]
+
+
+class InventoryEventBus:
+    """Stock change feed that keeps every worker's caches in step.
+
+    Listeners in the publishing process are called synchronously, so a
+    worker always sees its own writes. With Redis the event is also
+    published on a pub/sub channel and a daemon thread in every other
+    worker relays it to that worker's listeners. Pub/sub does not replay
+    missed messages, so each (re)subscription tells listeners to drop
+    everything instead.
+    """
+
+    def __init__(self, channel: str = INVENTORY_EVENTS_CHANNEL):
+        self.channel = channel
+        self.client = redis_manager.client if redis_manager.use_redis else None
+        # Lets a worker skip its own events when they come back over the channel
+        self.origin = uuid.uuid4().hex
+        self._listeners: List[InventoryListener] = []
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"published": 0, "received": 0, "resets": 0, "errors": 0}
+
+    def subscribe(self, listener: InventoryListener):
+        """Register a callback for stock changes in any worker"""
+        self._listeners.append(listener)
+
+    def publish(self, product_ids: Iterable[str], reason: str):
+        """Announce that the live stock of these products changed"""
+        changed = frozenset(product_ids)
+        if not changed:
+            return
+        self._notify(changed)
+        self._stats["published"] += 1
+        if self.client is None:
+            return
+        try:
+            self.client.publish(self.channel, json.dumps({
+                "origin": self.origin,
+                "product_ids": sorted(changed),
+                "reason": reason,
+                "ts": time.time()
+            }))
+        except Exception as e:
+            self._stats["errors"] += 1
+            print(f"Inventory event publish error: {e}")
+
+    def _notify(self, product_ids: Optional[FrozenSet[str]]):
+        for listener in list(self._listeners):
+            try:
+                listener(product_ids)
+            except Exception as e:
+                print(f"Inventory listener error: {e}")
+
+    def start(self):
+        """Relay other workers' events in a daemon thread (Redis only)"""
+        if self.client is None or self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._listen, name="inventory-events", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _listen(self):
+        while not self._stop_event.is_set():
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Anything published while we were not subscribed is lost
+                self._stats["resets"] += 1
+                self._notify(None)
+                while not self._stop_event.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self._receive(message["data"])
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"Inventory event feed error: {e}")
+                self._stop_event.wait(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def _receive(self, data: str):
+        event = json.loads(data)
+        if event["origin"] == self.origin:
+            return
+        self._stats["received"] += 1
+        self._notify(frozenset(event["product_ids"]))
+
+    def stats(self) -> Dict:
+        return {
+            "backend": "redis" if self.client is not None else "memory",
+            "channel": self.channel,
+            "listeners": len(self._listeners),
+            **self._stats
+        }
+
+
+# Singleton instance
+inventory_events = InventoryEventBus()
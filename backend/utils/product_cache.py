@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from typing import Dict, Optional
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from apis.catalog_store import CatalogSnapshot, catalog_store
+from utils.redis_manager import redis_manager
+
+load_dotenv()
+
+PRODUCT_CACHE_SIZE = int(os.getenv("PRODUCT_CACHE_SIZE", "10000"))
+PRODUCT_CACHE_TTL = int(os.getenv("PRODUCT_CACHE_TTL", "300"))
+PRODUCT_CACHE_REDIS_TTL = int(os.getenv("PRODUCT_CACHE_REDIS_TTL", "3600"))
+PRODUCT_CACHE_NEGATIVE_TTL = int(os.getenv("PRODUCT_CACHE_NEGATIVE_TTL", "30"))
+
+# Stored in place of a product to remember that an id does not exist
+_MISSING = {"__missing__": True}
+
+
+class ProductCache:
+    """Read-through product cache: bounded in-process L1, Redis L2.
+
+    L1 entries carry the catalog version they were read from. When the
+    catalog changes, entries for unchanged products are carried over to the
+    new version and only changed or removed products are evicted. L2 keys
+    are scoped by catalog version, so workers that have not reloaded yet
+    can never write stale products under the new version.
+    """
+
+    def __init__(
+        self,
+        max_size: int = PRODUCT_CACHE_SIZE,
+        ttl: int = PRODUCT_CACHE_TTL,
+        negative_ttl: int = PRODUCT_CACHE_NEGATIVE_TTL
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        # product_id -> (expires_at, version, product or None)
+        self._l1: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0
+        }
+        catalog_store.subscribe(self._on_catalog_change)
+
+    def get(self, product_id: str, snapshot: Optional[CatalogSnapshot] = None) -> Optional[Dict]:
+        """Get a product, loading it from the snapshot on a miss"""
+        snapshot = snapshot or catalog_store.snapshot
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._l1.get(product_id)
+            if entry is not None and entry[0] > now and entry[1] == snapshot.version:
+                self._l1.move_to_end(product_id)
+                self._stats["negative_hits" if entry[2] is None else "l1_hits"] += 1
+                return entry[2]
+
+        product = self._get_l2(product_id, snapshot)
+        if product is not None:
+            self._stats["l2_hits"] += 1
+            product = None if product == _MISSING else product
+        else:
+            self._stats["misses"] += 1
+            product = snapshot.get(product_id)
+            self._set_l2(product_id, snapshot, product)
+
+        self._set_l1(product_id, snapshot.version, product)
+        return product
+
+    def invalidate(self, *product_ids: str):
+        """Evict products from L1 and from the current version in L2"""
+        with self._lock:
+            for product_id in product_ids:
+                if self._l1.pop(product_id, None) is not None:
+                    self._stats["invalidations"] += 1
+        if redis_manager.use_redis and product_ids:
+            version = catalog_store.version
+            redis_manager.delete_cached_products(*(f"{version}:{pid}" for pid in product_ids))
+
+    def clear(self):
+        with self._lock:
+            self._stats["invalidations"] += len(self._l1)
+            self._l1.clear()
+
+    def stats(self) -> Dict:
+        hits = sum(self._stats[k] for k in ("l1_hits", "l2_hits", "negative_hits"))
+        lookups = hits + self._stats["misses"]
+        return {
+            **self._stats,
+            "size": len(self._l1),
+            "max_size": self.max_size,
+            "l2_enabled": redis_manager.use_redis,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _set_l1(self, product_id: str, version: str, product: Optional[Dict]):
+        ttl = self.ttl if product is not None else self.negative_ttl
+        with self._lock:
+            self._l1[product_id] = (time.monotonic() + ttl, version, product)
+            self._l1.move_to_end(product_id)
+            while len(self._l1) > self.max_size:
+                self._l1.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _get_l2(self, product_id: str, snapshot: CatalogSnapshot) -> Optional[Dict]:
+        # Without Redis the fallback store lives in this process, L1 already covers it
+        if not redis_manager.use_redis:
+            return None
+        return redis_manager.get_cached_product(f"{snapshot.version}:{product_id}")
+
+    def _set_l2(self, product_id: str, snapshot: CatalogSnapshot, product: Optional[Dict]):
+        if not redis_manager.use_redis:
+            return
+        if product is None:
+            redis_manager.cache_product(f"{snapshot.version}:{product_id}", _MISSING, ttl=self.negative_ttl)
+        else:
+            redis_manager.cache_product(f"{snapshot.version}:{product_id}", product, ttl=PRODUCT_CACHE_REDIS_TTL)
+
+    def _on_catalog_change(self, old: CatalogSnapshot, new: CatalogSnapshot):
+        """Carry unchanged entries over to the new version, drop the rest"""
+        if old.version == new.version:
+            return
+
+        with self._lock:
+            for product_id, (expires_at, version, product) in list(self._l1.items()):
+                if version == old.version and new.get(product_id) == product:
+                    self._l1[product_id] = (expires_at, new.version, new.get(product_id))
+                else:
+                    del self._l1[product_id]
+                    self._stats["invalidations"] += 1
+
+
+# Singleton instance
+product_cache = ProductCache()
@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable
+import json
+
+from fastapi.responses import Response
+
+from apis.catalog_mmap import ROW_CACHE_SIZE
+from apis.catalog_store import CatalogSnapshot, catalog_store
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(obj: Any):
+    # Snapshot records are read-only mappings
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    return str(obj)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class RawJSONResponse(Response):
+    """JSON response that sends pre-serialized bytes as-is"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, (bytes, bytearray, memoryview)):
+            return bytes(content)
+        return dumps(content)
+
+
+class ProductJSONCache:
+    """Per-product JSON fragments of the current catalog version, least recently used evicted.
+
+    Bounded like the mmap row cache, so a worker never holds a fragment
+    for every catalog row. Callers pass the catalog version they read
+    before fetching the products; fragments are only cached while that
+    version is still current, so products from a snapshot swapped out
+    mid-request are serialized but never cached as current.
+    """
+
+    def __init__(self, max_size: int = ROW_CACHE_SIZE):
+        self.max_size = max_size
+        # (version, {product_id: bytes}) swapped as a unit on catalog change
+        self._state = ("", OrderedDict())
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+        catalog_store.subscribe(self._on_catalog_change)
+
+    def _on_catalog_change(self, old: CatalogSnapshot, new: CatalogSnapshot):
+        if old.version != new.version:
+            self._state = (new.version, OrderedDict())
+
+    def fragment(self, product: Dict, version: str) -> bytes:
+        """JSON bytes for a product read from catalog ``version``, serialized once per version"""
+        if version != catalog_store.version:
+            return dumps(product)
+        state_version, fragments = self._state
+        if state_version != version:
+            fragments = OrderedDict()
+            self._state = (version, fragments)
+
+        product_id = product["id"]
+        fragment = fragments.get(product_id)
+        if fragment is not None:
+            fragments.move_to_end(product_id)
+            self._stats["hits"] += 1
+            return fragment
+
+        self._stats["misses"] += 1
+        fragment = fragments[product_id] = dumps(product)
+        while len(fragments) > self.max_size:
+            fragments.popitem(last=False)
+            self._stats["evictions"] += 1
+        return fragment
+
+    def list_body(self, products: Iterable[Dict], version: str) -> bytes:
+        """Splice cached fragments into a {"success", "products", "count"} body"""
+        fragments = [self.fragment(p, version) for p in products]
+        return b'{"success":true,"products":[' + b",".join(fragments) + b'],"count":%d}' % len(fragments)
+
+    def item_body(self, product: Dict, version: str) -> bytes:
+        """Splice a cached fragment into a {"success", "product"} body"""
+        return b'{"success":true,"product":' + self.fragment(product, version) + b"}"
+
+    def stats(self) -> Dict:
+        version, fragments = self._state
+        return {**self._stats, "version": version, "fragments": len(fragments), "max_size": self.max_size}
+
+
+# Singleton instance
+product_json_cache = ProductJSONCache()
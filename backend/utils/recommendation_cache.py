@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+from apis.catalog_store import CatalogSnapshot, catalog_store
+
+load_dotenv()
+
+RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "5000"))
+
+
+def cart_key(product_ids: Iterable[str]) -> Tuple[str, ...]:
+    """Order-insensitive key for a set of product ids"""
+    return tuple(sorted(set(pid for pid in product_ids if pid)))
+
+
+class RecommendationCache:
+    """LRU cache of recommendation results with request collapsing.
+
+    Keys are scoped to the catalog snapshot version, and the cache is
+    emptied whenever the catalog changes. Concurrent misses for the same
+    key share a single computation, which runs in the threadpool so the
+    event loop keeps serving other requests.
+    """
+
+    def __init__(self, max_size: int = RECOMMENDATION_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._stats = {"hits": 0, "misses": 0, "collapsed": 0, "evictions": 0}
+        catalog_store.subscribe(self._on_catalog_change)
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Cached result for ``key``, computing it at most once at a time"""
+        key = (catalog_store.version, key)
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return self._entries[key]
+
+        while True:
+            pending = self._in_flight.get(key)
+            if pending is None:
+                break
+            self._stats["collapsed"] += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # Only the leader was cancelled: take over its computation
+                if not pending.cancelled():
+                    raise
+
+        self._stats["misses"] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await run_in_threadpool(compute)
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody else may be waiting; mark the exception as retrieved
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            self._in_flight.pop(key, None)
+            # Leader cancelled (or interrupted): release the waiters instead of leaving them hanging
+            if not future.done():
+                future.cancel()
+
+        # A catalog swap during the computation makes the result stale
+        if key[0] == catalog_store.version:
+            self._store(key, result)
+        return result
+
+    def _store(self, key: Hashable, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        # May be called from background threads; swapping the dict is atomic
+        self._entries = OrderedDict()
+
+    def stats(self) -> Dict:
+        lookups = self._stats["hits"] + self._stats["misses"] + self._stats["collapsed"]
+        return {
+            **self._stats,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hit_rate": round((lookups - self._stats["misses"]) / lookups, 4) if lookups else 0.0
+        }
+
+    def _on_catalog_change(self, old: CatalogSnapshot, new: CatalogSnapshot):
+        if old.version != new.version:
+            # Called from the refresh thread; swapping the dict is atomic
+            self._entries = OrderedDict()
+
+
+# Singleton instance
+recommendation_cache = RecommendationCache()
@@ -1,5 +1,6 @@
 import json
 import os
+import time
 from typing import Optional, Dict, Any
 from datetime import datetime
 from dotenv import load_dotenv
@@ -22,6 +23,36 @@ class RedisManager:
             print(f"⚠️  Redis not available, using in-memory storage: {e}")
             self.client = {}
             self.use_redis = False
+        # Expiry times for keys in the in-memory fallback
+        self._expires: Dict[str, float] = {}
+    
+    def _setex(self, key: str, ttl: int, value: str):
+        """SETEX that also works on the in-memory fallback"""
+        if self.use_redis:
+            self.client.setex(key, ttl, value)
+        else:
+            self.client[key] = value
+            self._expires[key] = time.time() + ttl
+    
+    def _get(self, key: str) -> Optional[str]:
+        """GET that honours TTLs on the in-memory fallback"""
+        if self.use_redis:
+            return self.client.get(key)
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.time():
+            self._delete(key)
+            return None
+        return self.client.get(key)
+    
+    def _delete(self, *keys: str):
+        """DEL that also works on the in-memory fallback"""
+        if self.use_redis:
+            if keys:
+                self.client.delete(*keys)
+        else:
+            for key in keys:
+                self.client.pop(key, None)
+                self._expires.pop(key, None)
     
     def set_session(self, session_id: str, data: Dict[str, Any], ttl: int = 86400):
         """Store session data with TTL"""
@@ -71,7 +102,7 @@ class RedisManager:
     def delete_session(self, session_id: str):
         """Delete session data"""
         try:
-            self.client.delete(f"session:{session_id}")
+            self._delete(f"session:{session_id}")
             return True
         except Exception as e:
             print(f"Redis delete error: {e}")
@@ -80,7 +111,7 @@ class RedisManager:
     def cache_product(self, product_id: str, data: Dict[str, Any], ttl: int = 3600):
         """Cache product data"""
         try:
-            self.client.setex(
+            self._setex(
                 f"product:{product_id}",
                 ttl,
                 json.dumps(data, default=str)
@@ -93,7 +124,7 @@ class RedisManager:
     def get_cached_product(self, product_id: str) -> Optional[Dict[str, Any]]:
         """Get cached product data"""
         try:
-            data = self.client.get(f"product:{product_id}")
+            data = self._get(f"product:{product_id}")
             if data:
                 return json.loads(data)
             return None
@@ -101,6 +132,15 @@ class RedisManager:
             print(f"Redis get cache error: {e}")
             return None
     
+    def delete_cached_products(self, *product_ids: str):
+        """Drop cached product data"""
+        try:
+            self._delete(*(f"product:{product_id}" for product_id in product_ids))
+            return True
+        except Exception as e:
+            print(f"Redis cache delete error: {e}")
+            return False
+    
     def add_to_conversation(self, session_id: str, message: Dict[str, Any]):
         """Add message to conversation history"""
         try:
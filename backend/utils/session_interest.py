@@ -0,0 +1,107 @@
+from typing import Dict, Iterable, List, Optional
+import os
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Seconds for a session signal to lose half its weight
+SESSION_INTEREST_HALF_LIFE = float(os.getenv("SESSION_INTEREST_HALF_LIFE", "1800"))
+# Share of the final ranking decided by session interest (0 disables re-ranking)
+SESSION_INTEREST_WEIGHT = float(os.getenv("SESSION_INTEREST_WEIGHT", "0.3"))
+# Candidates fetched per requested result when re-ranking by session interest
+SESSION_RERANK_POOL = 2
+
+EVENT_WEIGHTS = {"shown": 1.0, "cart_add": 3.0, "cart_remove": -2.0}
+# Histogram entries kept per dimension, and the weight below which entries are dropped
+MAX_ENTRIES = 20
+MIN_WEIGHT = 0.01
+
+
+def _decay(histogram: Dict[str, float], factor: float) -> Dict[str, float]:
+    return {key: weight * factor for key, weight in histogram.items()}
+
+
+def _trim(histogram: Dict[str, float]) -> Dict[str, float]:
+    kept = [(k, w) for k, w in histogram.items() if w >= MIN_WEIGHT]
+    if len(kept) > MAX_ENTRIES:
+        kept = sorted(kept, key=lambda x: x[1], reverse=True)[:MAX_ENTRIES]
+    return dict(kept)
+
+
+def update_interest(
+    session_data: Dict,
+    products: Iterable[Optional[Dict]],
+    event: str = "shown",
+    now: Optional[float] = None
+) -> Dict:
+    """Fold product events into the session's decayed category/brand histogram.
+
+    The model lives inside ``session_data`` under ``"interest"``, so it is
+    saved with the session by the caller's existing write. Each update
+    decays the old weights by elapsed time, then adds the event weight for
+    every product's category and brand.
+    """
+    now = now if now is not None else time.time()
+    interest = session_data.get("interest") or {"categories": {}, "brands": {}, "updated_at": now, "version": 0}
+
+    factor = 0.5 ** (max(now - interest["updated_at"], 0.0) / SESSION_INTEREST_HALF_LIFE)
+    categories = _decay(interest["categories"], factor)
+    brands = _decay(interest["brands"], factor)
+
+    weight = EVENT_WEIGHTS[event]
+    for product in products:
+        if not product or "category" not in product:
+            continue
+        categories[product["category"]] = max(categories.get(product["category"], 0.0) + weight, 0.0)
+        # Partial results (search hits, agent summaries) may carry no brand
+        brand = product.get("brand")
+        if brand:
+            brands[brand] = max(brands.get(brand, 0.0) + weight, 0.0)
+
+    interest = {
+        "categories": _trim(categories),
+        "brands": _trim(brands),
+        "updated_at": now,
+        "version": interest["version"] + 1
+    }
+    session_data["interest"] = interest
+    return interest
+
+
+def rerank(
+    products: List[Dict],
+    interest: Optional[Dict],
+    limit: Optional[int] = None,
+    weight: float = SESSION_INTEREST_WEIGHT
+) -> List[Dict]:
+    """Blend each product's rank with its session affinity and keep the best ``limit``.
+
+    Ranks rather than raw scores are used, so the blend behaves the same for
+    every strategy. Ties keep the incoming order.
+    """
+    limit = len(products) if limit is None else limit
+    if not interest or weight <= 0 or not products:
+        return products[:limit]
+
+    categories, brands = interest["categories"], interest["brands"]
+    # Decay is a common factor, so weights compare without bringing them up to date
+    top_category = max(categories.values(), default=0.0) or 1.0
+    top_brand = max(brands.values(), default=0.0) or 1.0
+    n = len(products)
+
+    keyed = []
+    for position, product in enumerate(products):
+        match = (
+            categories.get(product.get("category"), 0.0) / top_category
+            + brands.get(product.get("brand"), 0.0) / top_brand
+        ) / 2
+        keyed.append(((1 - weight) * (1 - position / n) + weight * match, product))
+    keyed.sort(key=lambda x: x[0], reverse=True)
+    return [product for _, product in keyed[:limit]]
+
+
+def interest_token(interest: Optional[Dict]) -> int:
+    """Changes whenever the interest model changes, for cache validators"""
+    return interest["version"] if interest else 0